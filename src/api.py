@@ -0,0 +1,324 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager, nullcontext
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from openai import APITimeoutError
+from pdf2image import pdfinfo_from_path
+from pdf2image.exceptions import PDFInfoNotInstalledError, PDFPageCountError, PDFSyntaxError
+from pydantic import BaseModel, Field
+
+from src.scripts.parse_pdf import init_ocr_worker, ocr_page
+from src.scripts.process_job import structure_job_description
+from src.scripts.tailor_resume import tailor_resume
+from src.service.coalesce import coalescing_stats
+from src.service.deadline import Deadline, DeadlineExceeded
+from src.service.ocr import DEFAULT_PREPROCESS
+from src.service.usage import usage_tracker
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+# Worker processes for OCR (CPU-bound) and threads for the LLM calls (I/O-bound, blocking clients)
+DEFAULT_OCR_WORKERS: int = int(os.environ.get("API_OCR_WORKERS") or 0) or os.cpu_count() or 2
+DEFAULT_LLM_WORKERS: int = int(os.environ.get("API_LLM_WORKERS", 16))
+
+# Errors of a call that ran out of time (its deadline, or the provider's timeout), answered with a 504
+DEADLINE_ERRORS = (DeadlineExceeded, APITimeoutError, httpx.TimeoutException)
+
+
+# --------------- #
+# --- Metrics --- #
+# --------------- #
+
+
+class ApiMetrics:
+    """Thread-safe per-endpoint requests, errors, in-flight requests and latency."""
+
+    FIELDS = ("requests", "errors", "in_flight", "seconds")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+        self.ocr_pages = 0
+        self.started_at = time.time()
+
+    def start(self, endpoint: str) -> None:
+        with self._lock:
+            self._endpoints[endpoint]["requests"] += 1
+            self._endpoints[endpoint]["in_flight"] += 1
+
+    def finish(self, endpoint: str, seconds: float, failed: bool) -> None:
+        with self._lock:
+            self._endpoints[endpoint]["in_flight"] -= 1
+            self._endpoints[endpoint]["seconds"] += seconds
+            self._endpoints[endpoint]["errors"] += int(failed)
+
+    def add_pages(self, pages: int) -> None:
+        with self._lock:
+            self.ocr_pages += pages
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {endpoint: dict(stats) for endpoint, stats in self._endpoints.items()}
+            ocr_pages = self.ocr_pages
+        for stats in endpoints.values():
+            stats["mean_seconds"] = stats["seconds"] / stats["requests"] if stats["requests"] else 0.0
+        return {"uptime_seconds": time.time() - self.started_at, "endpoints": endpoints, "ocr_pages": ocr_pages}
+
+
+# --------------- #
+# --- Schemas --- #
+# --------------- #
+
+
+class JobRequest(BaseModel):
+    text: str = Field(..., description="Raw job description")
+    deadline: Optional[float] = Field(None, description="Time budget in seconds")
+
+
+class TailorRequest(BaseModel):
+    resume: Dict[str, Any] = Field(..., description="Structured resume (process_resume output)")
+    job_description: Dict[str, Any] = Field(..., description="Structured job description (process_job output)")
+    deadline: Optional[float] = Field(None, description="Time budget in seconds, the sections not done by then "
+                                                        "are returned empty and listed in 'incomplete_sections'")
+
+
+# ------------------------ #
+# --- Helper Functions --- #
+# ------------------------ #
+
+
+def sse(event: str, data: Any) -> str:
+    """A Server-Sent Event, its data as JSON."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}\n\n"
+
+
+def event_stream(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def within_deadline(func: Callable, deadline: Optional[float], *args, **kwargs) -> Any:
+    """Run `func` under a deadline of `deadline` seconds, if any (in the worker thread running it)."""
+    with Deadline(deadline) if deadline else nullcontext():
+        return func(*args, **kwargs)
+
+
+# ----------- #
+# --- App --- #
+# ----------- #
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One process pool for the OCR of every request, so the event loop only awaits pages
+    app.state.ocr_executor = ProcessPoolExecutor(max_workers=app.state.ocr_workers, initializer=init_ocr_worker)
+    app.state.llm_executor = ThreadPoolExecutor(max_workers=app.state.llm_workers, thread_name_prefix="llm")
+    try:
+        yield
+    finally:
+        app.state.ocr_executor.shutdown(cancel_futures=True)
+        app.state.llm_executor.shutdown(cancel_futures=True)
+
+
+def create_app(ocr_workers: int = DEFAULT_OCR_WORKERS, llm_workers: int = DEFAULT_LLM_WORKERS) -> FastAPI:
+    """
+    The HTTP API: PDF to text, job structuring and resume tailoring, plus health and metrics.
+
+    Handlers are async: OCR pages run on a shared process pool and the (blocking) LLM calls on a thread pool,
+    so the event loop stays free to serve many requests at once. PDF pages and tailored sections can be
+    streamed as Server-Sent Events as soon as they are ready (`?stream=true`).
+
+    Examples
+    --------
+    >>> uvicorn.run(create_app(ocr_workers=4), host="127.0.0.1", port=8000)
+
+    """
+    app = FastAPI(title="auto-resume", lifespan=lifespan)
+    app.state.ocr_workers = ocr_workers
+    app.state.llm_workers = llm_workers
+    app.state.metrics = metrics = ApiMetrics()
+
+    @app.middleware("http")
+    async def record_metrics(request: Request, call_next):
+        # Streamed responses are timed until their headers are sent
+        endpoint = f"{request.method} {request.url.path}"
+        metrics.start(endpoint)
+        start, failed = time.perf_counter(), True
+        try:
+            response = await call_next(request)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            metrics.finish(endpoint, time.perf_counter() - start, failed)
+
+    async def run_llm(func: Callable, *args, deadline: Optional[float] = None) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(app.state.llm_executor, partial(within_deadline, func, deadline, *args))
+
+    # --- Health --- #
+
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        return {"status": "ok", "ocr_workers": app.state.ocr_workers, "llm_workers": app.state.llm_workers}
+
+    @app.get("/metrics")
+    async def get_metrics() -> Dict[str, Any]:
+        return {**metrics.report(), "usage": usage_tracker.report(), "coalescing": coalescing_stats.report()}
+
+    # --- PDF to Text --- #
+
+    @app.post("/pdf-to-text")
+    async def pdf_to_text(request: Request, stream: bool = False, preprocess: bool = DEFAULT_PREPROCESS):
+        """OCR the PDF sent as the request body, its pages in parallel on the process pool."""
+        body = await request.body()
+        if not body:
+            raise HTTPException(status_code=400, detail="Send the PDF as the request body")
+
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:  # pdftoppm reads files
+            f.write(body)
+        try:
+            info = await asyncio.to_thread(pdfinfo_from_path, f.name)
+        except (PDFPageCountError, PDFSyntaxError) as e:
+            os.unlink(f.name)
+            raise HTTPException(status_code=400, detail=f"Invalid PDF: {e}")
+        except PDFInfoNotInstalledError as e:
+            os.unlink(f.name)
+            raise HTTPException(status_code=503, detail=str(e))
+
+        loop = asyncio.get_running_loop()
+        pages = [loop.run_in_executor(app.state.ocr_executor, ocr_page, f.name, page, preprocess)
+                 for page in range(1, info["Pages"] + 1)]
+
+        async def texts() -> AsyncIterator[str]:
+            try:
+                for future in pages:  # in page order, each as soon as it and the pages before it are done
+                    yield await future
+                    metrics.add_pages(1)
+            finally:
+                for future in pages:
+                    future.cancel()
+                await asyncio.gather(*pages, return_exceptions=True)  # the file is read until the last page
+                os.unlink(f.name)
+
+        if not stream:
+            try:
+                return {"pages": info["Pages"], "text": "".join([text + "\n" async for text in texts()])}
+            except PDFInfoNotInstalledError as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            except Exception as e:
+                logger.error(f"OCR failed:\n   {e}")
+                raise HTTPException(status_code=500, detail=f"OCR failed: {e}")
+
+        async def events() -> AsyncIterator[str]:
+            yield sse("info", {"pages": info["Pages"]})
+            try:
+                page = 0
+                async for text in texts():
+                    page += 1
+                    yield sse("page", {"page": page, "text": text})
+                yield sse("done", {"pages": page})
+            except Exception as e:
+                logger.error(f"OCR failed:\n   {e}")
+                yield sse("error", {"detail": str(e)})
+
+        return event_stream(events())
+
+    # --- Job Structuring --- #
+
+    @app.post("/jobs/structure")
+    async def structure_job(job: JobRequest) -> Dict[str, Any]:
+        try:
+            return await run_llm(structure_job_description, job.text, deadline=job.deadline)
+        except DEADLINE_ERRORS as e:
+            raise HTTPException(status_code=504, detail=str(e) or type(e).__name__)
+
+    # --- Tailoring --- #
+
+    @app.post("/tailor")
+    async def tailor(tailoring: TailorRequest, stream: bool = False):
+        """Tailor a structured resume to a structured job, streaming each section as it is ready if `stream`."""
+        if not stream:
+            try:
+                return await run_llm(tailor_resume, tailoring.resume, tailoring.job_description,
+                                     deadline=tailoring.deadline)
+            except DEADLINE_ERRORS as e:
+                raise HTTPException(status_code=504, detail=str(e) or type(e).__name__)
+
+        loop = asyncio.get_running_loop()
+        sections: asyncio.Queue = asyncio.Queue()
+
+        def on_section(section: str, value: Any) -> None:  # called from the worker thread
+            loop.call_soon_threadsafe(sections.put_nowait, (section, value))
+
+        result = asyncio.ensure_future(run_llm(tailor_resume, tailoring.resume, tailoring.job_description,
+                                               on_section, deadline=tailoring.deadline))
+        result.add_done_callback(lambda _: sections.put_nowait(None))
+
+        async def events() -> AsyncIterator[str]:
+            while (item := await sections.get()) is not None:
+                yield sse("section", {"section": item[0], "value": item[1]})
+            try:
+                yield sse("result", result.result())
+            except Exception as e:
+                logger.error(f"Tailoring failed:\n   {e}")
+                yield sse("error", {"detail": str(e)})
+
+        return event_stream(events())
+
+    return app
+
+
+app = create_app()
+
+
+# ------------------- #
+# --- Script Args --- #
+# ------------------- #
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Serve PDF to text, job structuring and resume tailoring over HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--ocr_workers", type=int, default=DEFAULT_OCR_WORKERS, help="OCR worker processes")
+    parser.add_argument("--llm_workers", type=int, default=DEFAULT_LLM_WORKERS, help="Concurrent LLM requests")
+    return parser.parse_args()
+
+
+# ------------ #
+# --- Main --- #
+# ------------ #
+
+
+def main(
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        ocr_workers: int = DEFAULT_OCR_WORKERS,
+        llm_workers: int = DEFAULT_LLM_WORKERS,
+) -> None:
+    # A single server process: the OCR pool and the LLM clients are shared by every request
+    uvicorn.run(create_app(ocr_workers, llm_workers), host=host, port=port)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    main(host=args.host, port=args.port, ocr_workers=args.ocr_workers, llm_workers=args.llm_workers)
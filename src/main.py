@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+from rich import print as rprint
+from rich.table import Table
+
+from src.scripts.build_latex import DOCUMENT_FOLDERS, BuildJob, compile_pdf, render_document
+from src.scripts.parse_pdf import parse_pdf
+from src.scripts.process_job import structure_job_description
+from src.scripts.process_resume import structure_resume
+from src.scripts.tailor_resume import tailor_resume
+from src.scripts.utils import expand_paths, load_file_from_txt, save_to_json
+from src.service.coalesce import coalescing_stats
+from src.service.dag import Pipeline, PipelineResult, Stage
+from src.service.deadline import Deadline, check_deadline
+
+# ------------------- #
+# --- Stage Steps --- #
+# ------------------- #
+
+
+@lru_cache(maxsize=256)
+def load_text(path: str) -> str:
+    """Raw text of a resume or job description, OCR-ed once per PDF even if it is part of many pairs."""
+    if path.lower().endswith(".pdf"):
+        return parse_pdf(path)
+    return load_file_from_txt(path)
+
+
+def build_documents(
+        tailored_resume: Dict,
+        name: str,
+        template_name: str,
+        documents: List[str],
+        output_folder: str,
+) -> List[str]:
+    """Render and compile the documents of a tailored resume, returning the PDF paths."""
+    pdf_paths = []
+    for document in documents:
+        result = compile_pdf(BuildJob(
+            name=f"{name} ({document})",
+            tex_source=render_document(tailored_resume, document=document, template_name=template_name),
+            output_pdf=os.path.join(output_folder, DOCUMENT_FOLDERS[document], f"{name}_{document}.pdf"),
+        ))
+        if not result.ok:
+            raise RuntimeError(f"LaTeX build of '{result.name}' failed: {result.error}")
+        pdf_paths.append(result.output_pdf)
+    return pdf_paths
+
+
+def within_deadline(func: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Any]:
+    """Run a stage under its item's deadline, if any, failing it right away once the deadline has passed."""
+
+    def run(context: Dict[str, Any]) -> Any:
+        deadline = context.get("deadline")
+        if deadline is None:
+            return func(context)
+        with deadline:
+            check_deadline()
+            return func(context)
+
+    return run
+
+
+# ---------------- #
+# --- Pipeline --- #
+# ---------------- #
+
+
+def build_pipeline(
+        ocr_workers: int = 2,
+        llm_workers: int = 4,
+        latex_workers: int = 2,
+        template_name: str = "template_1",
+        documents: List[str] = ("resume", "letter"),
+        output_folder: str = "outputs",
+) -> Pipeline:
+    """
+    The full pipeline as a DAG: raw resume and job description -> structured resume and job (in parallel)
+    -> tailored resume -> PDFs, each stage with its own worker count.
+    """
+
+    def tailor(context: Dict[str, Any]) -> Dict:
+        tailored = tailor_resume(context["resume"], context["job"])
+        save_to_json(tailored, os.path.join(output_folder, DOCUMENT_FOLDERS["resume"]), file_type="Tailored Resume")
+        return tailored
+
+    def build(context: Dict[str, Any]) -> List[str]:
+        tailored = context["tailored"]
+        name = "_".join([tailored["contact_info"]["name"], tailored["company_applying"]]).replace(" ", "_")
+        return build_documents(tailored, name, template_name, documents, output_folder)
+
+    return Pipeline([
+        Stage("resume_text", within_deadline(lambda context: load_text(context["resume_path"])),
+              concurrency=ocr_workers),
+        Stage("job_text", within_deadline(lambda context: load_text(context["job_path"])), concurrency=ocr_workers),
+        Stage("resume", within_deadline(lambda context: structure_resume(context["resume_text"])),
+              depends_on=("resume_text",), concurrency=llm_workers),
+        Stage("job", within_deadline(lambda context: structure_job_description(context["job_text"])),
+              depends_on=("job_text",), concurrency=llm_workers),
+        Stage("tailored", within_deadline(tailor), depends_on=("resume", "job"), concurrency=llm_workers),
+        # The documents of a resume tailored at its deadline are still built, with its completed sections
+        Stage("pdf", build, depends_on=("tailored",), concurrency=latex_workers),
+    ])
+
+
+async def run_pipeline(
+        pipeline: Pipeline,
+        resume_paths: List[str],
+        job_paths: List[str],
+        deadline: Optional[float] = None,
+) -> List[PipelineResult]:
+    """Run every (resume, job) pair, each within its own `deadline` seconds from its admission, if any."""
+    items = ({"id": f"{os.path.basename(resume)} x {os.path.basename(job)}", "resume_path": resume, "job_path": job,
+              "deadline": Deadline(deadline) if deadline else None}
+             for resume, job in itertools.product(resume_paths, job_paths))
+
+    results = []
+    async for result in pipeline.run(items):
+        if result.ok:
+            rprint(f"[bold green]✓[/bold green] {result.item_id} ({result.seconds:.1f}s):\n   -> "
+                   + "\n   -> ".join(result.context["pdf"]))
+            if result.context["tailored"]["incomplete_sections"]:
+                rprint(f"   [yellow]incomplete within the deadline: "
+                       f"{', '.join(result.context['tailored']['incomplete_sections'])}[/yellow]")
+        else:
+            rprint(f"[bold red]✗[/bold red] {result.item_id}: {result.failed_stage} failed ({result.error})")
+        results.append(result)
+    return results
+
+
+def print_stage_report(pipeline: Pipeline) -> None:
+    table = Table("Stage", "Workers", "Processed", "Failed", "Busy time")
+    for name, stats in pipeline.stats.items():
+        table.add_row(name, str(pipeline.stages[name].concurrency), str(stats["processed"]), str(stats["failed"]),
+                      f"{stats['busy_seconds']:.1f}s")
+    rprint(table)
+
+
+# ------------------- #
+# --- Script Args --- #
+# ------------------- #
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Run the whole pipeline, from raw resumes and job descriptions (PDF or TXT) to tailored PDFs."
+    )
+    parser.add_argument(
+        "--resumes",
+        nargs="+",
+        required=True,
+        help="Raw resumes: files, globs, folders or @manifest.txt",
+    )
+    parser.add_argument(
+        "--jobs",
+        nargs="+",
+        required=True,
+        help="Raw job descriptions: files, globs, folders or @manifest.txt (every resume is tailored to every job)",
+    )
+    parser.add_argument("--ocr_workers", type=int, default=2, help="Concurrent PDF to text conversions")
+    parser.add_argument("--llm_workers", type=int, default=4, help="Concurrent items per LLM stage")
+    parser.add_argument("--latex_workers", type=int, default=os.cpu_count() or 2, help="Concurrent LaTeX builds")
+    parser.add_argument("--template", default="template_1", help="LaTeX template folder name")
+    parser.add_argument(
+        "--documents",
+        nargs="+",
+        choices=list(DOCUMENT_FOLDERS),
+        default=list(DOCUMENT_FOLDERS),
+        help="Documents to build for each tailored resume",
+    )
+    parser.add_argument("--output_path", default="outputs", help="Path to the output folder")
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Time budget of each (resume, job) pair in seconds, the tailored sections not done by then are left "
+             "empty",
+    )
+
+    return parser.parse_args()
+
+
+# ------------ #
+# --- Main --- #
+# ------------ #
+
+
+def main(
+        resume_paths: List[str],
+        job_paths: List[str],
+        ocr_workers: int = 2,
+        llm_workers: int = 4,
+        latex_workers: int = 2,
+        template_name: str = "template_1",
+        documents: List[str] = ("resume", "letter"),
+        output_folder: str = "outputs",
+        deadline: Optional[float] = None,
+) -> List[PipelineResult]:
+    if not resume_paths or not job_paths:
+        logger.error("Oups:\n   at least one resume and one job description are needed")
+        sys.exit(1)
+
+    pipeline = build_pipeline(ocr_workers, llm_workers, latex_workers, template_name, documents, output_folder)
+    results = asyncio.run(run_pipeline(pipeline, resume_paths, job_paths, deadline=deadline))
+    print_stage_report(pipeline)
+    coalescing_stats.print_report()  # pairs sharing a resume or a job send identical calls at the same time
+
+    return results
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    main(
+        resume_paths=expand_paths(args.resumes),
+        job_paths=expand_paths(args.jobs),
+        ocr_workers=args.ocr_workers,
+        llm_workers=args.llm_workers,
+        latex_workers=args.latex_workers,
+        template_name=args.template,
+        documents=args.documents,
+        output_folder=args.output_path,
+        deadline=args.deadline,
+    )
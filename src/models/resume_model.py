@@ -0,0 +1,68 @@
+from typing import Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+
+# ------------------------- #
+# --- Structured Resume --- #
+# ------------------------- #
+
+
+# --- Contact Information --- #
+class ResumeContactInfo(BaseModel):
+    name: str = Field(..., description="Full name of the individual")
+    phone: str = Field("", description="Contact phone number")
+    city_country: str = Field("", description="City and country of residence")
+    email: str = Field("", description="Email address")
+    linkedin: str = Field("", description="LinkedIn profile URL")
+    github: str = Field("", description="GitHub profile URL")
+    medium: str = Field("", description="Medium profile URL")
+    twitter: Optional[str] = Field(None, description="Twitter profile URL")
+    homepage: Optional[str] = Field(None, description="Personal website URL")
+    role: List[str] = Field(..., description="Current job titles or professional roles, most relevant first")
+
+
+# --- Skills --- #
+class ResumeSkills(BaseModel):
+    programming_languages: List[str] = Field(..., description="List of programming languages")
+    technical_stack: List[str] = Field(..., description="List of technical tools, frameworks, etc.")
+    soft_skills: List[str] = Field(..., description="List of soft skills (e.g., leadership, communication)")
+
+
+# --- Experience --- #
+class ResumeExperienceItem(BaseModel):
+    title: str = Field(..., description="Job title")
+    company: str = Field(..., description="Employer or company name")
+    period: str = Field(..., description="Time period of employment (e.g., 'Jan 2015 - Dec 2020')")
+    missions: List[str] = Field(default_factory=list, description="List of responsibilities or tasks in this role")
+    results: List[str] = Field(default_factory=list, description="List of key achievements and outcomes")
+
+
+# --- Education --- #
+class ResumeEducationItem(BaseModel):
+    degree: str = Field(..., description="Degree title (e.g., 'Master's degree in AI')")
+    institution: str = Field(..., description="Name of school or university")
+    period: List[Union[int, str]] = Field(..., min_length=2, max_length=2,
+                                          description="Start and end of the studies (e.g., [2015, 2020], "
+                                                      "[2023, 'Present'] if ongoing)")
+    grade: Optional[str] = Field(None, description="Grade or Honors, if applicable")
+
+
+# --- Certificates --- #
+class ResumeCertificateItem(BaseModel):
+    title: str = Field(..., description="Certification title (e.g., 'AWS Certified')")
+    institution: str = Field(..., description="Provider or issuing institution (e.g., 'Amazon')")
+    year: int = Field(..., description="Year the certification was obtained")
+
+
+# --- Structured Resume --- #
+class StructuredResume(BaseModel):
+    contact_info: ResumeContactInfo = Field(..., description="Contact details")
+    skills: ResumeSkills = Field(..., description="Skills section")
+    experience: List[ResumeExperienceItem] = Field(..., description="List of work experiences")
+    education: List[ResumeEducationItem] = Field(..., description="List of education entries")
+    certificates: List[ResumeCertificateItem] = Field(..., description="List of certifications")
+    languages: List[Dict[str, int]] = Field(
+        ..., description="List of spoken languages with proficiency levels from 1 to 5 (e.g., [{'English': 5}])"
+    )
+    interests: List[str] = Field(..., description="List of interests or hobbies")
@@ -1,6 +1,6 @@
 from typing import List, Optional, Dict
 
-from pydantic import BaseModel, Field  # , EmailStr  # , HttpUrl, constr
+from pydantic import BaseModel, Field, create_model  # , EmailStr  # , HttpUrl, constr
 
 
 # ---------------------------- #
@@ -57,7 +57,7 @@ class CertificationItem(BaseModel):
 # --- Tailored Resume Data --- #
 class TailoredResumeData(BaseModel):
     # contact_info: ContactInfo = Field(..., description="Contact details")
-    contact_info: Dict[str, str] = Field(..., description="Contact details")
+    contact_info: Dict[str, Optional[str]] = Field(..., description="Contact details")
     introduction: str = Field(..., description="Professional summary or career objective")
     skills: Skills = Field(..., description="Skills section")
     languages: List[Dict[str, int]] = Field(..., description="List of spoken languages with proficiency levels")
@@ -67,30 +67,16 @@ class TailoredResumeData(BaseModel):
     interests: List[str] = Field(...,
                                  description="List of interests or hobbies (e.g., 'Weightlifting, Photography, VR gaming')")
     company_applying: str = Field(..., description="Company name for which the resume is tailored")
+    incomplete_sections: List[str] = Field(default_factory=list,
+                                           description="Sections cut short by the run's deadline, if any")
 
-class TailoredResume(BaseModel):
-    # --- Introduction --- #
-    introduction: Optional[str] = Field(None, description="Optional brief professional summary or career objective")
 
-    # --- Skills --- #
-    programming_languages: List[str] = Field(..., description="List of programming languages")
-    technical_stack: List[str] = Field(..., description="List of technical tools, frameworks, etc.")
-    soft_skills: List[str] = Field(..., description="List of soft skills (e.g., leadership, communication)")
-
-    # --- Experience --- #
-    job_title: str = Field(..., description="Job title")
-    company: str = Field(..., description="Employer or company name")
-    period: str = Field(..., description="Time period of employment (e.g., 'Jan 2015 - Dec 2020')")
-    missions: List[str] = Field(..., description="List of responsibilities or tasks in this role")
-    results: List[str] = Field(..., description="List of key achievements and outcomes")
-
-    # --- Certifications --- #
-    certification_title: str = Field(..., description="Certification title (e.g., 'AWS Certified')")
-    where: str = Field(..., description="Provider or issuing institution (e.g., 'Amazon')")
-    year: int = Field(..., description="Year the certification was obtained")
+# --- Generated Sections (single-call tailoring) --- #
+# The sections of `TailoredResumeData` written by the LLM, the others are copied from the structured resume
+GENERATED_SECTIONS = ("introduction", "skills", "experiences", "certifications", "interests")
 
-    # --- Interests --- #
-    interests: Optional[List[str]] = Field(
-        None,
-        description="Optional list of interests or hobbies (e.g., 'Weightlifting, Photography, VR gaming')",
-    )
+TailoredSections = create_model(
+    "TailoredSections",
+    **{name: (TailoredResumeData.model_fields[name].annotation, TailoredResumeData.model_fields[name])
+       for name in GENERATED_SECTIONS},
+)
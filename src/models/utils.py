@@ -1,6 +1,6 @@
 from typing import Dict, List
 
-from models.tailored_resume_model import ContactInfo, EducationItem
+from src.models.tailored_resume_model import ContactInfo, EducationItem
 
 
 # --------------------------------- #
@@ -84,10 +84,13 @@ def extract_education(resume_data: Dict) -> List[dict]:
     """
     education_data = resume_data.get("education", [])
 
-    # Convert the period from array to formatted string (e.g., [2010, 2014] -> "2010 - 2014")
+    # Convert the period from array to formatted string (e.g., [2010, 2014] -> "2010 - 2014", open end -> "Present")
     education_items = []
     for edu in education_data:
-        period_str = f"{edu['period'][0]} - {edu['period'][1]}" if "period" in edu else "Unknown"
+        period = edu.get("period") or []
+        if isinstance(period, (str, int)):
+            period = [period]
+        period_str = f"{period[0]} - {period[1] if len(period) > 1 else 'Present'}" if period else "Unknown"
 
         # Create an instance of EducationItem and append to the list
         education_items.append(dict(
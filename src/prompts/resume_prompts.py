@@ -7,3 +7,148 @@
 # --------------------------- #
 # --- Unstructured Output --- #
 # --------------------------- #
+
+# Every section call starts with the same system prompt and resume, only the section instructions below
+# differ (see `src.prompts.utils.build_messages`), so the provider's prompt cache serves the shared prefix.
+resume_system_prompt: str = """
+You are a helpful assistant that extracts structured information from resumes.
+You only rely on the resume provided and never invent information.
+"""
+
+resume_context_prompt_template: str = """
+Here is the candidate's resume:
+"{text}"
+"""
+
+# 1. Extract Contact Information from the Resume
+contact_info_extraction_instructions: str = """
+Extract the contact information of the candidate from the resume above. Do not fabricate any information: use an empty string for missing fields and null for a missing Twitter or homepage.
+List the candidate's current or most recent professional roles, most relevant first.
+
+Format the output exactly as follows, with no extra text or explanations, and nothing but the required JSON structure:
+
+Example Output:
+{
+    "name": "Rex Barkington",
+    "phone": "+49 123 456 789",
+    "city_country": "Berlin, Germany",
+    "email": "rex@barktech.io",
+    "linkedin": "https://www.linkedin.com/in/rex-barkington",
+    "github": "https://github.com/rexbark",
+    "medium": "",
+    "twitter": null,
+    "homepage": null,
+    "role": ["Senior AI Engineer", "Machine Learning Engineer"]
+}
+"""
+
+# 2. Extract Skills from the Resume
+skills_extraction_instructions: str = """
+Extract all the skills mentioned in the resume above and organize them into the following categories: "programming_languages", "technical_stack" and "soft_skills".
+Only use skills explicitly mentioned in the resume, and do **not** invent or infer any information.
+
+Format the output exactly as follows, with no extra text or explanations, and nothing but the required JSON structure:
+
+Example Output:
+{
+    "programming_languages": ["Python", "SQL", "R"],
+    "technical_stack": ["LangChain", "Keras", "Azure", "Docker", "Git"],
+    "soft_skills": ["Leadership", "Communication", "Problem-solving"]
+}
+"""
+
+# 3. Extract Experience from the Resume
+experience_extraction_instructions: str = """
+Extract every work experience entry of the resume above, most recent first. For each entry, provide the job title, company, period of employment, the list of missions (tasks and responsibilities) and the list of results (achievements and impact).
+Keep the wording of the resume. **Do not fabricate or invent any information.**
+
+Format the output exactly as follows, with no extra text or explanations, and nothing but the required JSON structure:
+
+Example Output:
+[
+    {
+        "title": "Senior AI Engineer",
+        "company": "BarkTech",
+        "period": "Jan 2019 - Present",
+        "missions": ["Led the development of predictive activity models for pets."],
+        "results": ["Increased customer retention by 15%."]
+    }
+]
+"""
+
+# 4. Extract Education from the Resume
+education_extraction_instructions: str = """
+Extract every education entry of the resume above, most recent first. For each entry, provide the degree, institution, the start and end of the studies and the grade if available (null otherwise).
+**Do not fabricate or invent any information.**
+
+Format the output exactly as follows, with no extra text or explanations, and nothing but the required JSON structure:
+
+Example Output:
+[
+    {
+        "degree": "Master's degree in Artificial Intelligence",
+        "institution": "University of Dogville",
+        "period": [2014, 2016],
+        "grade": "Summa cum laude"
+    }
+]
+"""
+
+# 5. Extract Certificates from the Resume
+certificates_extraction_instructions: str = """
+Extract every certification of the resume above. For each certification, provide the title, issuing institution, and year obtained.
+If there are no certifications, output an empty list. **Do not fabricate or invent any information.**
+
+Format the output exactly as follows, with no extra text or explanations, and nothing but the required JSON structure:
+
+Example Output:
+[
+    {
+        "title": "Certified PetAI Specialist",
+        "institution": "PetAI Academy",
+        "year": 2020
+    }
+]
+"""
+
+# 6. Extract Languages from the Resume
+languages_extraction_instructions: str = """
+Extract the spoken languages of the resume above and rate the proficiency of each from 1 (basic) to 5 (native).
+If there are no languages, output an empty list. **Do not fabricate or invent any information.**
+
+Format the output exactly as follows, with no extra text or explanations, and nothing but the required JSON structure:
+
+Example Output:
+[
+    {"English": 5},
+    {"French": 3}
+]
+"""
+
+# 7. Extract Interests from the Resume
+interests_extraction_instructions: str = """
+Extract the hobbies or interests of the candidate from the resume above. If there are none, output an empty list.
+**Do not fabricate or invent any information.**
+
+Format the output exactly as follows, with no extra text or explanations, and nothing but the required JSON structure:
+
+Example Output:
+["Barking", "Howling at the moon", "Dog to Human translation"]
+"""
+
+# 8. Section Repair Prompt
+section_repair_prompt_template: str = """
+The following output for the "{section}" section of a structured resume is not valid against the expected JSON schema.
+
+Validation error:
+"{error}"
+
+Broken output:
+"{output}"
+
+Expected JSON schema:
+{schema}
+
+Return only the corrected JSON for this part, keeping the original content as much as possible, with no extra text or explanations.
+
+"""
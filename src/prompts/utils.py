@@ -0,0 +1,44 @@
+import json
+from typing import Any, Dict, List
+
+
+# -------------------------------- #
+# --- Cache-Friendly Prompting --- #
+# -------------------------------- #
+
+
+def canonical_json(data: Any) -> str:
+    """Serialize prompt data deterministically, so identical inputs always produce identical prompt bytes."""
+    if isinstance(data, str):
+        return data
+    return json.dumps(data, sort_keys=True, ensure_ascii=False)
+
+
+def build_messages(system_prompt: str, contexts: List[str], instructions: str) -> List[Dict[str, str]]:
+    """
+    Chat messages laid out for provider-side prompt caching.
+
+    Providers cache the longest previously seen prefix of a prompt, so the stable parts go first and in a
+    fixed order: the system prompt, then the context documents from the most to the least reused (e.g. the
+    resume, then the job description). The call-specific instructions always come last.
+
+    Parameters
+    ----------
+    system_prompt : str
+        The system prompt, shared by every call of a pipeline stage.
+    contexts : List[str]
+        The rendered context documents, most reused first.
+    instructions : str
+        The call-specific instructions.
+
+    Returns
+    -------
+    List[Dict[str, str]]
+        The messages to send to the chat completions API.
+
+    """
+    return [
+        {"role": "system", "content": system_prompt},
+        *({"role": "user", "content": context} for context in contexts),
+        {"role": "user", "content": instructions},
+    ]
@@ -0,0 +1,300 @@
+import argparse
+import hashlib
+import os
+import sys
+from typing import Dict, List, Tuple
+
+from loguru import logger
+from openai import OpenAI
+from pydantic import ValidationError
+from rich import print as rprint
+
+from src.models.job_model import JobDescription
+from src.models.tailored_resume_model import *
+from src.models.utils import extract_contact_info, extract_education
+from src.prompts import job_prompts, tailor_resume_prompts
+from src.prompts.utils import build_messages, canonical_json
+from src.scripts.utils import expand_paths, load_data_from_json, load_file_from_txt, save_to_json
+from src.service.batch import DEFAULT_STATE_PATH, BatchRequest, BatchRunner
+from src.service.json_repair import JSONRepairError, parse_section
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+# Tailored section -> (instructions, expected type, max tokens, temperature), as in `tailor_resume`
+TAILOR_SECTIONS: Dict[str, tuple] = {
+    "introduction": (tailor_resume_prompts.introduction_instructions, str, 512, 0.2),
+    "skills": (tailor_resume_prompts.skills_instructions, Skills, 512, 0.0),
+    "experience": (tailor_resume_prompts.experience_instructions, List[ExperienceItem], 1024, 0.0),
+    "certifications": (tailor_resume_prompts.certifications_instructions, List[CertificationItem], 512, 0.0),
+    "interests": (tailor_resume_prompts.interests_instructions, List[str], 512, 0.0),
+}
+
+
+# ------------------------ #
+# --- Helper Functions --- #
+# ------------------------ #
+
+
+def content_key(*parts: str) -> str:
+    """Short hash of the inputs, so the same job or (resume, job) pair keeps its `custom_id` across runs."""
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+# ---------------------- #
+# --- Build Requests --- #
+# ---------------------- #
+
+
+def job_request(model: str, job_description: str) -> BatchRequest:
+    """The `process_job` structured output request, as a batch line."""
+    schema = JobDescription.model_json_schema()
+    schema["additionalProperties"] = False
+
+    return BatchRequest(
+        custom_id=f"job:{content_key(job_description)}",
+        body={
+            "model": model,
+            "messages": build_messages(job_prompts.job_system_prompt,
+                                       [job_prompts.job_context_prompt_template.format(text=job_description)],
+                                       job_prompts.process_job_instructions),
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": "JobDescription", "schema": schema, "strict": True},
+            },
+        },
+    )
+
+
+def tailor_requests(model: str, resume: Dict, job_description: Dict) -> List[BatchRequest]:
+    """The `tailor_resume` section requests of a (resume, job) pair, sharing the same cacheable prefix."""
+    pair_key = content_key(canonical_json(resume), canonical_json(job_description))
+    contexts = [
+        tailor_resume_prompts.resume_context_prompt_template.format(resume=canonical_json(resume)),
+        tailor_resume_prompts.job_context_prompt_template.format(job_description=canonical_json(job_description)),
+    ]
+
+    return [
+        BatchRequest(
+            custom_id=f"tailor:{pair_key}:{section}",
+            body={
+                "model": model,
+                "messages": build_messages(tailor_resume_prompts.tailor_resume_system_prompt, contexts, instructions),
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "seed": 42,
+            },
+        )
+        for section, (instructions, _, max_tokens, temperature) in TAILOR_SECTIONS.items()
+    ]
+
+
+# -------------------------- #
+# --- Map Results Back --- #
+# -------------------------- #
+
+
+def validate_job(runner: BatchRunner, request: BatchRequest, outputs: Dict[str, str]) -> Dict:
+    """Validate a job output into a `JobDescription`, rejecting it (for resubmission) if invalid."""
+    try:
+        return parse_section(outputs[request.custom_id], JobDescription, section="job").model_dump()
+    except (JSONRepairError, ValidationError) as e:
+        runner.reject(request.custom_id, str(e))
+        raise
+
+
+def validate_tailored_resume(
+        runner: BatchRunner,
+        requests: List[BatchRequest],
+        outputs: Dict[str, str],
+        resume: Dict,
+        job_description: Dict,
+) -> Dict:
+    """Validate the section outputs of a pair and assemble them into `TailoredResumeData`."""
+    sections = {}
+    for request, (section, (_, schema, _, _)) in zip(requests, TAILOR_SECTIONS.items()):
+        content = outputs[request.custom_id].strip()
+        try:
+            if section == "introduction":
+                sections[section] = content
+            elif section == "interests":
+                sections[section] = content.split(", ")  # since we want a 'list' of keywords
+            else:
+                sections[section] = parse_section(content, schema, section=section)
+        except (JSONRepairError, ValidationError) as e:
+            runner.reject(request.custom_id, str(e))
+            raise
+
+    return TailoredResumeData(
+        company_applying=job_description.get("Company", "Unknown"),
+        contact_info=extract_contact_info(resume),
+        languages=resume.get("languages", []),
+        education=extract_education(resume),
+        introduction=sections["introduction"],
+        skills=sections["skills"],
+        experiences=sections["experience"],
+        certifications=sections["certifications"],
+        interests=sections["interests"],
+    ).model_dump()
+
+
+# ------------------- #
+# --- Script Args --- #
+# ------------------- #
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Process job descriptions and tailor resumes through the OpenAI Batch API."
+    )
+    parser.add_argument(
+        "--jobs",
+        nargs="*",
+        default=[],
+        help="Raw job descriptions to structure: files, globs, folders or @manifest.txt",
+    )
+    parser.add_argument(
+        "--resume_path",
+        help="Structured resume to tailor to the --job_descriptions",
+    )
+    parser.add_argument(
+        "--job_descriptions",
+        nargs="*",
+        default=[],
+        help="Structured job descriptions to tailor the resume to: files, globs, folders or @manifest.txt",
+    )
+    parser.add_argument(
+        "--state_path",
+        default=DEFAULT_STATE_PATH,
+        help="Batch state file, re-run with the same file to resume or resubmit failed requests",
+    )
+    parser.add_argument(
+        "--base_url",
+        default=os.environ.get("OPENAI_BATCH_BASE_URL"),
+        help="Batch API base URL, e.g. a local stand-in server (default: OPENAI_BATCH_BASE_URL or OpenAI)",
+    )
+    parser.add_argument(
+        "--poll_interval",
+        type=float,
+        default=30.0,
+        help="Seconds between two batch status checks",
+    )
+    parser.add_argument(
+        "--job_output_path",
+        default="data/job_descriptions/structured",
+        help="Path to the structured job descriptions output folder",
+    )
+    parser.add_argument(
+        "--tailor_output_path",
+        default="outputs/resumes",
+        help="Path to the tailored resumes output folder",
+    )
+
+    return parser.parse_args()
+
+
+# ------------ #
+# --- Main --- #
+# ------------ #
+
+
+def main(
+        job_paths: List[str],
+        resume_path: str = None,
+        job_description_paths: List[str] = (),
+        state_path: str = DEFAULT_STATE_PATH,
+        base_url: str = None,
+        poll_interval: float = 30.0,
+        job_output_folder: str = "data/job_descriptions/structured",
+        tailor_output_folder: str = "outputs/resumes",
+) -> None:
+    model = os.environ.get("OPENAI_BATCH_MODEL_NAME") or os.environ.get("OPENAI_MODEL_NAME")
+    client = OpenAI(base_url=base_url) if base_url else OpenAI()
+    runner = BatchRunner(client, state_path=state_path, poll_interval=poll_interval)
+
+    try:
+        # Build the requests
+        jobs: List[Tuple[str, BatchRequest]] = [
+            (path, job_request(model, load_file_from_txt(path))) for path in job_paths
+        ]
+        pairs: List[Tuple[str, Dict, List[BatchRequest]]] = []
+        if resume_path:
+            resume = load_data_from_json(resume_path)
+            for path in job_description_paths:
+                job_description = load_data_from_json(path)
+                pairs.append((path, job_description, tailor_requests(model, resume, job_description)))
+
+    except FileNotFoundError as e:
+        logger.error(f"Oups:\n   {e}")
+        sys.exit(1)
+
+    requests = [request for _, request in jobs] + [request for _, _, requests in pairs for request in requests]
+    if not requests:
+        logger.warning("Nothing to process, pass --jobs and / or --resume_path with --job_descriptions.")
+        return
+
+    # Submit, poll and collect (reusing the outputs of previous runs)
+    outputs = runner.run(requests, description="auto-resume")
+
+    # Validate and save the results
+    saved, failed = 0, 0
+    seen = set()  # inputs with the same content share their request, output and saved result
+    for path, request in jobs:
+        if request.custom_id in seen:
+            logger.info(f"'{path}' is a duplicate of an earlier job, sharing its result")
+            continue
+        seen.add(request.custom_id)
+        if request.custom_id in runner.state["saved"]:
+            continue
+        if request.custom_id not in outputs:
+            failed += 1
+            continue
+        try:
+            location = save_to_json(validate_job(runner, request, outputs), job_output_folder,
+                                    file_type="Structured Job Description")
+            runner.mark_saved(request.custom_id, location)
+            saved += 1
+        except (JSONRepairError, ValidationError) as e:
+            logger.error(f"Invalid job description for '{path}':\n   {e}")
+            failed += 1
+
+    for path, job_description, pair_requests in pairs:
+        pair_key = pair_requests[0].custom_id.rsplit(":", 1)[0]
+        if pair_key in seen:
+            logger.info(f"'{path}' is a duplicate of an earlier job description, sharing its result")
+            continue
+        seen.add(pair_key)
+        if pair_key in runner.state["saved"]:
+            continue
+        if any(request.custom_id not in outputs for request in pair_requests):
+            failed += 1
+            continue
+        try:
+            location = save_to_json(validate_tailored_resume(runner, pair_requests, outputs, resume, job_description),
+                                    tailor_output_folder, file_type="Tailored Resume")
+            runner.mark_saved(pair_key, location)
+            saved += 1
+        except (JSONRepairError, ValidationError) as e:
+            logger.error(f"Invalid tailored resume for '{path}':\n   {e}")
+            failed += 1
+
+    rprint(f"Batch results: [bold green]{saved} saved[/bold green], [bold red]{failed} failed[/bold red], "
+           f"{len(runner.state['saved']) - saved} saved by previous runs")
+    if failed:
+        logger.warning(f"Run again with '--state_path {state_path}' to resubmit the failed requests.")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    main(
+        job_paths=expand_paths(args.jobs),
+        resume_path=args.resume_path,
+        job_description_paths=expand_paths(args.job_descriptions),
+        state_path=args.state_path,
+        base_url=args.base_url,
+        poll_interval=args.poll_interval,
+        job_output_folder=args.job_output_path,
+        tailor_output_folder=args.tailor_output_path,
+    )
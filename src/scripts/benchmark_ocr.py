@@ -0,0 +1,148 @@
+import argparse
+import difflib
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from rich import print as rprint
+from rich.table import Table
+
+from src.service.ocr import image_to_string, preprocess_page, tesserocr
+
+_WORDS = (
+    "python machine learning engineer data pipeline docker kubernetes cloud deployment model training "
+    "experience team project analysis research design development production monitoring api service "
+    "university master degree certification leadership communication collaboration responsible for "
+    "improved reduced latency accuracy customers stakeholders delivered managed built scalable systems"
+).split()
+
+
+# ------------------------ #
+# --- Synthetic Corpus --- #
+# ------------------------ #
+
+
+def synthetic_page(seed: int, width: int = 1700, height: int = 2200, lines: int = 40) -> Tuple[Image.Image, str]:
+    """
+    A page of random resume-like text degraded like a phone scan or a cheap scanner: colored paper, uneven
+    lighting, noise, a random skew of up to 3° and wide margins.
+
+    Returns
+    -------
+    Tuple[Image.Image, str]
+        The scanned page (RGB) and its ground truth text.
+
+    """
+    rng = np.random.default_rng(seed)
+    font = ImageFont.load_default(size=30)
+
+    page = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    truth = []
+    for line in range(lines):
+        text = " ".join(rng.choice(_WORDS, size=rng.integers(5, 10)))
+        draw.text((200, 250 + line * 42), text, fill=0, font=font)
+        truth.append(text)
+
+    page = page.rotate(rng.uniform(-3, 3), resample=Image.BILINEAR, fillcolor=255)
+    pixels = np.asarray(page, dtype=np.float32) / 255
+
+    # Paper tint, light falling off towards one corner and sensor noise
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    lighting = 1 - 0.45 * (xx / width + yy / height) / 2
+    tint = rng.uniform(0.75, 1.0, size=3).astype(np.float32)
+    ink = 0.15 + 0.85 * pixels  # ink is dark gray, not black
+    rgb = ink[..., None] * lighting[..., None] * tint * 255 + rng.normal(0, 12, size=(height, width, 3))
+    return Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), mode="RGB"), "\n".join(truth)
+
+
+# ----------------- #
+# --- Benchmark --- #
+# ----------------- #
+
+
+def accuracy(text: str, truth: str) -> float:
+    """Word-level accuracy: the share of ground truth words matched, in order, by the OCR output."""
+    matcher = difflib.SequenceMatcher(None, truth.split(), text.split(), autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks()) / max(len(truth.split()), 1)
+
+
+def run(
+        pages: List[Tuple[Image.Image, str]],
+        prepare: Callable[[Image.Image], Image.Image],
+        engine: str = "pytesseract",
+) -> Dict[str, float]:
+    prepare_times, ocr_times, accuracies = [], [], []
+    for image, truth in pages:
+        start = time.perf_counter()
+        prepared = prepare(image)
+        prepare_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        text = image_to_string(prepared, engine=engine)
+        ocr_times.append(time.perf_counter() - start)
+        accuracies.append(accuracy(text, truth))
+
+    return {
+        "preprocess": statistics.mean(prepare_times),
+        "ocr": statistics.mean(ocr_times),
+        "total": statistics.mean(prepare_times) + statistics.mean(ocr_times),
+        "accuracy": statistics.mean(accuracies),
+    }
+
+
+# ------------------- #
+# --- Script Args --- #
+# ------------------- #
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark OCR time and accuracy per page, with and without preprocessing and with each OCR "
+                    "engine, on synthetic scans."
+    )
+    parser.add_argument("--pages", type=int, default=10, help="Number of synthetic pages")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first page")
+    parser.add_argument("--save_folder", help="Save the synthetic pages to this folder, to look at them")
+    return parser.parse_args()
+
+
+# ------------ #
+# --- Main --- #
+# ------------ #
+
+
+def main(num_pages: int = 10, seed: int = 0, save_folder: str = None) -> Dict[str, Dict[str, float]]:
+    pages = [synthetic_page(seed + i) for i in range(num_pages)]
+    if save_folder:
+        for i, (image, _) in enumerate(pages):
+            image.save(f"{save_folder}/synthetic_page_{seed + i}.png")
+
+    results = {
+        "raw": run(pages, lambda image: image),
+        "preprocessed": run(pages, preprocess_page),
+    }
+    if tesserocr is not None:  # same pages, in-process engine
+        results["preprocessed, tesserocr"] = run(pages, preprocess_page, engine="tesserocr")
+
+    table = Table("Pages", "Preprocess / page", "OCR / page", "Total / page", "Word accuracy")
+    for name, result in results.items():
+        table.add_row(name, f"{result['preprocess'] * 1000:.0f} ms", f"{result['ocr'] * 1000:.0f} ms",
+                      f"{result['total'] * 1000:.0f} ms", f"{result['accuracy']:.1%}")
+    rprint(table)
+
+    raw, preprocessed = results["raw"], results["preprocessed"]
+    rprint(f"Preprocessing: [bold]{raw['total'] / preprocessed['total']:.2f}x[/bold] faster per page, "
+           f"accuracy {preprocessed['accuracy'] - raw['accuracy']:+.1%}")
+    if "preprocessed, tesserocr" in results:
+        rprint(f"tesserocr: [bold]{preprocessed['ocr'] / results['preprocessed, tesserocr']['ocr']:.2f}x[/bold] "
+               f"faster OCR per page than pytesseract")
+    return results
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    main(num_pages=args.pages, seed=args.seed, save_folder=args.save_folder)
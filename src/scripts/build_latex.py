@@ -1,3 +1,545 @@
-# --------------------------- #
-# --- Not implemented yet --- #
-# --------------------------- #
\ No newline at end of file
+import argparse
+import glob
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, StrictUndefined
+from loguru import logger
+from rich import print as rprint
+from rich.table import Table
+
+from src.scripts.utils import load_data_from_json
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+TEMPLATES_FOLDER: str = "templates/latex"
+TEMPLATES_CACHE_FOLDER: str = os.path.join(tempfile.gettempdir(), "auto_resume_jinja_cache")
+LATEX_ENGINE: str = os.environ.get("LATEX_ENGINE", "pdflatex")
+PDF_CACHE_FOLDER: str = os.environ.get("PDF_CACHE_FOLDER", "outputs/.pdf_cache")
+LATEX_FORMATS_FOLDER: str = os.environ.get("LATEX_FORMATS_FOLDER", "outputs/.latex_formats")
+
+# Output sub-folder per document kind
+DOCUMENT_FOLDERS: Dict[str, str] = {
+    "resume": "resumes",
+    "letter": "letters",
+}
+
+
+# ---------------------- #
+# --- LaTeX Escaping --- #
+# ---------------------- #
+
+_LATEX_SPECIAL_CHARS = {
+    "\\": r"\textbackslash{}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+    "<": r"\textless{}",
+    ">": r"\textgreater{}",
+}
+_LATEX_SPECIAL_CHARS_RE = re.compile("|".join(re.escape(char) for char in _LATEX_SPECIAL_CHARS))
+
+
+class LatexSafe(str):
+    """A string that is already valid LaTeX and must not be escaped again."""
+
+
+def latex_escape(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, LatexSafe):
+        return value
+    return _LATEX_SPECIAL_CHARS_RE.sub(lambda match: _LATEX_SPECIAL_CHARS[match.group()], str(value))
+
+
+# Characters that break (or inject into) the `\href` target, percent-encoded, which keeps the same URL
+_URL_UNSAFE_CHARS = {"\\": "%5C", "{": "%7B", "}": "%7D", "~": "%7E"}
+_URL_UNSAFE_CHARS_RE = re.compile("|".join(re.escape(char) for char in _URL_UNSAFE_CHARS))
+
+
+def latex_url(value) -> LatexSafe:
+    """
+    Escape a URL for the target of `\\href`: `\\`, `{`, `}` and `~` are percent-encoded, then `%` and `#` escaped.
+
+    The displayed text goes through `latex_escape` like any other variable (`~` and `_` included).
+    """
+    url = _URL_UNSAFE_CHARS_RE.sub(lambda match: _URL_UNSAFE_CHARS[match.group()], str(value or ""))
+    return LatexSafe(url.replace("%", r"\%").replace("#", r"\#"))
+
+
+# -------------------------- #
+# --- Template Rendering --- #
+# -------------------------- #
+
+
+@lru_cache(maxsize=None)
+def get_environment(templates_folder: str = TEMPLATES_FOLDER) -> Environment:
+    """
+    Jinja2 environment with LaTeX-friendly delimiters and automatic LaTeX escaping.
+
+    Templates use `\\VAR{...}` for variables, `\\BLOCK{...}` or lines starting with `%%` for statements
+    and `%#` for comments. Every variable is escaped unless it is a `LatexSafe` string. Compiled templates
+    are kept in memory by the environment and their bytecode cached on disk across runs.
+    """
+    os.makedirs(TEMPLATES_CACHE_FOLDER, exist_ok=True)
+    env = Environment(
+        loader=FileSystemLoader(templates_folder),
+        bytecode_cache=FileSystemBytecodeCache(TEMPLATES_CACHE_FOLDER),
+        block_start_string=r"\BLOCK{",
+        block_end_string="}",
+        variable_start_string=r"\VAR{",
+        variable_end_string="}",
+        comment_start_string=r"\#{",
+        comment_end_string="}",
+        line_statement_prefix="%%",
+        line_comment_prefix="%#",
+        trim_blocks=True,
+        lstrip_blocks=True,
+        autoescape=False,
+        undefined=StrictUndefined,
+        finalize=latex_escape,
+        cache_size=-1,
+    )
+    env.filters["url"] = latex_url
+    env.filters["latex"] = LatexSafe
+    return env
+
+
+def render_document(
+        data: Dict,
+        document: str = "resume",
+        template_name: str = "template_1",
+        templates_folder: str = TEMPLATES_FOLDER,
+) -> str:
+    """
+    Render a tailored resume (or its motivation letter) to LaTeX source.
+
+    Parameters
+    ----------
+    data : Dict
+        The tailored resume, as produced by `tailor_resume` (`TailoredResumeData`). Letters use the
+        optional `letter_body` key and fall back to the introduction.
+    document : str, optional
+        The document to render, "resume" or "letter", by default "resume".
+    template_name : str, optional
+        The template folder under `templates_folder`, by default "template_1".
+
+    Returns
+    -------
+    str
+        The LaTeX source.
+
+    """
+    template = get_environment(templates_folder).get_template(f"{template_name}/{document}.tex")
+    return template.render(**{"letter_body": None, **data})
+
+
+# ----------------------- #
+# --- PDF Compilation --- #
+# ----------------------- #
+
+
+@dataclass
+class BuildJob:
+    name: str
+    tex_source: str
+    output_pdf: str
+
+
+@dataclass
+class BuildResult:
+    name: str
+    output_pdf: Optional[str]
+    seconds: float
+    error: Optional[str] = None
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _atomic_copy(source: str, destination: str) -> None:
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    tmp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, destination)
+
+
+# --- Precompiled Preamble Formats --- #
+
+_format_locks = defaultdict(threading.Lock)
+_failed_formats = set()
+
+
+def split_preamble(tex_source: str) -> Optional[str]:
+    """The preamble of a LaTeX document (everything before `\\begin{document}`), if any."""
+    index = tex_source.find(r"\begin{document}")
+    return tex_source[:index] if index != -1 else None
+
+
+def get_preamble_format(preamble: str, timeout: float = 120.0) -> Optional[str]:
+    """
+    Path of a dumped format for the given preamble, building it on first use.
+
+    The preamble is dumped with `mylatexformat`, so that documents compiled with the format skip
+    loading the document class and packages. Formats are keyed by the hash of the preamble: a format
+    is only rebuilt when its template's preamble changes. Returns None if the format can't be built
+    (e.g. `mylatexformat` is not installed), in which case documents are compiled normally.
+    """
+    format_name = f"preamble_{_sha256(LATEX_ENGINE + preamble)[:16]}"
+    format_path = os.path.join(LATEX_FORMATS_FOLDER, f"{format_name}.fmt")
+
+    if os.path.exists(format_path):
+        return format_path
+    if format_name in _failed_formats:
+        return None
+
+    with _format_locks[format_name]:
+        if os.path.exists(format_path):
+            return format_path
+
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="auto_resume_format_") as build_dir:
+            with open(os.path.join(build_dir, f"{format_name}.tex"), "w", encoding="utf-8") as f:
+                f.write(preamble + "\\begin{document}\n\\end{document}\n")
+            try:
+                process = subprocess.run(
+                    [LATEX_ENGINE, "-ini", "-interaction=nonstopmode", "-halt-on-error",
+                     f"-jobname={format_name}", f"&{LATEX_ENGINE}", "mylatexformat.ltx", f"{format_name}.tex"],
+                    cwd=build_dir,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    timeout=timeout,
+                )
+            except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+                process = None
+                logger.warning(f"Could not build preamble format '{format_name}':\n   {e}")
+
+            built_path = os.path.join(build_dir, f"{format_name}.fmt")
+            if process is None or process.returncode != 0 or not os.path.exists(built_path):
+                if process is not None:
+                    log_tail = "\n".join(process.stdout.decode("utf-8", errors="replace").splitlines()[-10:])
+                    logger.warning(f"Could not build preamble format '{format_name}':\n   {log_tail}")
+                logger.warning("Compiling without a precompiled preamble.")
+                _failed_formats.add(format_name)
+                return None
+
+            _atomic_copy(built_path, format_path)
+
+        logger.info(f"Built preamble format '{format_name}' in {time.perf_counter() - start:.2f}s")
+        return format_path
+
+
+# --- Compilation --- #
+
+
+def compile_pdf(
+        job: BuildJob,
+        timeout: float = 60.0,
+        use_cache: bool = True,
+        use_format: bool = True,
+) -> BuildResult:
+    """
+    Compile LaTeX source to PDF in an isolated temporary directory.
+
+    Parameters
+    ----------
+    job : BuildJob
+        The document name, its LaTeX source and where to write the PDF.
+    timeout : float, optional
+        Seconds before the compilation is killed, by default 60.
+    use_cache : bool, optional
+        Serve the PDF from the content-addressed cache when the exact same source was already compiled,
+        and store newly compiled PDFs in it, by default True.
+    use_format : bool, optional
+        Compile against a precompiled format of the document's preamble, by default True.
+
+    Returns
+    -------
+    BuildResult
+        The result, with the error (last lines of the LaTeX log) if the compilation failed.
+
+    """
+    start = time.perf_counter()
+
+    cache_path = os.path.join(PDF_CACHE_FOLDER, f"{_sha256(LATEX_ENGINE + job.tex_source)}.pdf")
+    if use_cache and os.path.exists(cache_path):
+        _atomic_copy(cache_path, job.output_pdf)
+        return BuildResult(job.name, job.output_pdf, time.perf_counter() - start, cached=True)
+
+    preamble = split_preamble(job.tex_source) if use_format else None
+    format_path = get_preamble_format(preamble) if preamble else None
+
+    with tempfile.TemporaryDirectory(prefix="auto_resume_latex_") as build_dir:
+        tex_path = os.path.join(build_dir, "document.tex")
+        with open(tex_path, "w", encoding="utf-8") as f:
+            f.write(job.tex_source)
+
+        command = [LATEX_ENGINE, "-interaction=nonstopmode", "-halt-on-error", "-no-shell-escape"]
+        if format_path:
+            # kpathsea looks up formats in the working directory
+            os.symlink(os.path.abspath(format_path), os.path.join(build_dir, os.path.basename(format_path)))
+            command.append(f"-fmt={os.path.splitext(os.path.basename(format_path))[0]}")
+        command.append("document.tex")
+
+        try:
+            process = subprocess.run(
+                command,
+                cwd=build_dir,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return BuildResult(job.name, None, time.perf_counter() - start, f"Timed out after {timeout}s")
+        except FileNotFoundError:
+            return BuildResult(job.name, None, time.perf_counter() - start, f"'{LATEX_ENGINE}' not found")
+
+        pdf_path = os.path.join(build_dir, "document.pdf")
+        if process.returncode != 0 or not os.path.exists(pdf_path):
+            log_tail = "\n".join(process.stdout.decode("utf-8", errors="replace").splitlines()[-15:])
+            return BuildResult(job.name, None, time.perf_counter() - start, log_tail)
+
+        if use_cache:
+            _atomic_copy(pdf_path, cache_path)
+        os.makedirs(os.path.dirname(job.output_pdf) or ".", exist_ok=True)
+        shutil.move(pdf_path, job.output_pdf)
+
+    return BuildResult(job.name, job.output_pdf, time.perf_counter() - start)
+
+
+def build_pdfs(
+        jobs: List[BuildJob],
+        max_workers: Optional[int] = None,
+        timeout: float = 60.0,
+        use_cache: bool = True,
+        use_format: bool = True,
+) -> List[BuildResult]:
+    """
+    Compile many documents in parallel and report the throughput.
+
+    Each compilation is a separate `pdflatex` process, so a thread pool sized to the number of cores
+    is enough to keep every core busy.
+
+    Parameters
+    ----------
+    jobs : List[BuildJob]
+        The documents to compile.
+    max_workers : int, optional
+        Number of concurrent compilations, by default the number of CPUs.
+    timeout : float, optional
+        Per-document timeout in seconds, by default 60.
+    use_cache : bool, optional
+        Skip documents already compiled from the exact same source, by default True.
+    use_format : bool, optional
+        Compile against precompiled preamble formats, by default True.
+
+    Returns
+    -------
+    List[BuildResult]
+        One result per job, in the order of `jobs`.
+
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    results: Dict[int, BuildResult] = {}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(compile_pdf, job, timeout, use_cache, use_format): i for i, job in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            if result.ok:
+                logger.info(f"Built '{result.name}' in {result.seconds:.2f}s{' (cached)' if result.cached else ''}")
+            else:
+                logger.error(f"Failed to build '{result.name}':\n   {result.error}")
+    elapsed = time.perf_counter() - start
+
+    built = sum(result.ok for result in results.values())
+    cached = sum(result.cached for result in results.values())
+    rprint(f"Built [bold green]{built}[/bold green]/{len(jobs)} PDFs ({cached} from cache) in {elapsed:.2f}s "
+           f"-> [bold]{built / elapsed if elapsed else 0.0:.2f} documents/s[/bold] ({max_workers} workers)")
+
+    return [results[i] for i in range(len(jobs))]
+
+
+def benchmark(data: Dict, runs: int = 5, template_name: str = "template_1", timeout: float = 60.0) -> None:
+    """
+    Time per document for cold compilations, format-accelerated compilations and cache hits.
+
+    Runs are sequential so that the timings are per document, not per batch.
+    """
+    tex_source = render_document(data, template_name=template_name)
+    preamble = split_preamble(tex_source)
+    format_ready = bool(preamble and get_preamble_format(preamble))  # built once, outside the timings
+
+    with tempfile.TemporaryDirectory(prefix="auto_resume_benchmark_") as output_dir:
+        def run(label: str, use_cache: bool, use_format: bool) -> List[BuildResult]:
+            results = []
+            for i in range(runs):
+                # A unique comment per run defeats the cache for the cold and format runs
+                source = tex_source if use_cache else f"{tex_source}\n% {label} {i} {time.time_ns()}\n"
+                job = BuildJob(f"{label} {i}", source, os.path.join(output_dir, f"{label}_{i}.pdf"))
+                results.append(compile_pdf(job, timeout, use_cache=use_cache, use_format=use_format))
+            return results
+
+        run("warmup", use_cache=True, use_format=True)  # populates the cache for the cache-hit runs
+        scenarios = {
+            "cold": run("cold", use_cache=False, use_format=False),
+            "format": run("format", use_cache=False, use_format=True) if format_ready else [],
+            "cache hit": run("cached", use_cache=True, use_format=True),
+        }
+
+    table = Table("Scenario", "Documents", "Failed", "Mean s/doc", "Min s/doc")
+    for label, results in scenarios.items():
+        timings = [result.seconds for result in results if result.ok]
+        if not timings:
+            table.add_row(label, str(len(results)), str(len(results)), "-", "-")
+            continue
+        table.add_row(label, str(len(results)), str(len(results) - len(timings)),
+                      f"{sum(timings) / len(timings):.4f}", f"{min(timings):.4f}")
+    rprint(table)
+
+
+# ------------------- #
+# --- Script Args --- #
+# ------------------- #
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Render tailored resumes and letters to PDF with LaTeX.")
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        default=["outputs/resumes/*.json"],
+        help="Tailored resume JSON files or globs (default: 'outputs/resumes/*.json')",
+    )
+    parser.add_argument(
+        "--template",
+        default="template_1",
+        help="Template folder under 'templates/latex'",
+    )
+    parser.add_argument(
+        "--documents",
+        nargs="+",
+        default=["resume", "letter"],
+        choices=list(DOCUMENT_FOLDERS),
+        help="Documents to build for each input",
+    )
+    parser.add_argument(
+        "--output_path",
+        default="outputs",
+        help="Path to the output folder",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of parallel compilations (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60.0,
+        help="Per-document compilation timeout in seconds",
+    )
+    parser.add_argument(
+        "--no_cache",
+        action="store_true",
+        help="Always recompile, even if the same document was already compiled",
+    )
+    parser.add_argument(
+        "--no_format",
+        action="store_true",
+        help="Don't use precompiled preamble formats",
+    )
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        default=0,
+        metavar="RUNS",
+        help="Benchmark cold, format-accelerated and cached builds of the first input instead of building",
+    )
+
+    return parser.parse_args()
+
+
+# ------------ #
+# --- Main --- #
+# ------------ #
+
+
+def main(
+        inputs: List[str],
+        template_name: str = "template_1",
+        documents: List[str] = ("resume", "letter"),
+        output_folder: str = "outputs",
+        max_workers: Optional[int] = None,
+        timeout: float = 60.0,
+        use_cache: bool = True,
+        use_format: bool = True,
+) -> List[BuildResult]:
+    input_paths = sorted({path for pattern in inputs for path in (glob.glob(pattern) or [pattern])})
+
+    jobs: List[BuildJob] = []
+    for input_path in input_paths:
+        data = load_data_from_json(input_path)
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        for document in documents:
+            jobs.append(BuildJob(
+                name=f"{stem} ({document})",
+                tex_source=render_document(data, document=document, template_name=template_name),
+                output_pdf=os.path.join(output_folder, DOCUMENT_FOLDERS[document], f"{stem}_{document}.pdf"),
+            ))
+
+    return build_pdfs(jobs, max_workers=max_workers, timeout=timeout, use_cache=use_cache, use_format=use_format)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.benchmark:
+        first_input = sorted(path for pattern in args.inputs for path in (glob.glob(pattern) or [pattern]))[0]
+        benchmark(load_data_from_json(first_input), runs=args.benchmark, template_name=args.template,
+                  timeout=args.timeout)
+        sys.exit(0)
+
+    main(
+        inputs=args.inputs,
+        template_name=args.template,
+        documents=args.documents,
+        output_folder=args.output_path,
+        max_workers=args.workers,
+        timeout=args.timeout,
+        use_cache=not args.no_cache,
+        use_format=not args.no_format,
+    )
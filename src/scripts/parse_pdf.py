@@ -1,43 +1,192 @@
 import argparse
 import os
-from typing import List
-
-import pytesseract
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from loguru import logger
 from PIL import Image
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
+from rich import print as rprint
+
+from src.scripts.utils import expand_paths
+from src.service.ocr import DEFAULT_PREPROCESS, SharedPage, image_to_string, ocr_shared_page, preprocess_page
+from src.service.profiling import PROFILE_MODES, profile_stage, profiler
+
+
+@profile_stage()
+def pdf_to_images(input_pdf, output_folder=None):
+    # Convert PDF to images (one image per page), kept in memory: pdftoppm streams raw pixels (PPM) to us,
+    # grayscale since OCR doesn't need colors. The pages are only written to `output_folder` for debugging.
+    images = convert_from_path(input_pdf, grayscale=True)
+
+    if output_folder:
+        os.makedirs(output_folder, exist_ok=True)
+        for i, image in enumerate(images):
+            image.save(os.path.join(output_folder, f"page_{i + 1}.png"), 'PNG')
 
+    return images
 
-def pdf_to_images(input_pdf, output_folder):
-    # Convert PDF to images (one image per page)
-    images = convert_from_path(input_pdf)
 
-    image_paths: List[str] = []
-    for i, image in enumerate(images):
-        image_path = os.path.join(output_folder, f"page_{i + 1}.png")
-        image.save(image_path, 'PNG')
-        image_paths.append(image_path)
+def init_ocr_worker():
+    # One OCR thread per process: the pool already keeps every core busy
+    os.environ["OMP_THREAD_LIMIT"] = "1"
 
-    return image_paths
 
+def _ocr_in_pool(images, workers, preprocess):
+    # Share the pixels of every page with the workers instead of pickling them
+    pages, segments = zip(*(SharedPage.create(image) for image in images))
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pages)), initializer=init_ocr_worker) as executor:
+            return list(executor.map(ocr_shared_page, pages, [preprocess] * len(pages)))
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
 
-def ocr_on_images(image_paths, output_txt):
-    text = ''
 
-    for image_path in image_paths:
-        # Perform OCR on each image
-        text += pytesseract.image_to_string(Image.open(image_path)) + "\n"
+@profile_stage()
+def ocr_on_images(images, output_txt, preprocess=DEFAULT_PREPROCESS, workers=1):
+    # Perform OCR on each page (in memory, or a path to an image file), binarized, deskewed and cropped first
+    # unless disabled, on `workers` processes
+    images = [Image.open(image) if isinstance(image, str) else image for image in images]
+
+    if workers > 1 and len(images) > 1:
+        texts = _ocr_in_pool(images, workers, preprocess)
+    else:
+        texts = [image_to_string(preprocess_page(image) if preprocess else image) for image in images]
+    text = ''.join(page_text + "\n" for page_text in texts)
 
     # Write the extracted text to a file
     with open(output_txt, 'w', encoding='utf-8') as output_file:
         output_file.write(text)
 
+    return text
+
+
+def parse_pdf(input_pdf, output_txt=None, output_folder=None, preprocess=DEFAULT_PREPROCESS, workers=1):
+    # Convert a PDF to text, next to the PDF by default, without any intermediate file (the page images are
+    # only saved to `output_folder` if given, for debugging)
+    output_txt = output_txt or os.path.splitext(input_pdf)[0] + '.txt'
+    return ocr_on_images(pdf_to_images(input_pdf, output_folder), output_txt, preprocess=preprocess, workers=workers)
+
+
+# ------------------ #
+# --- Batch Mode --- #
+# ------------------ #
+
+
+@dataclass
+class DocumentResult:
+    input_pdf: str
+    output_txt: str
+    pages: int = 0
+    error: Optional[str] = None
+    texts: Dict[int, str] = field(default_factory=dict, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def ocr_page(input_pdf, page_number, preprocess):
+    # Rasterize and OCR a single page, in a pool worker (which keeps its own tesseract handle)
+    image = convert_from_path(input_pdf, first_page=page_number, last_page=page_number, grayscale=True)[0]
+    if preprocess:
+        image = preprocess_page(image)
+    return image_to_string(image)
+
+
+def parse_pdfs(input_pdfs, output_folder=None, max_workers=None, preprocess=DEFAULT_PREPROCESS):
+    """
+    Convert many PDFs to text, scheduling their pages on a single process pool.
+
+    Pages are the unit of work, so short documents don't leave cores idle. Each document gets its own text
+    file (next to the PDF, or in `output_folder`), written as soon as all its pages are done, and a failing
+    document doesn't affect the others.
+
+    Returns
+    -------
+    List[DocumentResult]
+        One result per PDF, in input order.
+
+    Examples
+    --------
+    >>> results = parse_pdfs(expand_paths(["data/resumes/*.pdf"]), output_folder="data/resumes/txt")
+
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if output_folder:
+        os.makedirs(output_folder, exist_ok=True)
+
+    results = []
+    for input_pdf in input_pdfs:
+        name = os.path.splitext(os.path.basename(input_pdf))[0] + '.txt'
+        output_txt = os.path.join(output_folder, name) if output_folder else os.path.splitext(input_pdf)[0] + '.txt'
+        result = DocumentResult(input_pdf=input_pdf, output_txt=output_txt)
+        try:
+            result.pages = pdfinfo_from_path(input_pdf)["Pages"]
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            logger.error(f"Can't read '{input_pdf}':\n   {e}")
+        results.append(result)
+
+    pending_pages = deque((result, page) for result in results if result.ok for page in range(1, result.pages + 1))
+    remaining = {id(result): result.pages for result in results if result.ok}
+    start = time.perf_counter()
+    done_pages = 0
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_ocr_worker) as executor:
+        in_flight = {}
+        while pending_pages or in_flight:
+            # Bounded submission, so the pages of 10,000 documents aren't all queued at once
+            while pending_pages and len(in_flight) < 2 * max_workers:
+                result, page = pending_pages.popleft()
+                if result.ok:  # skip the remaining pages of a failed document
+                    in_flight[executor.submit(ocr_page, result.input_pdf, page, preprocess)] = (result, page)
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result, page = in_flight.pop(future)
+                remaining[id(result)] -= 1
+                done_pages += 1
+                try:
+                    result.texts[page] = future.result()
+                except Exception as e:
+                    if result.ok:
+                        result.error = f"page {page}: {type(e).__name__}: {e}"
+                        logger.error(f"OCR of '{result.input_pdf}' failed on page {page}:\n   {e}")
+
+                if remaining[id(result)] == 0 and result.ok:
+                    with open(result.output_txt, 'w', encoding='utf-8') as output_file:
+                        output_file.write(''.join(result.texts[page] + "\n" for page in sorted(result.texts)))
+                    result.texts.clear()
+
+    seconds = time.perf_counter() - start
+    failed = [result for result in results if not result.ok]
+    rprint(f"Converted {len(results) - len(failed)}/{len(results)} PDFs, {done_pages} pages in {seconds:.1f}s "
+           f"([bold]{done_pages / seconds if seconds else 0.0:.2f} pages/s[/bold], {max_workers} workers)")
+    for result in failed:
+        rprint(f"[bold red]✗[/bold red] {result.input_pdf}: {result.error}")
+
+    return results
+
+
+# ------------------- #
+# --- Script Args --- #
+# ------------------- #
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Convert PDF to images and extract text using OCR.")
 
     parser.add_argument(
         'input_pdf',
-        help="Path to the input PDF file"
+        nargs='+',
+        help="Path to the input PDF file, or many PDFs for batch mode: files, globs, folders or @manifest.txt"
     )
     parser.add_argument(
         '--output_txt',
@@ -45,31 +194,60 @@ def parse_args():
     )
     parser.add_argument(
         '--output_folder',
-        help="Folder to save the intermediate images for OCR processing."
+        help="Also save the page images to this folder, for debugging (pages are processed in memory)"
+    )
+    parser.add_argument(
+        '--text_folder',
+        help="Batch mode: folder for the text files (default: next to each PDF)"
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help="Worker processes OCR-ing the pages (in batch mode, shared by the pages of all the PDFs)"
+    )
+    parser.add_argument(
+        '--no_preprocess',
+        action='store_true',
+        help="Send the raw pages to tesseract (no binarization, deskew or margin crop)"
+    )
+    parser.add_argument(
+        '--profile',
+        choices=PROFILE_MODES,
+        help="Profile each stage (also enabled by the PROFILE environment variable)"
     )
 
     args = parser.parse_args()
 
+    # Many PDFs (or a glob, folder or manifest): batch mode
+    input_pdfs = [path for path in expand_paths(args.input_pdf) if path.lower().endswith('.pdf')]
+    args.batch = len(args.input_pdf) > 1 or input_pdfs != args.input_pdf
+    if args.batch:
+        args.input_pdf = input_pdfs
+        return args
+    args.input_pdf = args.input_pdf[0]
+
     # If no output text file is specified, change the input file extension from .pdf to .txt
     if not args.output_txt:
         args.output_txt = os.path.splitext(args.input_pdf)[0] + '.txt'
 
-    if not args.output_folder:
-        args.output_folder = os.path.split(args.input_pdf)[0] + '/tmp_ocr/' + \
-                             os.path.split(args.input_pdf)[1].split('.')[0]
-
     return args
 
 
 if __name__ == "__main__":
     args = parse_args()
+    if args.profile:
+        profiler.enable(args.profile)
 
-    os.makedirs(args.output_folder, exist_ok=True)
+    if args.batch:
+        results = parse_pdfs(args.input_pdf, output_folder=args.text_folder, max_workers=args.workers,
+                             preprocess=not args.no_preprocess)
+        sys.exit(0 if all(result.ok for result in results) else 1)
 
-    # Convert PDF to images
-    image_paths = pdf_to_images(args.input_pdf, args.output_folder)
+    # Convert PDF to images, in memory
+    images = pdf_to_images(args.input_pdf, args.output_folder)
 
     # Perform OCR on the images and save the text
-    ocr_on_images(image_paths, args.output_txt)
+    ocr_on_images(images, args.output_txt, preprocess=not args.no_preprocess, workers=args.workers)
 
     print(f"Text extracted and saved to {args.output_txt}")
@@ -2,28 +2,46 @@ import argparse
 import json
 import os
 import sys
-from typing import Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
 
+import httpx
 from loguru import logger
+from openai import APITimeoutError
 from rich import print as rprint
 
 from src.models.job_model import JobDescription
 from src.prompts.job_prompts import *
+from src.prompts.utils import build_messages
 from src.scripts.utils import load_file_from_txt, save_to_json
+from src.service.chunking import DEFAULT_TOKEN_BUDGET, chunk_text, count_tokens, merge_results
 from src.service.client import get_client
+from src.service.coalesce import coalescing_stats
+from src.service.deadline import (Deadline, DeadlineExceeded, current_deadline, deadline_expired,
+                                  map_until_deadline, mark_incomplete, propagate, timeout_kwargs)
+from src.service.dedup import get_dedup_index
+from src.service.profiling import PROFILE_MODES, profile_stage, profiler
+from src.service.records import JsonlWriter, read_records, record_text
+from src.service.usage import usage_tracker
+from src.service.watcher import FolderWatcher
 
 # ------------------------- #
 # --- Initialize Client --- #
 # ------------------------- #
 
-use_structured_output: bool = True  # only for OpenAI for now
+use_structured_output: bool = True  # OpenAI, Ollama (JSON schema `format`) and the cascade
+use_dedup: bool = True  # reuse results of near-duplicate postings instead of calling the LLM
 client_type: str = "openai"
 # client_type = "groq"
 # client_type = "openrouter"    # not implemented yet
-# client_type = "ollama"        # not implemented yet
+# client_type = "ollama"
+# client_type = "cascade"       # cheap tier first, see CASCADE_TIERS
 
 client = get_client(
     client_type=client_type,
+    stage="job",
 )
 
 if client_type == "openai":
@@ -34,209 +52,170 @@ elif client_type == "openrouter":
     model: str = os.environ.get("OPENROUTER_MODEL_NAME")
 elif client_type == "ollama":
     model: str = os.environ.get("OLLAMA_MODEL_NAME")
+elif client_type == "cascade":
+    model: str = "cascade"  # each tier calls its own model
 
 # ------------------------ #
 # --- Define Functions --- #
 # ------------------------ #
-if client_type == "openai" and use_structured_output:
 
+
+def build_job_messages(job_description: str, instructions: str) -> List[Dict[str, str]]:
+    """
+    Messages for a job description call: the system prompt and job description form a prefix shared by
+    every field extraction of the same posting, so it is served from the provider's prompt cache.
+    """
+    return build_messages(job_system_prompt,
+                          [job_context_prompt_template.format(text=job_description)],
+                          instructions)
+
+
+if client_type in ("openai", "ollama", "cascade") and use_structured_output:
+
+    @profile_stage()
     def parse_job_description(job_description: str) -> Dict:
-        prompt = process_job_prompt_template.format(text=job_description)
         completion = client.beta.chat.completions.parse(
             model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that extracts information from job descriptions.",
-                },
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+            messages=build_job_messages(job_description, process_job_instructions),
             response_format=JobDescription,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("parse_job_description", completion)
         return completion.choices[0].message.parsed.model_dump()
 
 else:
 
     def get_summary(job_description: str) -> str:
-        prompt = summary_generation_prompt_template.format(text=job_description)
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+            messages=build_job_messages(job_description, summary_generation_instructions),
             max_tokens=1024,
             temperature=0.0,
             seed=42,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("summary", response)
         return response.choices[0].message.content
 
 
     def get_title(job_description: str) -> str:
-        prompt = title_extraction_prompt_template.format(text=job_description)
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+            messages=build_job_messages(job_description, title_extraction_instructions),
             max_tokens=1024,
             temperature=0.0,
             seed=42,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("title", response)
         return response.choices[0].message.content.strip()
 
 
     def get_company(job_description: str) -> str:
-        prompt = company_extraction_prompt_template.format(text=job_description)
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+            messages=build_job_messages(job_description, company_extraction_instructions),
             max_tokens=1024,
             temperature=0.0,
             seed=42,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("company", response)
         return response.choices[0].message.content.strip()
 
 
     def get_location(job_description: str) -> str:
-        prompt = location_extraction_prompt_template.format(text=job_description)
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+            messages=build_job_messages(job_description, location_extraction_instructions),
             max_tokens=1024,
             temperature=0.0,
             seed=42,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("location", response)
         return response.choices[0].message.content.strip()
 
 
     def get_technical_skills(job_description: str) -> List[str]:
-        prompt = technical_skills_extraction_prompt_template.format(
-            text=job_description
-        )
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+            messages=build_job_messages(job_description, technical_skills_extraction_instructions),
             max_tokens=1024,
             temperature=0.0,
             seed=42,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("technical_skills", response)
         return (
             response.choices[0].message.content.strip().split(", ")
         )  # since we want a 'list' of keywords
 
 
     def get_soft_skills(job_description: str) -> List[str]:
-        prompt = soft_skills_extraction_prompt_template.format(text=job_description)
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+            messages=build_job_messages(job_description, soft_skills_extraction_instructions),
             max_tokens=1024,
             temperature=0.0,
             seed=42,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("soft_skills", response)
         return (
             response.choices[0].message.content.strip().split(", ")
         )  # since we want a 'list' of keywords
 
 
     def get_qualifications(job_description: str) -> List[str]:
-        prompt = qualifications_extraction_prompt_template.format(text=job_description)
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+            messages=build_job_messages(job_description, qualifications_extraction_instructions),
             max_tokens=1024,
             temperature=0.0,
             seed=42,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("qualifications", response)
         return (
             response.choices[0].message.content.strip().split("\n")
         )  # since we want a 'list' of qualifications
 
 
     def get_responsibilities(job_description: str) -> List[str]:
-        prompt = responsibilities_extraction_prompt_template.format(
-            text=job_description
-        )
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+            messages=build_job_messages(job_description, responsibilities_extraction_instructions),
             max_tokens=1024,
             temperature=0.0,
             seed=42,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("responsibilities", response)
         return (
             response.choices[0].message.content.strip().split("\n")
         )  # since we want a 'list' of responsibilities
 
 
     def get_missions(job_description: str) -> List[str]:
-        prompt = missions_extraction_prompt_template.format(text=job_description)
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
+            messages=build_job_messages(job_description, missions_extraction_instructions),
             max_tokens=1024,
             temperature=0.0,
             seed=42,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("missions", response)
         return (
             response.choices[0].message.content.strip().split("\n")
         )  # since we want a 'list' of missions
 
 
     # def get_generated_title(job_description: str) -> str:
-    #     prompt = title_generation_prompt_template.format(text=job_description)
     #     response = client.chat.completions.create(
     #         model=model,
-    #         messages=[
-    #             {
-    #                 "role": "user",
-    #                 "content": prompt,
-    #             },
-    #         ],
+    #         messages=build_job_messages(job_description, title_generation_instructions),
     #         max_tokens=1024,
     #         temperature=0.0,
     #         seed=42,
@@ -247,6 +226,7 @@ else:
     # --- Main Function --- #
     # --------------------- #
 
+    @profile_stage()
     def parse_job_description(job_description: str) -> Dict:
         summary = get_summary(job_description)
         title = get_title(job_description)
@@ -275,6 +255,94 @@ else:
         return job_insights.model_dump()
 
 
+# ----------------------------- #
+# --- Long Job Descriptions --- #
+# ----------------------------- #
+
+
+def reduce_summaries(summaries: List[str]) -> str:
+    """Summarize the summaries of the chunks into one, in several rounds if they don't fit the budget."""
+    chunks = chunk_text("\n\n".join(summaries), DEFAULT_TOKEN_BUDGET, overlap_tokens=0, model=model)
+    reduced = []
+    for chunk in chunks:
+        response = client.chat.completions.create(
+            model=model,
+            messages=build_job_messages(chunk, summary_generation_instructions),
+            max_tokens=1024,
+            temperature=0.0,
+            seed=42,
+            **timeout_kwargs(),
+        )
+        usage_tracker.record("summary_reduce", response)
+        reduced.append(response.choices[0].message.content.strip())
+
+    return reduced[0] if len(reduced) == 1 else reduce_summaries(reduced)
+
+
+def extract_job_description(job_description: str) -> Dict:
+    """
+    `parse_job_description`, map-reduced over chunks for postings over the token budget.
+
+    Long postings (e.g. a whole company handbook pasted in) are split into chunks of at most
+    `INPUT_TOKEN_BUDGET` tokens, extracted in parallel, then merged: lists are deduplicated, the first
+    title, company and location found win, and the chunk summaries are summarized again.
+    """
+    num_tokens = count_tokens(job_description, model)
+    if num_tokens <= DEFAULT_TOKEN_BUDGET:
+        return parse_job_description(job_description)
+
+    chunks = chunk_text(job_description, DEFAULT_TOKEN_BUDGET, model=model)
+    logger.info(f"Job description over budget ({num_tokens} > {DEFAULT_TOKEN_BUDGET} tokens), "
+                f"extracting {len(chunks)} chunks in parallel.")
+
+    executor = ThreadPoolExecutor(max_workers=min(len(chunks), getattr(client, "max_concurrency", 8)))
+    try:  # the chunks still running at the deadline are dropped, the others merged
+        results = map_until_deadline(executor, parse_job_description, chunks)
+    finally:
+        executor.shutdown(wait=not deadline_expired(), cancel_futures=True)
+
+    if any(result is None for result in results):
+        mark_incomplete("chunks")
+        results = [result for result in results if result is not None]
+        if not results:
+            raise DeadlineExceeded("No chunk of the job description extracted within the deadline")
+
+    job_insights = merge_results(results)
+    summaries = [result["Summary"] for result in results]
+    job_insights["Summary"] = summaries[0] if deadline_expired() else reduce_summaries(summaries)
+
+    return JobDescription(**job_insights).model_dump()
+
+
+# ------------------------------- #
+# --- Near-Duplicate Postings --- #
+# ------------------------------- #
+
+
+def structure_job_description(job_description: str) -> Dict:
+    """
+    Structure a raw job description, reusing the result of an already processed near-duplicate posting.
+
+    Postings whose MinHash similarity to an indexed posting reaches `DEDUP_THRESHOLD` are served from the
+    persistent index; all others go through `extract_job_description` and are added to the index.
+    """
+    if not use_dedup:
+        return extract_job_description(job_description)
+
+    dedup_index = get_dedup_index()
+    match = dedup_index.query(job_description)
+    if match:
+        logger.info(f"Duplicate posting found (similarity: {match.similarity:.2f}), skipping LLM extraction.")
+        return match.result
+
+    job_description_structured = extract_job_description(job_description)
+    deadline = current_deadline()
+    if deadline is None or not deadline.incomplete:  # a partial extraction isn't worth reusing
+        dedup_index.add(job_description, job_description_structured)
+
+    return job_description_structured
+
+
 # ------------------- #
 # --- Script Args --- #
 # ------------------- #
@@ -295,6 +363,58 @@ def parse_args():
         default="data/job_descriptions/structured",
         help="Path to the output folder",
     )
+    parser.add_argument(
+        "--no_dedup",
+        action="store_true",
+        help="Always call the LLM, even for near-duplicates of already processed postings",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Time budget of the run in seconds: calls still running by then are cancelled",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        help="Profile each stage (also enabled by the PROFILE environment variable)",
+    )
+    parser.add_argument(
+        "--watch",
+        nargs="?",
+        const="data/job_descriptions/raw",
+        help="Watch a folder (default: 'data/job_descriptions/raw') and process every new or changed file",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="Maximum job descriptions processed at once in watch and corpus modes",
+    )
+    parser.add_argument(
+        "--corpus",
+        help="JSONL or CSV export of postings, streamed record by record into --output_jsonl",
+    )
+    parser.add_argument(
+        "--output_jsonl",
+        default="data/job_descriptions/structured/job_descriptions.jsonl",
+        help="JSONL the structured postings of --corpus are appended to",
+    )
+    parser.add_argument(
+        "--start",
+        type=int,
+        help="Record offset of --corpus to start from (default: resume after the last checkpoint)",
+    )
+    parser.add_argument(
+        "--text_field",
+        help="Field (or CSV column) of --corpus records holding the posting text (default: the first of "
+             "description, job_description, text, content, body, or the whole record)",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=2.0,
+        help="Seconds a watched file must stay unchanged before it is processed",
+    )
 
     return parser.parse_args()
 
@@ -307,27 +427,136 @@ def parse_args():
 def main(
         input_file_path: str = "data/job_descriptions/raw/test_DoggoTech_CTO.txt",
         output_folder: str = "data/job_descriptions/structured",
+        deadline: Optional[float] = None,
 ) -> None:
     try:
         # Load Unstructured Job Description from TXT file
         job_description_unstructured = load_file_from_txt(input_file_path)
 
-        # Generate Structured Job Description
-        job_description_structured = parse_job_description(job_description_unstructured)
+        # Generate Structured Job Description, within the deadline if any
+        with Deadline(deadline) if deadline else nullcontext() as run_deadline:
+            job_description_structured = structure_job_description(job_description_unstructured)
+        if run_deadline is not None and run_deadline.incomplete:
+            logger.warning(f"Deadline of {deadline:.0f}s exceeded, incomplete: {', '.join(run_deadline.incomplete)}")
         rprint(json.dumps(job_description_structured, indent=2))
 
         # Save the job description
         save_to_json(job_description_structured, output_folder, file_type="Structured Job Description")
 
+        if use_dedup:
+            stats = get_dedup_index().stats()
+            rprint(f"Dedup rate: [bold]{stats['dedup_rate']:.1%}[/bold] "
+                   f"({stats['exact_hits']} exact + {stats['near_hits']} near hits / {stats['lookups']} lookups, "
+                   f"{stats['postings']} indexed postings)")
+
+        usage_tracker.print_report()
+        if client_type == "cascade":
+            client.print_report()
+
     except FileNotFoundError as e:
         logger.error(f"Oups:\n   {e}")
         sys.exit(1)
+    except (DeadlineExceeded, APITimeoutError, httpx.TimeoutException) as e:  # a call timed out by the deadline
+        logger.error(f"Deadline exceeded, the job description wasn't structured:\n   {str(e) or type(e).__name__}")
+        sys.exit(1)
+
+
+def watch(
+        watch_folder: str = "data/job_descriptions/raw",
+        output_folder: str = "data/job_descriptions/structured",
+        max_workers: int = 2,
+        debounce: float = 2.0,
+) -> None:
+    """Process every new or changed job description dropped into `watch_folder`, until interrupted."""
+
+    def process_file(path: str, job_description_unstructured: str) -> None:
+        job_description_structured = structure_job_description(job_description_unstructured)
+        save_to_json(job_description_structured, output_folder, file_type="Structured Job Description")
+
+    FolderWatcher(watch_folder, handler=process_file, debounce=debounce, max_workers=max_workers).run()
+    usage_tracker.print_report()
+    if client_type == "cascade":
+        client.print_report()
+
+
+def process_corpus(
+        input_path: str,
+        output_path: str = "data/job_descriptions/structured/job_descriptions.jsonl",
+        start: Optional[int] = None,
+        max_workers: int = 2,
+        text_field: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Structure every posting of a JSONL or CSV export into a JSONL of validated `JobDescription` records.
+
+    Records are streamed one at a time and at most `2 * max_workers` are in flight, so memory doesn't grow
+    with the corpus. Results are appended in input order and flushed as they are written, with a checkpoint
+    of the next input offset: an interrupted run resumes where it stopped (`start` overrides it).
+    Records failing extraction or validation are logged and skipped.
+    """
+
+    def extract(record: Any) -> Dict:
+        job_description_structured = structure_job_description(record_text(record, text_field))
+        return JobDescription.model_validate(job_description_structured).model_dump()
+
+    counts = {"written": 0, "failed": 0}
+    pending = deque()
+
+    def write_done(max_pending: int) -> None:
+        """Write the oldest results, in input order, until at most `max_pending` are in flight."""
+        while len(pending) > max_pending:
+            offset, future = pending.popleft()
+            try:
+                writer.write(future.result())
+                counts["written"] += 1
+            except Exception as e:
+                counts["failed"] += 1
+                logger.warning(f"Skipping record {offset} of '{input_path}':\n   {e}")
+            writer.checkpoint(offset + 1)
+
+    with JsonlWriter(output_path) as writer, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        start = writer.resume_offset() if start is None else start
+        for offset, record in read_records(input_path, start=start):
+            pending.append((offset, executor.submit(propagate(extract), record)))
+            write_done(2 * max_workers)
+        write_done(0)
+
+    rprint(f"{counts['written']} job descriptions appended to:\n   -> [bold green]{output_path}[/bold green] "
+           f"({counts['failed']} failed)")
+    usage_tracker.print_report()
+    coalescing_stats.print_report()
+    if client_type == "cascade":
+        client.print_report()
+    return counts
 
 
 if __name__ == "__main__":
     args = parse_args()
+    use_dedup = not args.no_dedup
+    if args.profile:
+        profiler.enable(args.profile)
+
+    if args.corpus:
+        process_corpus(
+            input_path=args.corpus,
+            output_path=args.output_jsonl,
+            start=args.start,
+            max_workers=args.workers,
+            text_field=args.text_field,
+        )
+        sys.exit(0)
+
+    if args.watch:
+        watch(
+            watch_folder=args.watch,
+            output_folder=args.output_path,
+            max_workers=args.workers,
+            debounce=args.debounce,
+        )
+        sys.exit(0)
 
     main(
         input_file_path=args.job_description_path,
         output_folder=args.output_path,
+        deadline=args.deadline,
     )
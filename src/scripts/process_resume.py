@@ -1,3 +1,235 @@
-# --------------------------- #
-# --- Not implemented yet --- #
-# --------------------------- #
\ No newline at end of file
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List
+
+from loguru import logger
+from rich import print as rprint
+
+from src.models.resume_model import *
+from src.prompts.resume_prompts import *
+from src.prompts.utils import build_messages
+from src.scripts.utils import load_file_from_txt, save_to_json
+from src.service.cascade import validation_kwargs
+from src.service.chunking import DEFAULT_TOKEN_BUDGET, chunk_text, merge_results
+from src.service.client import get_client
+from src.service.deadline import propagate, timeout_kwargs
+from src.service.ollama import structured_output_kwargs
+from src.service.json_repair import parse_section, reask_section
+from src.service.usage import usage_tracker
+
+# ------------------------- #
+# --- Initialize Client --- #
+# ------------------------- #
+
+client_type: str = "openai"
+# client_type = "groq"
+# client_type = "openrouter"    # not implemented yet
+# client_type = "ollama"
+# client_type = "cascade"       # cheap tier first, see CASCADE_TIERS
+
+client = get_client(
+    client_type=client_type,
+    stage="resume",
+)
+
+if client_type == "openai":
+    model: str = os.environ.get("OPENAI_MODEL_NAME")
+elif client_type == "groq":
+    model: str = os.environ.get("GROQ_MODEL_NAME")
+elif client_type == "openrouter":
+    model: str = os.environ.get("OPENROUTER_MODEL_NAME")
+elif client_type == "ollama":
+    model: str = os.environ.get("OLLAMA_MODEL_NAME")
+elif client_type == "cascade":
+    model: str = "cascade"  # each tier calls its own model
+
+# Structured resumes are cached under the hash of the normalized raw text
+RESUME_CACHE_FOLDER: str = os.environ.get("RESUME_CACHE_FOLDER", "data/resume_data/structured/.cache")
+
+# Section -> (instructions, expected type, item type for lists, max tokens)
+RESUME_SECTIONS: Dict[str, tuple] = {
+    "contact_info": (contact_info_extraction_instructions, ResumeContactInfo, None, 512),
+    "skills": (skills_extraction_instructions, ResumeSkills, None, 512),
+    "experience": (experience_extraction_instructions, List[ResumeExperienceItem], ResumeExperienceItem, 2048),
+    "education": (education_extraction_instructions, List[ResumeEducationItem], ResumeEducationItem, 512),
+    "certificates": (certificates_extraction_instructions, List[ResumeCertificateItem], ResumeCertificateItem, 512),
+    "languages": (languages_extraction_instructions, List[Dict[str, int]], None, 256),
+    "interests": (interests_extraction_instructions, List[str], None, 256),
+}
+
+
+# ------------------------ #
+# --- Define Functions --- #
+# ------------------------ #
+
+
+# `reask(section, json_schema, broken_output, error)`: re-asks for the broken part of a section
+reask = partial(reask_section, client, model, section_repair_prompt_template)
+
+
+def extract_section(section: str, resume_text: str) -> Any:
+    """
+    Extract and validate a single section of the resume.
+    """
+    instructions, schema, item_schema, max_tokens = RESUME_SECTIONS[section]
+
+    # The system prompt and resume form a prefix shared by all sections, served from the prompt cache
+    response = client.chat.completions.create(
+        model=model,
+        messages=build_messages(resume_system_prompt,
+                                [resume_context_prompt_template.format(text=resume_text)],
+                                instructions),
+        **structured_output_kwargs(client_type, schema),
+        **validation_kwargs(client_type, schema),
+        max_tokens=max_tokens,
+        temperature=0.0,
+        seed=42,
+        **timeout_kwargs(),
+    )
+    usage_tracker.record(section, response)
+
+    return parse_section(response.choices[0].message.content,
+                         schema,
+                         section=section,
+                         reask=partial(reask, section, max_tokens=max_tokens),
+                         item_schema=item_schema)
+
+
+# --------------------- #
+# --- Main Function --- #
+# --------------------- #
+
+
+def parse_resume(resume_text: str) -> Dict:
+    """
+    Structure a raw resume, extracting every section concurrently.
+
+    Resumes over the token budget are split into chunks, every section is extracted from every chunk, and
+    the chunk results are merged (lists deduplicated, first values found kept).
+    """
+    chunks = chunk_text(resume_text, DEFAULT_TOKEN_BUDGET, model=model)
+    if len(chunks) > 1:
+        logger.info(f"Resume over budget ({DEFAULT_TOKEN_BUDGET} tokens), extracting {len(chunks)} chunks.")
+
+    # A local Ollama server only serves `OLLAMA_NUM_PARALLEL` requests at once, more would just queue up
+    num_calls = len(chunks) * len(RESUME_SECTIONS)
+    max_workers = min(num_calls, getattr(client, "max_concurrency", 16))
+    extract = propagate(extract_section)  # the calls run under the caller's deadline
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [{section: executor.submit(extract, section, chunk) for section in RESUME_SECTIONS}
+                   for chunk in chunks]
+        results = [{section: future.result() for section, future in chunk_futures.items()}
+                   for chunk_futures in futures]
+
+    # Validated models back to plain data, so that the chunk results can be merged
+    results = [StructuredResume(**sections).model_dump() for sections in results]
+    structured_resume = StructuredResume(**merge_results(results))
+
+    return structured_resume.model_dump()
+
+
+def normalize_resume_text(resume_text: str) -> str:
+    """Normalize unicode and whitespace, so that re-exports of the same resume share a cache entry."""
+    text = unicodedata.normalize("NFKC", resume_text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def structure_resume(resume_text: str, use_cache: bool = True) -> Dict:
+    """
+    Structure a raw resume, reusing the cached result for an identical (normalized) resume.
+
+    A resume is typically tailored to many jobs, so it is only ever structured once.
+    """
+    text_hash = hashlib.sha256(normalize_resume_text(resume_text).encode("utf-8")).hexdigest()
+    cache_path = os.path.join(RESUME_CACHE_FOLDER, f"{text_hash}.json")
+
+    if use_cache and os.path.exists(cache_path):
+        logger.info(f"Resume already structured, loading it from cache:\n   -> {cache_path}")
+        with open(cache_path, "r") as f:
+            return json.load(f)
+
+    structured_resume = parse_resume(resume_text)
+
+    os.makedirs(RESUME_CACHE_FOLDER, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(structured_resume, f)
+    os.replace(tmp_path, cache_path)
+
+    return structured_resume
+
+
+# ------------------- #
+# --- Script Args --- #
+# ------------------- #
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Extract structured resume data using LLM."
+    )
+    parser.add_argument(
+        "--resume_path",
+        type=str,
+        default="data/resume_data/raw/resume.txt",
+        help="Path to the raw resume TXT file",
+    )
+    parser.add_argument(
+        "--output_path",
+        default="data/resume_data/structured",
+        help="Path to the output folder",
+    )
+    parser.add_argument(
+        "--no_cache",
+        action="store_true",
+        help="Structure the resume again, even if it was already structured",
+    )
+
+    return parser.parse_args()
+
+
+# ------------ #
+# --- Main --- #
+# ------------ #
+
+
+def main(
+        input_file_path: str = "data/resume_data/raw/resume.txt",
+        output_folder: str = "data/resume_data/structured",
+        use_cache: bool = True,
+) -> None:
+    try:
+        # Load Unstructured Resume from TXT file
+        resume_unstructured = load_file_from_txt(input_file_path)
+
+        # Generate Structured Resume
+        resume_structured = structure_resume(resume_unstructured, use_cache=use_cache)
+        rprint(json.dumps(resume_structured, indent=2))
+
+        # Save the structured resume
+        save_to_json(resume_structured, output_folder, file_type="Structured Resume")
+
+        usage_tracker.print_report()
+        if client_type == "cascade":
+            client.print_report()
+
+    except FileNotFoundError as e:
+        logger.error(f"Oups:\n   {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    main(
+        input_file_path=args.resume_path,
+        output_folder=args.output_path,
+        use_cache=not args.no_cache,
+    )
@@ -2,28 +2,50 @@ import argparse
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
 
+import httpx
 from loguru import logger
+from openai import APITimeoutError
+from pydantic import ValidationError
 from rich import print as rprint
 
 from src.models.tailored_resume_model import *
 from src.models.utils import extract_contact_info, extract_education
 from src.prompts.tailor_resume_prompts import *
+from src.prompts.utils import build_messages, canonical_json
 from src.scripts.utils import load_data_from_json, save_to_json
+from src.service.cascade import validation_kwargs
 from src.service.client import get_client
+from src.service.deadline import (Deadline, current_deadline, deadline_expired, map_until_deadline,
+                                  mark_incomplete, timeout_kwargs)
+from src.service.ollama import structured_output_kwargs
+from src.service.profiling import PROFILE_MODES, profile_stage, profiler
+from src.service.section_cache import get_section_cache
+from src.service.json_repair import JSONRepairError, parse_section, reask_section, repair_json, repair_stats
+from src.service.usage import usage_tracker
 
 # ------------------------- #
 # --- Initialize Client --- #
 # ------------------------- #
 
-use_structured_output: bool = False  # only for OpenAI for now
+use_structured_output: bool = True  # all sections in one call, falling back to per-section calls
+# Reuse sections tailored for similar jobs (opt-in), see SECTION_CACHE_THRESHOLDS
+use_section_cache: bool = os.environ.get("SECTION_CACHE", "false").lower() == "true"
+use_parallel_experiences: bool = True  # one small call per experience entry, run concurrently
+experience_item_retries: int = 2  # extra attempts for an experience entry that fails validation
 client_type: str = "openai"
 # client_type = "groq"
 # client_type = "openrouter"    # not implemented yet
-# client_type = "ollama"        # not implemented yet
+# client_type = "ollama"
+# client_type = "cascade"       # cheap tier first, see CASCADE_TIERS
 
 client = get_client(
     client_type=client_type,
+    stage="tailor",
 )
 
 if client_type == "openai":
@@ -34,202 +56,390 @@ elif client_type == "openrouter":
     model: str = os.environ.get("OPENROUTER_MODEL_NAME")
 elif client_type == "ollama":
     model: str = os.environ.get("OLLAMA_MODEL_NAME")
+elif client_type == "cascade":
+    model: str = "cascade"  # each tier calls its own model
 
 # ------------------------ #
 # --- Define Functions --- #
 # ------------------------ #
 
-if client_type == "openai" and use_structured_output:
 
-    def tailor_resume(resume: str, job_description: str) -> Dict:
-        prompt = tailor_resume_prompt_template.format(
-            resume=resume, job_description=job_description
-        )
-        completion = client.beta.chat.completions.parse(
-            model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that tailors resumes to job descriptions.",
-                },
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
-            ],
-            response_format=TailoredResume,
-        )
-        return completion.choices[0].message.parsed.model_dump()
+def build_tailoring_messages(resume: Dict, job_description: Dict, instructions: str) -> List[Dict[str, str]]:
+    """
+    Messages for a tailoring call, with the full resume and job description in a stable prefix.
+
+    Every section call for the same resume and job shares everything but the instructions, so the
+    provider's prompt cache serves most of the prompt, also across jobs for the same resume.
+    """
+    return build_messages(
+        tailor_resume_system_prompt,
+        [
+            resume_context_prompt_template.format(resume=canonical_json(resume)),
+            job_context_prompt_template.format(job_description=canonical_json(job_description)),
+        ],
+        instructions,
+    )
+
 
-else:
+# --- Section Repair --- #
+# `reask(section, json_schema, broken_output, error)`: re-asks for the broken part of a section
+reask = partial(reask_section, client, model, section_repair_prompt_template)
 
-    # --- Introduction --- #
-    def generate_introduction(resume: Dict, job_description: Dict) -> str:
-        """
-        Generate an introduction based on the resume and job description.
-        """
-        prompt = introduction_prompt_template.format(resume=resume,
-                                                     job_description=job_description)
+
+# --- Introduction --- #
+@profile_stage()
+def generate_introduction(resume: Dict, job_description: Dict) -> Optional[str]:
+    """
+    Generate an introduction based on the resume and job description, None if it fails.
+    """
+    try:
         response = client.chat.completions.create(
             model=model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=build_tailoring_messages(resume, job_description, introduction_instructions),
             max_tokens=512,
             temperature=0.2,  # 0.2 is a good temperature for generating text
             seed=42,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("introduction", response)
 
         introduction = response.choices[0].message.content.strip()
 
-        return introduction
+    except Exception as e:
+        logger.error(f"Error generating introduction:\n   {e}")
+        return None
 
+    return introduction
 
-    # --- Skills --- #
-    def generate_skills(resume: Dict, job_description: Dict) -> Skills:
-        """
-        Generate a list of skills based on the skills section of the resume and job description.
-        """
-        prompt = skills_prompt_template.format(skills_section=resume.get("skills"),
-                                               job_description=job_description)
 
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=512,
-                temperature=0.0,
-                seed=42,
-            )
+# --- Skills --- #
+@profile_stage()
+def generate_skills(resume: Dict, job_description: Dict) -> Optional[Skills]:
+    """
+    Generate a list of skills based on the skills section of the resume and job description.
+    """
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=build_tailoring_messages(resume, job_description, skills_instructions),
+            **structured_output_kwargs(client_type, Skills),
+            **validation_kwargs(client_type, Skills),
+            max_tokens=512,
+            temperature=0.0,
+            seed=42,
+            **timeout_kwargs(),
+        )
+        usage_tracker.record("skills", response)
 
-            skills = json.loads(response.choices[0].message.content.strip())
+        skills = parse_section(response.choices[0].message.content,
+                               Skills,
+                               section="skills",
+                               reask=partial(reask, "skills"))
 
+    except Exception as e:
+        logger.error(f"Error generating skills:\n   {e}")
+        return None
 
-        except Exception as e:
-            logger.error(f"Error generating skills:\n   {e}")
-            logger.warning("Returning empty skills.")
-            return Skills(
-                programming_languages=[],
-                technical_stack=[],
-                soft_skills=[])
+    return skills
 
-        return Skills(
-            programming_languages=skills.get("programming_languages"),
-            technical_stack=skills.get("technical_stack"),
-            soft_skills=skills.get("soft_skills"))
 
+# --- Experience --- #
+def generate_experience_item(resume: Dict, job_description: Dict, experience: Dict) -> ExperienceItem:
+    """
+    Tailor the summary of a single experience entry, with its own validation and retries.
 
-    # --- Experience --- #
-    def generate_experience(resume: Dict, job_description: Dict) -> List[ExperienceItem]:
-        prompt = experience_prompt_template.format(experience_section=resume.get("experience"),
-                                                   job_description=job_description)
+    Title, company and period are copied from the resume, so only the bullet points are generated. If every
+    attempt fails, the entry keeps its first missions and results as they are in the resume.
+    """
+    entry = {key: experience.get(key, []) for key in ("title", "company", "period", "missions", "results")}
+    instructions = experience_item_instructions_template.format(experience=canonical_json(entry))
 
+    summary = None
+    for attempt in range(1 + experience_item_retries):
+        if deadline_expired():
+            break
         try:
             response = client.chat.completions.create(
                 model=model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1024,
+                messages=build_tailoring_messages(resume, job_description, instructions),
+                **validation_kwargs(client_type, List[str]),
+                max_tokens=256,
                 temperature=0.0,
-                seed=42,
+                seed=42 + attempt,
+                **timeout_kwargs(),
             )
+            usage_tracker.record("experience_item", response)
 
-            experience_list = json.loads(response.choices[0].message.content.strip())
+            summary = parse_section(response.choices[0].message.content,
+                                    List[str],
+                                    section="experience_item",
+                                    reask=partial(reask, "experience_item", max_tokens=256))
+            if summary:
+                break
+            raise ValueError("Empty summary")
 
         except Exception as e:
-            logger.error(f"Error generating experiences:\n   {e}")
-            logger.warning("Returning empty experience.")
-            return [ExperienceItem(
-                title="",
-                company="",
-                period="",
-                summary=[],
-            )]
+            summary = None
+            logger.warning(f"Error tailoring experience '{entry['title']}' at '{entry['company']}' "
+                           f"(attempt {attempt + 1}/{1 + experience_item_retries}):\n   {e}")
+
+    if not summary:
+        if deadline_expired():
+            mark_incomplete("experiences")
+        logger.warning(f"Keeping the resume bullet points of '{entry['title']}' at '{entry['company']}'.")
+        summary = [*entry["missions"], *entry["results"]][:3]
+
+    return ExperienceItem(title=entry["title"] or "",
+                          company=entry["company"] or "",
+                          period=str(entry["period"] or ""),
+                          summary=summary)
+
+
+def generate_experience_items(resume: Dict, job_description: Dict) -> List[ExperienceItem]:
+    """
+    Tailor every experience entry in its own small call, concurrently, reassembled in the resume order.
+
+    Long careers don't truncate a single large JSON output, and the output tokens of the entries are
+    generated in parallel instead of one after the other.
+    """
+    experiences = resume.get("experience") or []
+    if not experiences:
+        return []
+
+    max_workers = min(len(experiences), getattr(client, "max_concurrency", 8))
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:  # the entries still running at the deadline are dropped, not waited for
+        items = map_until_deadline(executor, partial(generate_experience_item, resume, job_description), experiences)
+    finally:
+        executor.shutdown(wait=not deadline_expired(), cancel_futures=True)
+
+    if any(item is None for item in items):
+        mark_incomplete("experiences")
+    return [item for item in items if item is not None]
+
+
+@profile_stage()
+def generate_experience(resume: Dict, job_description: Dict) -> Optional[List[ExperienceItem]]:
+    if use_parallel_experiences:
+        return generate_experience_items(resume, job_description)
 
-        return [ExperienceItem(**item) for item in experience_list]
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=build_tailoring_messages(resume, job_description, experience_instructions),
+            **structured_output_kwargs(client_type, List[ExperienceItem]),
+            **validation_kwargs(client_type, List[ExperienceItem]),
+            max_tokens=1024,
+            temperature=0.0,
+            seed=42,
+            **timeout_kwargs(),
+        )
+        usage_tracker.record("experience", response)
 
+        experience_list = parse_section(response.choices[0].message.content,
+                                        List[ExperienceItem],
+                                        section="experience",
+                                        reask=partial(reask, "experience", max_tokens=1024),
+                                        item_schema=ExperienceItem)
 
-    # --- Certifications --- #
-    def generate_certifications(resume: Dict, job_description: Dict) -> List[CertificationItem]:
-        prompt = certifications_prompt_template.format(certificate_section=resume.get("certificates"),
-                                                       job_description=job_description)
+    except Exception as e:
+        logger.error(f"Error generating experiences:\n   {e}")
+        return None
 
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=512,
-                temperature=0.0,
-                seed=42,
-            )
+    return experience_list
 
-            certification_list = json.loads(response.choices[0].message.content.strip())
 
-        except Exception as e:
-            logger.error(f"Error generating certifications:\n   {e}")
-            logger.warning("Returning empty certifications.")
-            return [CertificationItem(
-                title="",
-                institution="",
-                year=0,
-            )]
+# --- Certifications --- #
+@profile_stage()
+def generate_certifications(resume: Dict, job_description: Dict) -> Optional[List[CertificationItem]]:
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=build_tailoring_messages(resume, job_description, certifications_instructions),
+            **structured_output_kwargs(client_type, List[CertificationItem]),
+            **validation_kwargs(client_type, List[CertificationItem]),
+            max_tokens=512,
+            temperature=0.0,
+            seed=42,
+            **timeout_kwargs(),
+        )
+        usage_tracker.record("certifications", response)
 
-        return [CertificationItem(**item) for item in certification_list]
+        certification_list = parse_section(response.choices[0].message.content,
+                                           List[CertificationItem],
+                                           section="certifications",
+                                           reask=partial(reask, "certifications"),
+                                           item_schema=CertificationItem)
 
+    except Exception as e:
+        logger.error(f"Error generating certifications:\n   {e}")
+        return None
 
-    # --- Interests --- #
-    def generate_interests(resume: Dict, job_description: Dict) -> List[str]:
-        prompt = interests_prompt_template.format(interest_section=resume.get("interests"),
-                                                  job_description=job_description)
+    return certification_list
 
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=512,
-                temperature=0.0,
-                seed=42,
-            )
 
-            interests_list = (
-                response.choices[0].message.content.strip().split(", "))  # since we want a 'list' of keywords
+# --- Interests --- #
+@profile_stage()
+def generate_interests(resume: Dict, job_description: Dict) -> Optional[List[str]]:
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=build_tailoring_messages(resume, job_description, interests_instructions),
+            max_tokens=512,
+            temperature=0.0,
+            seed=42,
+            **timeout_kwargs(),
+        )
+        usage_tracker.record("interests", response)
+
+        interests_list = (
+            response.choices[0].message.content.strip().split(", "))  # since we want a 'list' of keywords
 
-        except Exception as e:
-            logger.error(f"Error generating interests:\n   {e}")
-            logger.warning("Returning empty interests.")
-            return []
-
-        return interests_list
-
-
-    def tailor_resume(resume: dict, job_description: dict) -> Dict:
-        # Extract information directly from the resume or job description
-        contact_info = extract_contact_info(resume)
-        # contact_info = resume.get("contact_info", {})
-        # languages = extract_languages(resume)
-        languages = resume.get("languages", [])
-        education = extract_education(resume)
-        company_applying = job_description.get("Company", "Unknown")
-
-        # Generate tailored sections
-        introduction = generate_introduction(resume, job_description)
-        skills = generate_skills(resume, job_description)
-        experiences = generate_experience(resume, job_description)
-        certifications = generate_certifications(resume, job_description)
-        interests = generate_interests(resume, job_description)
-
-        tailored_resume = TailoredResumeData(
-            # Extracted information
-            company_applying=company_applying,
-            contact_info=contact_info,
-            languages=languages,
-            education=education,
-            # Generated sections
-            introduction=introduction,
-            skills=skills,
-            experiences=experiences,
-            certifications=certifications,
-            interests=interests,
+    except Exception as e:
+        logger.error(f"Error generating interests:\n   {e}")
+        return None
+
+    return interests_list
+
+
+# --- All Sections at Once --- #
+# Each generator returns None when its section fails, `tailor_resume` then uses the empty fallback below
+SECTION_GENERATORS: Dict[str, Callable[[Dict, Dict], Any]] = {
+    "introduction": generate_introduction,
+    "skills": generate_skills,
+    "experiences": generate_experience,
+    "certifications": generate_certifications,
+    "interests": generate_interests,
+}
+
+# Empty sections for the failed generators (and, listed in `incomplete_sections`, the ones cut by the deadline)
+SECTION_FALLBACKS: Dict[str, Callable[[], Any]] = {
+    "introduction": str,
+    "skills": lambda: Skills(programming_languages=[], technical_stack=[], soft_skills=[]),
+    "experiences": list,
+    "certifications": list,
+    "interests": list,
+}
+
+
+@profile_stage()
+def generate_sections(resume: Dict, job_description: Dict) -> Dict[str, Any]:
+    """
+    Generate every tailored section in a single call, validating each section on its own.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The valid sections only; the caller falls back to the per-section generator for the missing ones.
+
+    """
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=build_tailoring_messages(resume, job_description, tailor_resume_instructions),
+            **(structured_output_kwargs(client_type, TailoredSections)
+               or {"response_format": {"type": "json_object"}}),
+            **validation_kwargs(client_type, TailoredSections),
+            max_tokens=2048,
+            temperature=0.0,
+            seed=42,
+            **timeout_kwargs(),
         )
+        usage_tracker.record("all_sections", response)
+
+        output = repair_json(response.choices[0].message.content)
+        if not isinstance(output, dict):
+            raise JSONRepairError(f"Expected a JSON object, got: {type(output).__name__}")
+
+    except Exception as e:
+        logger.error(f"Error generating all sections at once:\n   {e}")
+        return {}
+
+    sections = {}
+    for section, field in TailoredSections.model_fields.items():
+        if section not in output:
+            logger.warning(f"Section '{section}' missing from the single-call output.")
+            continue
+        try:
+            sections[section] = parse_section(json.dumps(output[section]), field.annotation, section=section)
+        except (JSONRepairError, ValidationError) as e:
+            logger.warning(f"Section '{section}' of the single-call output is invalid:\n   {e}")
+
+    return sections
+
+
+def tailor_resume(
+        resume: dict,
+        job_description: dict,
+        on_section: Optional[Callable[[str, Any], None]] = None,
+) -> Dict:
+    # `on_section(name, value)` is called as soon as each generated section is ready, e.g. to stream them
+    notify = on_section or (lambda section, value: None)
+
+    # Extract information directly from the resume or job description
+    contact_info = extract_contact_info(resume)
+    # contact_info = resume.get("contact_info", {})
+    # languages = extract_languages(resume)
+    languages = resume.get("languages", [])
+    education = extract_education(resume)
+    company_applying = job_description.get("Company", "Unknown")
+
+    # Reuse the sections tailored for a similar job, if any
+    sections = {}
+    if use_section_cache:
+        match = get_section_cache().query(resume, job_description)
+        if match:
+            sections = dict(match.sections)
+            logger.info(f"Reusing {sorted(sections)} from a similar job (similarity {match.similarity:.2f})")
+
+    # Generate the other tailored sections, in one call if possible (nothing reused)
+    if use_structured_output and not sections:
+        sections = generate_sections(resume, job_description)
+    for section, value in sections.items():
+        notify(section, value)
+
+    # Only the sections missing or invalid in the single-call output go through their own generator
+    failed = set()
+    for section, generate in SECTION_GENERATORS.items():
+        if section in sections:
+            continue
+        value = None
+        if not deadline_expired():  # past the deadline, return what is done instead of starting more calls
+            try:
+                value = generate(resume, job_description)
+            except (TimeoutError, APITimeoutError, httpx.TimeoutException) as e:  # no section may fail the run
+                logger.error(f"Section '{section}' timed out:\n   {e}")
+
+        if value is None:
+            failed.add(section)
+            sections[section] = SECTION_FALLBACKS[section]()
+            if deadline_expired():
+                mark_incomplete(section)
+        else:
+            sections[section] = value
+            notify(section, value)
+
+    deadline = current_deadline()
+    incomplete_sections = deadline.incomplete if deadline is not None else []
+
+    tailored_resume = TailoredResumeData(
+        # Extracted information
+        company_applying=company_applying,
+        contact_info=contact_info,
+        languages=languages,
+        education=education,
+        # Generated sections
+        **sections,
+        incomplete_sections=incomplete_sections,
+    )
+
+    tailored_resume = tailored_resume.model_dump()  # Return structured data
+    if use_section_cache and not incomplete_sections:  # partial sections aren't worth reusing
+        get_section_cache().add(resume, job_description,
+                                {section: tailored_resume[section] for section in GENERATED_SECTIONS
+                                 if section not in failed})
 
-        return tailored_resume.model_dump()  # Return structured data
+    return tailored_resume
 
 
 # ------------------- #
@@ -256,6 +466,27 @@ def parse_args():
         default="outputs/resumes",
         help="Path to the output folder",
     )
+    parser.add_argument(
+        "--single_call_experiences",
+        action="store_true",
+        help="Tailor all experience entries in one call instead of one concurrent call per entry",
+    )
+    parser.add_argument(
+        "--section_cache",
+        action="store_true",
+        help="Reuse the sections tailored for a similar job before (also enabled by SECTION_CACHE=true)",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Time budget of the run in seconds: the sections not done by then are returned empty and listed "
+             "in 'incomplete_sections'",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        help="Profile each stage (also enabled by the PROFILE environment variable)",
+    )
 
     return parser.parse_args()
 
@@ -268,19 +499,37 @@ def main(
         input_resume_path: str = "data/resume_data/structured/resume_data_v2.json",
         input_job_description_path: str = "data/job_descriptions/structured/Chief_Barkology_Officer_(CBO)_DoggoTech_Solutions.json",
         output_folder: str = "outputs/resumes",
+        deadline: Optional[float] = None,
 ) -> None:
     try:
         # Load Structured Resume & Job Description from JSON files
         resume_data = load_data_from_json(input_resume_path)
         job_description = load_data_from_json(input_job_description_path)
 
-        # Generate Tailored Resume
-        tailored_resume = tailor_resume(resume_data, job_description)
+        # Generate Tailored Resume, within the deadline if any
+        with Deadline(deadline) if deadline else nullcontext():
+            tailored_resume = tailor_resume(resume_data, job_description)
         rprint(tailored_resume)
+        if tailored_resume["incomplete_sections"]:
+            logger.warning(f"Deadline of {deadline:.0f}s exceeded, incomplete sections: "
+                           f"{', '.join(tailored_resume['incomplete_sections'])}")
 
         # Save the tailored resume to JSON
         save_to_json(tailored_resume, output_folder, file_type="Tailored Resume")
 
+        for section, stats in repair_stats.report().items():
+            logger.info(f"'{section}' output: {stats['repair_rate']:.0%} repaired locally, "
+                        f"{stats['reask_rate']:.0%} re-asked, {stats['failed']} failed ({stats['total']} total)")
+
+        if use_section_cache:
+            for section, stats in get_section_cache().stats().items():
+                logger.info(f"'{section}' section cache: {stats['hit_rate']:.0%} hit rate "
+                            f"({stats['hits']} hits / {stats['lookups']} lookups)")
+
+        usage_tracker.print_report()
+        if client_type == "cascade":
+            client.print_report()
+
     except FileNotFoundError as e:
         logger.error(f"Oups:\n   {e}")
         sys.exit(1)
@@ -288,9 +537,14 @@ def main(
 
 if __name__ == "__main__":
     args = parse_args()
+    use_section_cache = use_section_cache or args.section_cache
+    use_parallel_experiences = not args.single_call_experiences
+    if args.profile:
+        profiler.enable(args.profile)
 
     main(
         input_resume_path=args.resume_path,
         input_job_description_path=args.job_description_path,
         output_folder=args.output_path,
+        deadline=args.deadline,
     )
@@ -1,18 +1,45 @@
+import glob
 import json
 from fileinput import filename
-from typing import Dict
+from typing import Dict, List
 import os
 from rich import print as rprint
 from datetime import datetime
 
+from src.service.profiling import profile_stage
+from src.service.store import get_storage_backend, get_store
+
 # ------------------------ #
 # --- Helper Functions --- #
 # ------------------------ #
 
 
 def load_data_from_json(file_path: str) -> Dict:
-    with open(file_path, "r") as f:
-        return json.load(f)
+    if os.path.exists(file_path) or get_storage_backend() == "json":
+        with open(file_path, "r") as f:
+            return json.load(f)
+
+    # Not on disk: look the document up by name in the SQLite store
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    data = get_store().load(name)
+    if data is None:
+        raise FileNotFoundError(f"'{file_path}' not found on disk nor in the store ({get_store().db_path})")
+    return data
+
+
+def expand_paths(patterns: List[str]) -> List[str]:
+    """Expand globs, directories (every file inside) and manifests (`@list.txt`, one path per line)."""
+    paths = []
+    for pattern in patterns:
+        if pattern.startswith("@"):
+            with open(pattern[1:], "r") as f:
+                paths.extend(line.strip() for line in f if line.strip())
+        elif os.path.isdir(pattern):
+            paths.extend(sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                                if os.path.isfile(os.path.join(pattern, name))))
+        else:
+            paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    return paths
 
 
 def load_file_from_txt(file_path: str) -> str:
@@ -20,13 +47,14 @@ def load_file_from_txt(file_path: str) -> str:
         return file.read()
 
 
+@profile_stage()
 def save_to_json(
     data: Dict,
     output_folder: str,
     file_type: str = "Tailored Resume",
-) -> None:
+) -> str:
     """
-    Save data to a JSON file.
+    Save data to a JSON file and / or the SQLite store, depending on `STORAGE_BACKEND`.
 
     Parameters
     ----------
@@ -39,8 +67,8 @@ def save_to_json(
 
     Returns
     -------
-    None
-        This function doesn't return anything.
+    str
+        The path of the JSON file, or the document name in the store when only the SQLite backend is used.
 
     """
     time_now = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -53,11 +81,22 @@ def save_to_json(
     elif file_type == "Tailored Resume":
         filename = f"{time_now}_{data['contact_info']['name'].replace(' ', '_')}_{data['company_applying'].replace(' ', '_')}_tailored_resume.json"
 
+    backend = get_storage_backend()
     full_path = os.path.join(output_folder, filename)
 
+    if backend in ("sqlite", "both"):
+        name = os.path.splitext(filename)[0]
+        store = get_store()
+        store.save(name, data, file_type)
+        rprint(f"'{file_type}' stored as:\n   -> [bold green]{name}[/bold green] ({store.db_path})")
+        if backend == "sqlite":
+            return name
+
     os.makedirs(output_folder, exist_ok=True)  # Ensure the output directory exists
 
     with open(full_path, "w") as f:
         json.dump(data, f)
 
     rprint(f"'{file_type} JSON' saved to:\n   -> [bold green]{full_path}[/bold green]")
+
+    return full_path
@@ -0,0 +1,213 @@
+import io
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+DEFAULT_STATE_PATH: str = "data/batches/state.json"
+BATCH_ENDPOINT: str = "/v1/chat/completions"
+
+# The Batch API accepts up to 50,000 requests per input file
+MAX_REQUESTS_PER_BATCH: int = 50_000
+
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+# ---------------------- #
+# --- Batch Requests --- #
+# ---------------------- #
+
+
+@dataclass
+class BatchRequest:
+    """A single chat completion of a batch, identified by a `custom_id` stable across runs."""
+
+    custom_id: str
+    body: Dict[str, Any]
+
+    def to_line(self) -> str:
+        return json.dumps({"custom_id": self.custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": self.body})
+
+
+def write_batch_file(requests: Iterable[BatchRequest]) -> bytes:
+    """Serialize requests to the Batch API input format (one JSON request per line)."""
+    return "".join(f"{request.to_line()}\n" for request in requests).encode("utf-8")
+
+
+# -------------------- #
+# --- Batch Runner --- #
+# -------------------- #
+
+
+class BatchRunner:
+    """
+    Submit chat completions through the Batch API, poll for completion and map the outputs back.
+
+    Every submitted batch and every received output is recorded in a JSON state file, so an interrupted run
+    resumes polling its in-flight batches instead of submitting them again, and a re-run only resubmits the
+    requests that failed, expired or were rejected by the caller (see `reject`).
+
+    Parameters
+    ----------
+    client : OpenAI
+        The OpenAI client; point its `base_url` to a local stand-in server for testing.
+    state_path : str, optional
+        The state file, by default "data/batches/state.json".
+    completion_window : str, optional
+        The Batch API completion window, by default "24h".
+    poll_interval : float, optional
+        Seconds between two status checks, by default 30.
+
+    Examples
+    --------
+    >>> runner = BatchRunner(OpenAI(), state_path="data/batches/jobs.json")
+    >>> outputs = runner.run([BatchRequest("job:1", {"model": "gpt-4o-mini", "messages": [...]})])
+    >>> outputs["job:1"]
+    '{"Summary": ...}'
+
+    """
+
+    def __init__(
+            self,
+            client: Any,
+            state_path: str = DEFAULT_STATE_PATH,
+            completion_window: str = "24h",
+            poll_interval: float = 30.0,
+    ):
+        self.client = client
+        self.state_path = state_path
+        self.completion_window = completion_window
+        self.poll_interval = poll_interval
+        self.state = self._load_state()
+
+    # --- State --- #
+
+    def _load_state(self) -> Dict[str, Dict]:
+        state = {"batches": {}, "outputs": {}, "errors": {}, "saved": {}}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r") as f:
+                state.update(json.load(f))
+        return state
+
+    def _save_state(self) -> None:
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def reject(self, custom_id: str, error: str) -> None:
+        """Drop an output that failed validation, so the next run submits its request again."""
+        self.state["outputs"].pop(custom_id, None)
+        self.state["errors"][custom_id] = error
+        self._save_state()
+
+    def mark_saved(self, key: str, location: str) -> None:
+        """Record that the validated result of `key` was saved, so a re-run doesn't save it again."""
+        self.state["saved"][key] = location
+        self._save_state()
+
+    # --- Batch API --- #
+
+    def submit(self, requests: List[BatchRequest], description: Optional[str] = None) -> str:
+        """Upload the batch input file and create the batch, returning its id."""
+        input_file = self.client.files.create(
+            file=("batch_input.jsonl", io.BytesIO(write_batch_file(requests))),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+            metadata={"description": description} if description else None,
+        )
+        self.state["batches"][batch.id] = {"status": batch.status, "custom_ids": [r.custom_id for r in requests]}
+        self._save_state()
+        logger.info(f"Submitted batch '{batch.id}' ({len(requests)} requests)")
+
+        return batch.id
+
+    def wait(self, batch_id: str) -> Any:
+        """Poll the batch until it reaches a terminal status."""
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            counts = batch.request_counts
+            if counts:
+                logger.info(f"Batch '{batch_id}': {batch.status} "
+                            f"({counts.completed}/{counts.total} completed, {counts.failed} failed)")
+            if batch.status in TERMINAL_STATUSES:
+                return batch
+            time.sleep(self.poll_interval)
+
+    def _read_file(self, file_id: Optional[str]) -> List[Dict]:
+        if not file_id:
+            return []
+        content = self.client.files.content(file_id).text
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    def collect(self, batch: Any) -> None:
+        """Record the outputs and errors of a finished batch (expired batches still return partial outputs)."""
+        custom_ids = self.state["batches"][batch.id]["custom_ids"]
+
+        for line in self._read_file(batch.output_file_id) + self._read_file(batch.error_file_id):
+            custom_id = line["custom_id"]
+            response = line.get("response") or {}
+            if response.get("status_code") == 200 and not line.get("error"):
+                self.state["outputs"][custom_id] = response["body"]["choices"][0]["message"]["content"]
+                self.state["errors"].pop(custom_id, None)
+            else:
+                error = line.get("error") or response.get("body", {}).get("error") or response
+                self.state["errors"][custom_id] = json.dumps(error)
+
+        for custom_id in custom_ids:
+            if custom_id not in self.state["outputs"] and custom_id not in self.state["errors"]:
+                self.state["errors"][custom_id] = f"Not processed (batch {batch.status})"
+
+        self.state["batches"][batch.id]["status"] = batch.status
+        self._save_state()
+
+    # --- Run --- #
+
+    def run(self, requests: List[BatchRequest], description: Optional[str] = None) -> Dict[str, str]:
+        """
+        Get the outputs of the given requests, reusing those of previous runs.
+
+        Returns
+        -------
+        Dict[str, str]
+            The message content of each successful request, by `custom_id` (shared by duplicate requests).
+            Failed requests are left out and listed in `state["errors"]`; running again resubmits them.
+
+        """
+        # Resume the batches of an interrupted run first
+        in_flight = [batch_id for batch_id, batch in self.state["batches"].items()
+                     if batch["status"] not in TERMINAL_STATUSES]
+        for batch_id in in_flight:
+            logger.info(f"Resuming batch '{batch_id}'")
+            self.collect(self.wait(batch_id))
+
+        # Identical requests (same content, same `custom_id`) are submitted once and share their output,
+        # the Batch API rejects an input file with duplicate `custom_id`s
+        unique = list({request.custom_id: request for request in requests}.values())
+        pending = [request for request in unique if request.custom_id not in self.state["outputs"]]
+        logger.info(f"{len(unique) - len(pending)} outputs reused from previous runs, {len(pending)} to submit"
+                    + (f" ({len(requests) - len(unique)} duplicate requests)" if len(unique) < len(requests) else ""))
+
+        batch_ids = [self.submit(pending[i:i + MAX_REQUESTS_PER_BATCH], description=description)
+                     for i in range(0, len(pending), MAX_REQUESTS_PER_BATCH)]
+        for batch_id in batch_ids:
+            self.collect(self.wait(batch_id))
+
+        failed = [request.custom_id for request in unique if request.custom_id not in self.state["outputs"]]
+        if failed:
+            logger.warning(f"{len(failed)} requests failed, run again to resubmit them:\n   {failed[:10]}")
+
+        return {request.custom_id: self.state["outputs"][request.custom_id]
+                for request in requests if request.custom_id in self.state["outputs"]}
@@ -0,0 +1,314 @@
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from functools import partial
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Type
+
+import httpx
+from loguru import logger
+from openai import APIError, LengthFinishReasonError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from rich import print as rprint
+from rich.table import Table
+
+from src.service.deadline import current_deadline, timeout_kwargs
+from src.service.json_repair import JSONRepairError, repair_json
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+# Cheapest first, e.g. "ollama:llama3.1:latest,groq:llama-3.1-70b-versatile,openai:gpt-4o-mini-2024-07-18"
+DEFAULT_CASCADE_TIERS: str = "groq:llama-3.1-8b-instant,openai:gpt-4o-mini-2024-07-18"
+
+# USD per million input / output tokens, e.g. "gpt-4o-mini-2024-07-18=0.15/0.60", used to report savings
+DEFAULT_CASCADE_PRICES: str = "llama-3.1-8b-instant=0.05/0.08,gpt-4o-mini-2024-07-18=0.15/0.60"
+
+_CHATTY_RE = re.compile(r"^\s*(sure|certainly|of course|here is|here are|here's|as an ai)\b", re.IGNORECASE)
+_REFUSAL_RE = re.compile(r"\b(i'?m sorry|i cannot|i can'?t help|i am unable)\b", re.IGNORECASE)
+
+# Providers whose `beta.chat.completions.parse` supports JSON schemas, the others get JSON mode and the schema
+_SCHEMA_CLIENTS = ("openai", "ollama")
+
+
+def _with_deadline(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """The call's kwargs, with the timeout refreshed from the remaining budget if a deadline is running."""
+    return {**kwargs, **timeout_kwargs()} if current_deadline() is not None else kwargs
+
+
+@dataclass
+class Tier:
+    client_type: str
+    model: str
+    client: Any
+    input_price: float = 0.0  # USD per million tokens
+    output_price: float = 0.0
+
+
+def parse_tiers(spec: str) -> List[tuple]:
+    """"client_type:model,..." -> [(client_type, model), ...] (models may contain colons, e.g. Ollama tags)."""
+    tiers = []
+    for entry in filter(None, (entry.strip() for entry in spec.split(","))):
+        client_type, _, model = entry.partition(":")
+        tiers.append((client_type, model))
+    return tiers
+
+
+def parse_prices(spec: str) -> Dict[str, tuple]:
+    """"model=input/output,..." -> {model: (input, output)}, in USD per million tokens."""
+    prices = {}
+    for entry in filter(None, (entry.strip() for entry in spec.split(","))):
+        model, _, price = entry.rpartition("=")
+        input_price, _, output_price = price.partition("/")
+        prices[model] = (float(input_price), float(output_price or input_price))
+    return prices
+
+
+# ----------------------- #
+# --- Quality Checks --- #
+# ----------------------- #
+
+
+def quality_issue(content: Optional[str], finish_reason: Optional[str] = None) -> Optional[str]:
+    """Cheap heuristics flagging a raw completion as low quality, returning the reason (None if it looks fine)."""
+    if finish_reason == "length":
+        return "truncated"
+    if not content or not content.strip():
+        return "empty"
+    if _REFUSAL_RE.search(content[:200]):
+        return "refusal"
+    if _CHATTY_RE.match(content):
+        return "chatty preamble"
+    return None
+
+
+def parsed_quality_issue(parsed: Any) -> Optional[str]:
+    """Flag a validated model whose fields are mostly empty (e.g. a job description with no skills at all)."""
+    if not isinstance(parsed, BaseModel):
+        return None
+    values = list(parsed.model_dump().values())
+    empty = sum(1 for value in values if value in ("", None, [], {}))
+    if values and empty > len(values) / 2:
+        return f"{empty}/{len(values)} empty fields"
+    return None
+
+
+def validate_output(schema: Any, content: str) -> Any:
+    """Validate a raw completion against `schema`, allowing local JSON repair (no re-ask)."""
+    value = TypeAdapter(schema).validate_python(repair_json(content))
+    return value
+
+
+def validation_kwargs(client_type: str, schema: Any) -> Dict[str, Any]:
+    """
+    Extra `chat.completions.create` arguments letting the cascade escalate outputs that don't validate.
+
+    Examples
+    --------
+    >>> response = client.chat.completions.create(..., **validation_kwargs(client_type, List[ExperienceItem]))
+
+    """
+    if client_type != "cascade":
+        return {}
+    return {"validate": partial(validate_output, schema)}
+
+
+# --------------------- #
+# --- Model Cascade --- #
+# --------------------- #
+
+
+class ModelCascade:
+    """
+    OpenAI-compatible client sending each call to the cheapest tier first, escalating to the next one only
+    when the output fails validation (`validate` argument or `parse` response model) or cheap quality
+    heuristics (truncated, empty, refusal, chatty preamble, mostly empty fields).
+
+    The last tier's output is always accepted. Per-tier hit rates, token usage and the savings compared to
+    sending every call to the last tier are reported by `print_report`.
+
+    Parameters
+    ----------
+    tiers : List[Tier]
+        The tiers, cheapest first.
+
+    Examples
+    --------
+    >>> client = get_client("cascade", stage="job")
+    >>> response = client.chat.completions.create(model=model, messages=messages, validate=validate)
+    >>> client.print_report()
+
+    """
+
+    FIELDS = ("calls", "accepted", "invalid", "low_quality", "errors", "prompt_tokens", "completion_tokens")
+
+    def __init__(self, tiers: List[Tier]):
+        if not tiers:
+            raise ValueError("A model cascade needs at least one tier")
+        self.tiers = tiers
+        self._lock = threading.Lock()
+        self._stats = {tier.model: dict.fromkeys(self.FIELDS, 0) for tier in tiers}
+        self._baseline_cost = 0.0  # cost of the accepted outputs' tokens at the last tier's prices
+
+        # OpenAI client surface used by the scripts
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create_chat_completion))
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(parse=self.parse_chat_completion)))
+
+    @classmethod
+    def from_env(cls, stage: Optional[str] = None) -> "ModelCascade":
+        """Tiers from `CASCADE_TIERS` and prices from `CASCADE_PRICES`, one client per tier."""
+        from src.service.client import get_client  # the cascade is itself built by `get_client`
+
+        # The tiers aren't coalesced themselves, the cascade as a whole is
+        prices = parse_prices(os.environ.get("CASCADE_PRICES") or DEFAULT_CASCADE_PRICES)
+        tiers = [
+            Tier(client_type, model, get_client(client_type, stage=stage, coalesce=False),
+                 *prices.get(model, (0.0, 0.0)))
+            for client_type, model in parse_tiers(os.environ.get("CASCADE_TIERS") or DEFAULT_CASCADE_TIERS)
+        ]
+        return cls(tiers)
+
+    # --- Accounting --- #
+
+    def _record(self, tier: Tier, response: Any, outcome: Optional[str]) -> None:
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        with self._lock:
+            stats = self._stats[tier.model]
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            if outcome:
+                stats[outcome] += 1
+            if outcome == "accepted":
+                top = self.tiers[-1]
+                self._baseline_cost += (prompt_tokens * top.input_price + completion_tokens * top.output_price) / 1e6
+
+    def _run(self, call: Callable[[Tier], Any], check: Callable[[Any], Optional[str]]) -> Any:
+        for index, tier in enumerate(self.tiers):
+            last = index == len(self.tiers) - 1
+            try:
+                response = call(tier)
+            except (ValidationError, JSONRepairError, LengthFinishReasonError) as e:
+                self._record(tier, None, "invalid")
+                if last:
+                    raise
+                logger.info(f"Escalating from '{tier.model}' (invalid output):\n   {e}")
+                continue
+            except (APIError, httpx.HTTPError) as e:  # httpx: the native Ollama backend
+                self._record(tier, None, "errors")
+                if last:
+                    raise
+                logger.warning(f"Escalating from '{tier.model}' (API error):\n   {e}")
+                continue
+
+            try:
+                issue = check(response)
+            except (ValidationError, JSONRepairError, ValueError) as e:
+                self._record(tier, response, "accepted" if last else "invalid")
+                if last:
+                    return response
+                logger.info(f"Escalating from '{tier.model}' (invalid output):\n   {e}")
+                continue
+
+            if issue and not last:
+                self._record(tier, response, "low_quality")
+                logger.info(f"Escalating from '{tier.model}' (low quality: {issue})")
+                continue
+
+            self._record(tier, response, "accepted")
+            return response
+
+    # --- Chat --- #
+
+    def create_chat_completion(self, validate: Optional[Callable[[str], Any]] = None, **kwargs) -> Any:
+        """`client.chat.completions.create`, `model` is ignored; `validate(content)` raising escalates."""
+        kwargs.pop("model", None)
+
+        def call(tier: Tier) -> Any:
+            return tier.client.chat.completions.create(model=tier.model, **_with_deadline(kwargs))
+
+        def check(response: Any) -> Optional[str]:
+            choice = response.choices[0]
+            issue = quality_issue(choice.message.content, choice.finish_reason)
+            if issue is None and validate is not None:
+                issue = parsed_quality_issue(validate(choice.message.content))
+            return issue
+
+        return self._run(call, check)
+
+    def parse_chat_completion(self, response_format: Type[BaseModel], messages: List[Dict], **kwargs) -> Any:
+        """`client.beta.chat.completions.parse`, escalating when the response model doesn't validate."""
+        kwargs.pop("model", None)
+
+        def call(tier: Tier) -> Any:
+            if tier.client_type in _SCHEMA_CLIENTS:
+                return tier.client.beta.chat.completions.parse(
+                    model=tier.model, messages=messages, response_format=response_format, **_with_deadline(kwargs)
+                )
+            schema = json.dumps(response_format.model_json_schema())
+            response = tier.client.chat.completions.create(
+                model=tier.model,
+                messages=[*messages, {"role": "user", "content": f"Answer with a JSON object following this "
+                                                                 f"JSON schema:\n{schema}"}],
+                response_format={"type": "json_object"},
+                **_with_deadline(kwargs),
+            )
+            message = response.choices[0].message
+            message.parsed = response_format.model_validate(repair_json(message.content))
+            return response
+
+        def check(response: Any) -> Optional[str]:
+            return parsed_quality_issue(response.choices[0].message.parsed)
+
+        return self._run(call, check)
+
+    # --- Report --- #
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per-tier stats, hit rate (accepted / calls) and cost, plus "total" with the savings."""
+        with self._lock:
+            tiers = {model: dict(stats) for model, stats in self._stats.items()}
+            baseline_cost = self._baseline_cost
+
+        for tier in self.tiers:
+            stats = tiers[tier.model]
+            stats["hit_rate"] = stats["accepted"] / stats["calls"] if stats["calls"] else 0.0
+            stats["cost"] = (stats["prompt_tokens"] * tier.input_price
+                             + stats["completion_tokens"] * tier.output_price) / 1e6
+
+        total_cost = sum(stats["cost"] for stats in tiers.values())
+        accepted = sum(stats["accepted"] for stats in tiers.values())
+        tiers["total"] = {
+            "calls": sum(stats["calls"] for stats in tiers.values()),
+            "accepted": accepted,
+            "cost": total_cost,
+            "baseline_cost": baseline_cost,
+            "savings": baseline_cost - total_cost,
+        }
+        return tiers
+
+    def print_report(self) -> None:
+        report = self.report()
+        total = report.pop("total")
+        table = Table("Tier", "Model", "Calls", "Accepted", "Hit rate", "Invalid", "Low quality", "Errors", "Cost")
+        for index, tier in enumerate(self.tiers):
+            stats = report[tier.model]
+            table.add_row(
+                str(index),
+                f"{tier.client_type}:{tier.model}",
+                str(stats["calls"]),
+                str(stats["accepted"]),
+                f"{stats['hit_rate']:.1%}",
+                str(stats["invalid"]),
+                str(stats["low_quality"]),
+                str(stats["errors"]),
+                f"${stats['cost']:.4f}",
+            )
+        rprint(table)
+        rprint(f"Cascade cost: [bold]${total['cost']:.4f}[/bold] vs ${total['baseline_cost']:.4f} with "
+               f"'{self.tiers[-1].model}' only ([bold green]${total['savings']:.4f} saved[/bold green])")
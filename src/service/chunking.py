@@ -0,0 +1,151 @@
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # optional, token counts are then estimated from the text length
+    tiktoken = None
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+# Inputs over this many tokens go through the map-reduce path instead of a single prompt
+DEFAULT_TOKEN_BUDGET: int = int(os.environ.get("INPUT_TOKEN_BUDGET", 6000))
+DEFAULT_CHUNK_OVERLAP: int = 200
+
+# English text averages about 4 characters per token with the GPT tokenizers
+_CHARS_PER_TOKEN: int = 4
+
+
+# --------------------- #
+# --- Token Counter --- #
+# --------------------- #
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: Optional[str]):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except (KeyError, TypeError):
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Count the tokens of a text with the model's tokenizer.
+
+    Without `tiktoken`, the count is estimated from the text length, which is enough to keep prompts within
+    budget since the budget leaves plenty of room below the context window.
+    """
+    if tiktoken is None:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(_get_encoding(model).encode(text, disallowed_special=()))
+
+
+# ---------------- #
+# --- Chunking --- #
+# ---------------- #
+
+
+def chunk_text(
+        text: str,
+        max_tokens: int = DEFAULT_TOKEN_BUDGET,
+        overlap_tokens: int = DEFAULT_CHUNK_OVERLAP,
+        model: Optional[str] = None,
+) -> List[str]:
+    """
+    Split a text into chunks of at most `max_tokens`, on paragraph, then line, then sentence boundaries.
+
+    Consecutive chunks share up to `overlap_tokens` of trailing context, so that an item spanning a boundary
+    is seen whole in at least one chunk (the duplicates are removed when merging, see `merge_results`).
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return [text]
+
+    # Smallest units that still fit the budget
+    units: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        if count_tokens(paragraph, model) <= max_tokens:
+            units.append(paragraph)
+            continue
+        for line in paragraph.split("\n"):
+            if count_tokens(line, model) <= max_tokens:
+                units.append(line)
+                continue
+            for sentence in re.split(r"(?<=[.!?])\s+", line):
+                # A single sentence over budget is cut by characters as a last resort
+                step = max_tokens * _CHARS_PER_TOKEN
+                units.extend(sentence[i:i + step] for i in range(0, len(sentence), step))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for unit in units:
+        unit_tokens = count_tokens(unit, model)
+        if current and current_tokens + unit_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            # Carry the last units over as overlap
+            overlap: List[str] = []
+            overlap_size = 0
+            for previous in reversed(current):
+                previous_tokens = count_tokens(previous, model)
+                if overlap_size + previous_tokens > overlap_tokens or overlap_size + previous_tokens + unit_tokens > max_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += previous_tokens
+            current, current_tokens = overlap, overlap_size
+        current.append(unit)
+        current_tokens += unit_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+
+    return chunks
+
+
+# --------------- #
+# --- Merging --- #
+# --------------- #
+
+
+def _dedup_key(item: Any) -> str:
+    if isinstance(item, str):
+        return re.sub(r"\W+", " ", item.lower()).strip()
+    return json.dumps(item, sort_keys=True, ensure_ascii=False).lower()
+
+
+def merge_lists(lists: List[List[Any]]) -> List[Any]:
+    """Concatenate lists, dropping duplicates (case and punctuation insensitive for strings) in order."""
+    merged, seen = [], set()
+    for items in lists:
+        for item in items:
+            key = _dedup_key(item)
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return merged
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or value == "" or (isinstance(value, str) and value.lower().startswith("no ") and
+                                            value.lower().endswith(" found"))
+
+
+def merge_results(results: List[Any]) -> Any:
+    """
+    Merge the structured extractions of the chunks of a single document.
+
+    Lists are concatenated and deduplicated, dicts are merged key by key, and for scalars the first value
+    actually found (not empty nor "No ... found") wins, falling back to the first chunk's.
+    """
+    if not results:
+        return None
+    if all(isinstance(result, list) for result in results):
+        return merge_lists(results)
+    if all(isinstance(result, dict) for result in results):
+        keys = list(dict.fromkeys(key for result in results for key in result))
+        return {key: merge_results([result[key] for result in results if key in result]) for key in keys}
+    return next((result for result in results if not _is_missing(result)), results[0])
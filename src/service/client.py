@@ -7,6 +7,10 @@ from openai import OpenAI
 from pydantic import Field
 from rich import print as rprint
 
+from src.service.cascade import ModelCascade
+from src.service.coalesce import DEFAULT_COALESCE, CoalescingClient
+from src.service.ollama import OllamaClient
+
 
 def load_env():
     _ = load_dotenv(find_dotenv(), override=True)
@@ -25,7 +29,21 @@ def get_openai_api_key():
 
 def get_client(
     client_type: str = "openai",
+    stage: Optional[str] = None,
+    coalesce: bool = DEFAULT_COALESCE,
 ):
+    """
+    Get an OpenAI-compatible client for the given provider.
+
+    `stage` ("job", "resume", "tailor"...) only matters for Ollama, whose native backend sizes the
+    context window per stage (see `src.service.ollama.OllamaClient`).
+
+    "cascade" chains the providers of `CASCADE_TIERS`, cheapest first, escalating a call to the next tier
+    only when its output is invalid or low quality (see `src.service.cascade.ModelCascade`).
+
+    Unless `coalesce` is False (`LLM_COALESCE=false`), identical concurrent calls share a single provider call
+    (see `src.service.coalesce.CoalescingClient`).
+    """
     if client_type == "openai":
         client = OpenAI()
     elif client_type == "groq":
@@ -39,11 +57,14 @@ def get_client(
             base_url=os.environ.get("OPENROUTER_API_BASE_URL"),
         )
     elif client_type == "ollama":
-        client = OpenAI(
-            api_key=os.environ.get("OLLAMA_API_KEY"),
+        client = OllamaClient(
             base_url=os.environ.get("OLLAMA_API_BASE_URL"),
+            model=os.environ.get("OLLAMA_MODEL_NAME"),
+            stage=stage,
         )
-    return client
+    elif client_type == "cascade":
+        client = ModelCascade.from_env(stage=stage)
+    return CoalescingClient(client, stage=stage) if coalesce else client
 
 
 # ------------------------- #
@@ -290,7 +311,8 @@ class Ollama(LLM):
     """
     A class representing the Ollama Language Model (LLM) integration.
 
-    This class provides an interface to interact with Ollama's LLM using the OpenAI-compatible API.
+    This class provides an interface to interact with Ollama's LLM using the OpenAI-compatible API,
+    or the native API through `src.service.ollama.OllamaClient` (as returned by `get_client("ollama")`).
 
     Parameters
     ----------
@@ -434,7 +456,7 @@ if __name__ == "__main__":
     rprint(f"\n'''\n{response}\n'''\n")
 
     # Test Ollama
-    client = get_client(base_url="http://localhost:11434/v1", api_key="ollama")
+    client = get_client(client_type="ollama")
     llm = Ollama(model_name="llama3.1:latest", client=client)
     response = llm.invoke(prompt)
     print("# -------------- #")
@@ -0,0 +1,228 @@
+import copy
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from functools import partial
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from openai import APITimeoutError
+from pydantic import BaseModel
+from rich import print as rprint
+from rich.table import Table
+
+from src.service.deadline import DeadlineExceeded
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+# Set LLM_COALESCE=false to send every call to the provider, even identical concurrent ones
+DEFAULT_COALESCE: bool = os.environ.get("LLM_COALESCE", "true").lower() == "true"
+
+# Per-caller arguments, not part of what is asked to the model
+_IGNORED_KWARGS = ("timeout",)
+
+# Failures of the shared call due to its own time budget, after which each waiting call retries with its own
+_TIMEOUT_ERRORS = (TimeoutError, APITimeoutError, httpx.TimeoutException)
+
+
+# ------------------------ #
+# --- Helper Functions --- #
+# ------------------------ #
+
+
+def _canonical(value: Any) -> Any:
+    """A JSON-serializable form of a call argument, identical for equivalent arguments."""
+    if inspect.isclass(value) and issubclass(value, BaseModel):  # `response_format` of `parse`
+        return {"model": value.__name__, "schema": value.model_json_schema()}
+    if isinstance(value, partial):  # e.g. the cascade's `validate`
+        return {"partial": _canonical(value.func), "args": [_canonical(arg) for arg in value.args],
+                "keywords": {key: _canonical(arg) for key, arg in value.keywords.items()}}
+    if callable(value) and hasattr(value, "__qualname__"):
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return repr(value)  # typing objects (`List[str]`), enums...
+
+
+def request_key(method: str, kwargs: Dict[str, Any]) -> str:
+    """Canonical key of a call: the method and its arguments (model, messages, sampling, schema...)."""
+    request = {key: _canonical(value) for key, value in kwargs.items() if key not in _IGNORED_KWARGS}
+    payload = json.dumps([method, request], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _without_usage(response: Any) -> Any:
+    """A shallow copy of a shared response without its usage, so its tokens are only accounted for once."""
+    if isinstance(response, BaseModel):
+        return response.model_copy(update={"usage": None})
+    response = copy.copy(response)
+    if hasattr(response, "usage"):
+        response.usage = None
+    return response
+
+
+# -------------------------- #
+# --- Coalescing Metrics --- #
+# -------------------------- #
+
+
+class CoalescingStats:
+    """
+    Thread-safe per-stage calls and coalesced calls (served by an identical call already in flight).
+
+    Examples
+    --------
+    >>> coalescing_stats.report()["total"]["coalescing_rate"]
+    0.25
+
+    """
+
+    FIELDS = ("calls", "coalesced")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+
+    def record(self, stage: str, coalesced: bool) -> None:
+        with self._lock:
+            self._stages[stage]["calls"] += 1
+            self._stages[stage]["coalesced"] += int(coalesced)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage calls and coalescing rate (coalesced / calls), plus a "total" entry."""
+        with self._lock:
+            stages = {stage: dict(stats) for stage, stats in self._stages.items()}
+
+        if stages:
+            stages["total"] = {field: sum(stats[field] for stats in stages.values()) for field in self.FIELDS}
+        for stats in stages.values():
+            stats["coalescing_rate"] = stats["coalesced"] / stats["calls"] if stats["calls"] else 0.0
+        return stages
+
+    def print_report(self) -> None:
+        table = Table("Stage", "Calls", "Coalesced", "Coalescing rate")
+        for stage, stats in self.report().items():
+            table.add_row(stage, str(stats["calls"]), str(stats["coalesced"]), f"{stats['coalescing_rate']:.1%}")
+        rprint(table)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+
+coalescing_stats = CoalescingStats()
+
+
+# ------------------------- #
+# --- Coalescing Client --- #
+# ------------------------- #
+
+
+class CoalescingClient:
+    """
+    OpenAI-compatible client wrapper sharing one provider call between identical concurrent calls.
+
+    The first call with a given canonical key (`request_key`) goes to the provider; calls with the same key
+    arriving while it is in flight wait for it and all receive its result (or its exception) instead of
+    sending the same prompt again. Nothing is kept once the call returns: this is single-flight, not a cache.
+    The waiting calls receive the response without its usage, so token usage isn't counted twice.
+
+    The `timeout` isn't part of the key, so a call only waits within its own timeout (raising
+    `DeadlineExceeded` past it), and if the shared call times out, each waiting call retries on its own with
+    the rest of its timeout rather than failing with the first caller's budget.
+
+    Every other attribute (`max_concurrency`, the cascade's `print_report`...) is the wrapped client's.
+
+    Parameters
+    ----------
+    client : Any
+        The OpenAI-compatible client.
+    stage : str, optional
+        Stage reported in `coalescing_stats`, by default "llm".
+
+    Examples
+    --------
+    >>> client = CoalescingClient(OpenAI(), stage="tailor")
+    >>> response = client.chat.completions.create(model=model, messages=messages)  # same surface
+    >>> coalescing_stats.print_report()
+
+    """
+
+    def __init__(self, client: Any, stage: Optional[str] = None):
+        self.client = client
+        self.stage = stage or "llm"
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+        # OpenAI client surface used by the scripts
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create_chat_completion))
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(parse=self.parse_chat_completion)))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def _single_flight(self, method: str, call: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        if kwargs.get("stream"):  # a stream can't be shared
+            coalescing_stats.record(self.stage, coalesced=False)
+            return call(**kwargs)
+
+        key = request_key(method, kwargs)
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        coalescing_stats.record(self.stage, coalesced=not leader)
+
+        if not leader:
+            return self._wait(future, call, kwargs)
+
+        try:
+            response = call(**kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    @staticmethod
+    def _wait(future: Future, call: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        """Wait for the identical call in flight within this call's own timeout, retrying if it timed out."""
+        timeout = kwargs.get("timeout")
+        start = time.monotonic()
+        try:
+            return _without_usage(future.result(timeout=timeout))
+        except _TIMEOUT_ERRORS:
+            if not future.done():  # still in flight: this call's own timeout is up
+                raise DeadlineExceeded(f"Timed out after {timeout:g}s waiting for an identical call in flight")
+
+        if timeout is None:
+            return call(**kwargs)
+        remaining = timeout - (time.monotonic() - start)
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Timed out after {timeout:g}s waiting for an identical call in flight")
+        return call(**{**kwargs, "timeout": remaining})
+
+    def create_chat_completion(self, **kwargs) -> Any:
+        """`client.chat.completions.create`, coalesced."""
+        return self._single_flight("create", self.client.chat.completions.create, kwargs)
+
+    def parse_chat_completion(self, **kwargs) -> Any:
+        """`client.beta.chat.completions.parse`, coalesced."""
+        return self._single_flight("parse", self.client.beta.chat.completions.parse, kwargs)
@@ -0,0 +1,218 @@
+import asyncio
+import inspect
+import time
+import traceback
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from loguru import logger
+
+# -------------- #
+# --- Stages --- #
+# -------------- #
+
+
+@dataclass
+class Stage:
+    """
+    A pipeline stage: `func(context)` runs once all the stages in `depends_on` are done for the item.
+
+    `context` holds the item's inputs and the output of each completed stage under the stage name. Sync
+    functions run in `executor` (by default a thread pool of `concurrency` workers, pass a process pool for
+    CPU-bound work), async functions on the event loop.
+    """
+
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+    concurrency: int = 1
+    queue_size: Optional[int] = None  # by default twice the concurrency
+    executor: Optional[Executor] = None
+
+
+@dataclass
+class PipelineResult:
+    """The outcome of one item: every stage output, or the first error and the stage that raised it."""
+
+    item_id: Any
+    context: Dict[str, Any]
+    seconds: float
+    error: Optional[str] = None
+    failed_stage: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class _Item:
+    item_id: Any
+    context: Dict[str, Any]
+    start: float
+    done: set = field(default_factory=set)
+    error: Optional[str] = None
+    failed_stage: Optional[str] = None
+
+
+# ---------------- #
+# --- Pipeline --- #
+# ---------------- #
+
+
+class Pipeline:
+    """
+    In-process async DAG executor.
+
+    Each stage has its own workers (`concurrency`) reading from a bounded queue (`queue_size`): a slow stage
+    fills its queue, which blocks the stages feeding it and eventually the intake of new items, so memory
+    stays bounded and every stage runs at the pace of the slowest one. Items flow independently, so many
+    of them are in different stages at the same time, and a failing item only skips its remaining stages.
+
+    Parameters
+    ----------
+    stages : List[Stage]
+        The stages, each depending only on stages listed before it.
+    output_queue_size : int, optional
+        Finished items buffered for the consumer, by default 16.
+
+    Examples
+    --------
+    >>> pipeline = Pipeline([
+    ...     Stage("text", lambda ctx: load_file_from_txt(ctx["path"]), concurrency=4),
+    ...     Stage("job", lambda ctx: parse_job_description(ctx["text"]), depends_on=("text",), concurrency=8),
+    ... ])
+    >>> async for result in pipeline.run({"path": path} for path in paths):
+    ...     print(result.item_id, result.ok)
+
+    """
+
+    def __init__(self, stages: List[Stage], output_queue_size: int = 16):
+        names = set()
+        for stage in stages:
+            missing = set(stage.depends_on) - names
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown or later stages: {sorted(missing)}")
+            names.add(stage.name)
+
+        self.stages = {stage.name: stage for stage in stages}
+        self.output_queue_size = output_queue_size
+        self.downstream: Dict[str, List[str]] = {name: [] for name in self.stages}
+        for stage in stages:
+            for dependency in stage.depends_on:
+                self.downstream[dependency].append(stage.name)
+        self.sources = [stage.name for stage in stages if not stage.depends_on]
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    async def _call(self, stage: Stage, context: Dict[str, Any]) -> Any:
+        if inspect.iscoroutinefunction(stage.func):
+            return await stage.func(dict(context))
+        return await asyncio.get_running_loop().run_in_executor(stage.executor, stage.func, dict(context))
+
+    async def _worker(self, stage: Stage, queues: Dict[str, asyncio.Queue], output: asyncio.Queue) -> None:
+        queue = queues[stage.name]
+        stats = self.stats[stage.name]
+        while True:
+            item: Optional[_Item] = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+
+            if item.error is None:
+                start = time.perf_counter()
+                try:
+                    item.context[stage.name] = await self._call(stage, item.context)
+                    stats["processed"] += 1
+                except Exception as e:
+                    item.error = f"{type(e).__name__}: {e}"
+                    item.failed_stage = stage.name
+                    stats["failed"] += 1
+                    logger.error(f"Stage '{stage.name}' failed for item '{item.item_id}':\n   {e}")
+                    logger.debug(traceback.format_exc())
+                stats["busy_seconds"] += time.perf_counter() - start
+
+            item.done.add(stage.name)
+            await self._forward(item, stage.name, queues, output)
+            queue.task_done()
+
+    async def _forward(self, item: _Item, finished: str, queues: Dict[str, asyncio.Queue],
+                       output: asyncio.Queue) -> None:
+        """Send the item to the downstream stages it is now ready for, or to the output once all are done."""
+        if len(item.done) == len(self.stages):
+            await output.put(PipelineResult(item.item_id, item.context, time.perf_counter() - item.start,
+                                            item.error, item.failed_stage))
+            return
+        for name in self.downstream[finished]:
+            if all(dependency in item.done for dependency in self.stages[name].depends_on):
+                await queues[name].put(item)
+
+    async def _feed(self, items: Union[Iterable, AsyncIterable], queues: Dict[str, asyncio.Queue],
+                    output: asyncio.Queue) -> int:
+        count = 0
+
+        async def admit(item_id: Any, inputs: Dict[str, Any]) -> None:
+            item = _Item(item_id=item_id, context=dict(inputs), start=time.perf_counter())
+            for name in self.sources:
+                await queues[name].put(item)
+
+        if isinstance(items, AsyncIterable):
+            async for inputs in items:
+                await admit(inputs.get("id", count), inputs)
+                count += 1
+        else:
+            for inputs in items:
+                await admit(inputs.get("id", count), inputs)
+                count += 1
+        return count
+
+    async def run(self, items: Union[Iterable[Dict], AsyncIterable[Dict]]) -> AsyncIterator[PipelineResult]:
+        """
+        Run the items (dicts of inputs, optionally with an "id") through the DAG.
+
+        Yields
+        ------
+        PipelineResult
+            The result of each item, in completion order.
+
+        """
+        self.stats = {name: {"processed": 0, "failed": 0, "busy_seconds": 0.0} for name in self.stages}
+        queues = {name: asyncio.Queue(maxsize=stage.queue_size or 2 * stage.concurrency)
+                  for name, stage in self.stages.items()}
+        output: asyncio.Queue = asyncio.Queue(maxsize=self.output_queue_size)
+
+        own_executors = []
+        for stage in self.stages.values():
+            if stage.executor is None and not inspect.iscoroutinefunction(stage.func):
+                stage.executor = ThreadPoolExecutor(max_workers=stage.concurrency, thread_name_prefix=stage.name)
+                own_executors.append(stage)
+
+        workers = [asyncio.create_task(self._worker(stage, queues, output))
+                   for stage in self.stages.values() for _ in range(stage.concurrency)]
+        feeder = asyncio.create_task(self._feed(items, queues, output))
+
+        start = time.perf_counter()
+        received = 0
+        try:
+            while not (feeder.done() and received == feeder.result()):
+                getter = asyncio.ensure_future(output.get())
+                await asyncio.wait({getter, feeder}, return_when=asyncio.FIRST_COMPLETED)
+                if feeder.done() and feeder.exception():
+                    getter.cancel()
+                    raise feeder.exception()
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                received += 1
+                yield getter.result()
+        finally:
+            for task in [feeder, *workers]:
+                task.cancel()
+            await asyncio.gather(feeder, *workers, return_exceptions=True)
+            for stage in own_executors:
+                stage.executor.shutdown(wait=False, cancel_futures=True)
+                stage.executor = None
+
+        seconds = time.perf_counter() - start
+        logger.info(f"Pipeline processed {received} items in {seconds:.1f}s "
+                    f"({received / seconds if seconds else 0.0:.2f} items/s)")
@@ -0,0 +1,159 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import Executor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+# Timeout of a single LLM call, also the cap of the per-call timeouts derived from a deadline
+DEFAULT_CALL_TIMEOUT: float = float(os.environ.get("LLM_CALL_TIMEOUT", 120))
+
+_current: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+# ---------------- #
+# --- Deadline --- #
+# ---------------- #
+
+
+class Deadline:
+    """
+    Time budget of a run, made current with `with deadline:` and read by every stage and LLM call under it.
+
+    LLM calls take their timeout from the remaining budget (`timeout_kwargs`), so a hung provider can't hold a
+    run past its deadline; concurrent calls still pending at the deadline are cancelled (`map_until_deadline`),
+    and the stages that couldn't complete are recorded (`mark_incomplete`) so the partial result says so.
+
+    Parameters
+    ----------
+    seconds : float
+        The budget, from now.
+    max_call_timeout : float, optional
+        Cap of each call's timeout, by default `LLM_CALL_TIMEOUT` (120s).
+
+    Examples
+    --------
+    >>> with Deadline(30):
+    ...     tailored = tailor_resume(resume, job_description)
+    >>> tailored["incomplete_sections"]
+    ['experiences']
+
+    """
+
+    def __init__(self, seconds: float, max_call_timeout: float = DEFAULT_CALL_TIMEOUT):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.max_call_timeout = max_call_timeout
+        self._lock = threading.Lock()
+        self._incomplete: List[str] = []
+        self._local = threading.local()  # the same deadline can be entered by several threads at once
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def call_timeout(self) -> float:
+        """Timeout of the next call: the remaining budget, capped; raises if there is none left."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline of {self.seconds:g}s exceeded")
+        return min(remaining, self.max_call_timeout)
+
+    def mark_incomplete(self, name: str) -> None:
+        with self._lock:
+            if name not in self._incomplete:
+                self._incomplete.append(name)
+                logger.warning(f"Deadline of {self.seconds:g}s exceeded, '{name}' is incomplete.")
+
+    @property
+    def incomplete(self) -> List[str]:
+        with self._lock:
+            return list(self._incomplete)
+
+    def __enter__(self) -> "Deadline":
+        if not hasattr(self._local, "tokens"):
+            self._local.tokens = []
+        self._local.tokens.append(_current.set(self))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _current.reset(self._local.tokens.pop())
+
+
+# ------------------------ #
+# --- Helper Functions --- #
+# ------------------------ #
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def deadline_expired() -> bool:
+    deadline = _current.get()
+    return deadline is not None and deadline.expired
+
+
+def check_deadline() -> None:
+    """Raise `DeadlineExceeded` if the current deadline has passed (before starting a stage)."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.call_timeout()
+
+
+def mark_incomplete(name: str) -> None:
+    """Record that `name` (e.g. a section) couldn't be completed within the current deadline."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.mark_incomplete(name)
+
+
+def timeout_kwargs() -> Dict[str, float]:
+    """
+    `chat.completions.create` timeout: the remaining budget of the current deadline, or `LLM_CALL_TIMEOUT`.
+
+    Examples
+    --------
+    >>> response = client.chat.completions.create(..., **timeout_kwargs())
+
+    """
+    deadline = _current.get()
+    return {"timeout": deadline.call_timeout() if deadline is not None else DEFAULT_CALL_TIMEOUT}
+
+
+def propagate(func: Callable) -> Callable:
+    """Run `func` with the caller's current deadline, e.g. in a thread pool (threads don't inherit it)."""
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
+
+
+def map_until_deadline(executor: Executor, func: Callable, items: Iterable, default: Any = None) -> List[Any]:
+    """
+    `executor.map` bounded by the current deadline: the results in order, `default` for the items not done
+    in time, whose calls are cancelled if they haven't started yet.
+    """
+    futures = [executor.submit(propagate(func), item) for item in items]
+    deadline = _current.get()
+    done, not_done = wait(futures, timeout=max(deadline.remaining(), 0) if deadline is not None else None)
+    for future in not_done:
+        future.cancel()
+    return [future.result() if future in done else default for future in futures]
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+DEFAULT_DEDUP_DB_PATH: str = "data/job_descriptions/dedup_index.db"
+DEFAULT_THRESHOLD: float = 0.85
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    id         INTEGER PRIMARY KEY,
+    sha256     TEXT NOT NULL UNIQUE,
+    signature  BLOB NOT NULL,
+    result     TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS buckets (
+    band       INTEGER NOT NULL,
+    bucket     TEXT NOT NULL,
+    posting_id INTEGER NOT NULL REFERENCES postings (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_buckets_band_bucket ON buckets (band, bucket);
+
+CREATE TABLE IF NOT EXISTS stats (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+# ------------------------ #
+# --- Helper Functions --- #
+# ------------------------ #
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so cosmetic edits don't change the shingles."""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def shingles(text: str, k: int = 5) -> Set[str]:
+    """Word k-shingles of the normalized text (character shingles for very short texts)."""
+    words = normalize_text(text).split(" ")
+    if len(words) >= k:
+        return {" ".join(words[i: i + k]) for i in range(len(words) - k + 1)}
+
+    text = " ".join(words)
+    return {text[i: i + k] for i in range(max(len(text) - k + 1, 1))}
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+@dataclass
+class DuplicateMatch:
+    result: Dict
+    similarity: float
+    exact: bool
+
+
+# -------------------------- #
+# --- Near-Duplicate LSH --- #
+# -------------------------- #
+
+
+class NearDuplicateIndex:
+    """
+    Persistent MinHash / LSH index of raw job descriptions and their structured results.
+
+    Postings are reduced to MinHash signatures over word shingles and bucketed into LSH bands, so a
+    lookup only compares the new posting against the few candidates sharing a band. Candidates whose
+    estimated Jaccard similarity reaches `threshold` are considered duplicates and their structured
+    result is returned instead of calling the LLM again. The index lives in SQLite and is updated
+    incrementally with every new posting.
+
+    Parameters
+    ----------
+    db_path : str, optional
+        Path to the SQLite index, by default `DEDUP_DB_PATH` or "data/job_descriptions/dedup_index.db".
+    threshold : float, optional
+        Minimum estimated Jaccard similarity to count as a duplicate, by default `DEDUP_THRESHOLD` or 0.85.
+    num_perm : int, optional
+        Number of MinHash permutations, by default 128.
+    bands : int, optional
+        Number of LSH bands, `num_perm` must be divisible by it, by default 16 (i.e. 8 rows per band).
+
+    """
+
+    def __init__(
+            self,
+            db_path: Optional[str] = None,
+            threshold: Optional[float] = None,
+            num_perm: int = 128,
+            bands: int = 16,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+
+        self.db_path = db_path or os.environ.get("DEDUP_DB_PATH", DEFAULT_DEDUP_DB_PATH)
+        self.threshold = threshold if threshold is not None else float(
+            os.environ.get("DEDUP_THRESHOLD", DEFAULT_THRESHOLD))
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # Fixed seed: signatures must stay comparable across runs
+        rng = random.Random(42)
+        self._permutations = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1)) for _ in range(num_perm)
+        ]
+        self._local = threading.local()
+
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # --- MinHash --- #
+
+    def signature(self, text: str) -> List[int]:
+        hashes = [_hash64(shingle) for shingle in shingles(text)]
+        return [
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self._permutations
+        ]
+
+    def _band_keys(self, signature: List[int]) -> List[str]:
+        return [
+            hashlib.blake2b(
+                array("Q", signature[band * self.rows: (band + 1) * self.rows]).tobytes(), digest_size=8
+            ).hexdigest()
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def similarity(signature_a: List[int], signature_b: List[int]) -> float:
+        return sum(a == b for a, b in zip(signature_a, signature_b)) / len(signature_a)
+
+    # --- Lookups --- #
+
+    def _increment(self, conn: sqlite3.Connection, key: str) -> None:
+        conn.execute(
+            "INSERT INTO stats (key, value) VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET value = value + 1",
+            (key,),
+        )
+
+    def query(self, text: str) -> Optional[DuplicateMatch]:
+        """
+        Return the structured result of the most similar indexed posting above the threshold, if any.
+
+        Every call is counted in the persistent statistics (`exact_hits`, `near_hits` or `misses`).
+
+        """
+        conn = self._connection()
+        sha256 = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+        row = conn.execute("SELECT result FROM postings WHERE sha256 = ?", (sha256,)).fetchone()
+        if row:
+            self._increment(conn, "exact_hits")
+            return DuplicateMatch(result=json.loads(row[0]), similarity=1.0, exact=True)
+
+        signature = self.signature(text)
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(
+                posting_id for (posting_id,) in conn.execute(
+                    "SELECT posting_id FROM buckets WHERE band = ? AND bucket = ?", (band, key)
+                )
+            )
+
+        best: Optional[DuplicateMatch] = None
+        for posting_id in candidates:
+            blob, result = conn.execute(
+                "SELECT signature, result FROM postings WHERE id = ?", (posting_id,)
+            ).fetchone()
+            similarity = self.similarity(signature, array("Q", blob).tolist())
+            if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                best = DuplicateMatch(result=json.loads(result), similarity=similarity, exact=False)
+
+        self._increment(conn, "near_hits" if best else "misses")
+        return best
+
+    def add(self, text: str, result: Dict) -> None:
+        """Index a raw posting together with its structured result (no-op if already indexed)."""
+        conn = self._connection()
+        sha256 = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        signature = self.signature(text)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO postings (sha256, signature, result, created_at) VALUES (?, ?, ?, ?)",
+                (sha256, array("Q", signature).tobytes(), json.dumps(result),
+                 datetime.now().isoformat(timespec="seconds")),
+            )
+            if cursor.rowcount:
+                conn.executemany(
+                    "INSERT INTO buckets (band, bucket, posting_id) VALUES (?, ?, ?)",
+                    [(band, key, cursor.lastrowid) for band, key in enumerate(self._band_keys(signature))],
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- Reporting --- #
+
+    def stats(self) -> Dict[str, float]:
+        conn = self._connection()
+        counters = dict(conn.execute("SELECT key, value FROM stats").fetchall())
+        exact_hits = counters.get("exact_hits", 0)
+        near_hits = counters.get("near_hits", 0)
+        lookups = exact_hits + near_hits + counters.get("misses", 0)
+        return dict(
+            postings=conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0],
+            lookups=lookups,
+            exact_hits=exact_hits,
+            near_hits=near_hits,
+            dedup_rate=(exact_hits + near_hits) / lookups if lookups else 0.0,
+        )
+
+
+_default_index: Optional[NearDuplicateIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_dedup_index() -> NearDuplicateIndex:
+    """Return the process-wide index for the configured `DEDUP_DB_PATH`."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = NearDuplicateIndex()
+    return _default_index
@@ -0,0 +1,332 @@
+import json
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import TypeAdapter, ValidationError
+
+from src.service.deadline import timeout_kwargs
+from src.service.usage import usage_tracker
+
+# ------------------- #
+# --- JSON Repair --- #
+# ------------------- #
+
+_CODE_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+class JSONRepairError(ValueError):
+    pass
+
+
+def _strip_code_fences(text: str) -> str:
+    match = _CODE_FENCE.search(text)
+    if match:
+        text = match.group(1)
+
+    # Drop any chatter before the first JSON value
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    return text[min(starts):].strip() if starts else text.strip()
+
+
+def _normalize_tokens(text: str) -> str:
+    """Rewrite single-quoted strings to double-quoted ones and Python literals to JSON literals."""
+    out: List[str] = []
+    quote: Optional[str] = None
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == "\\" and i + 1 < len(text):
+                # \' is not a valid JSON escape
+                out.append("'" if text[i + 1] == "'" else text[i: i + 2])
+                i += 2
+                continue
+            if char == quote:
+                out.append('"')
+                quote = None
+            elif char == '"':
+                out.append('\\"')
+            else:
+                out.append(char)
+        elif char in "\"'":
+            out.append('"')
+            quote = char
+        else:
+            literal = next((lit for lit in _PYTHON_LITERALS if text.startswith(lit, i)), None)
+            if literal and not (i and text[i - 1].isalnum()):
+                out.append(_PYTHON_LITERALS[literal])
+                i += len(literal)
+                continue
+            out.append(char)
+        i += 1
+
+    if quote:
+        out.append('"')  # unterminated string, e.g. truncated output
+    return "".join(out)
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Drop the commas right before a closing `}` or `]`, outside of strings."""
+    out: List[str] = []
+    in_string = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if char == "\\":
+                out.append(text[i: i + 2])
+                i += 2
+                continue
+            if char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ",":
+            following = text[i + 1:].lstrip()
+            if following[:1] in ("}", "]"):
+                i += 1
+                continue
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def _close_truncated(text: str) -> List[str]:
+    """
+    Candidate completions of a truncated JSON document, most complete first.
+
+    The first candidate closes every open container as-is, the following ones cut the document back to
+    each previous element boundary (a comma) so that a half-written last element is dropped.
+    """
+    stack: List[str] = []
+    in_string = False
+    boundaries: List[Tuple[int, List[str]]] = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if char == "\\":
+                i += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+        elif char == ",":
+            boundaries.append((i, list(stack)))
+        i += 1
+
+    head = text + ('"' if in_string else "")
+    head = re.sub(r"[,:]\s*$", "", head.rstrip())
+    candidates = [head + "".join(reversed(stack))]
+    for position, open_containers in reversed(boundaries[-20:]):
+        candidates.append(text[:position] + "".join(reversed(open_containers)))
+    return candidates
+
+
+def repair_json(text: str) -> Any:
+    """
+    Parse almost-JSON LLM output.
+
+    Handles markdown code fences and surrounding chatter, single quotes and Python literals,
+    trailing commas and truncated arrays / objects (the incomplete last element is dropped).
+
+    Raises
+    ------
+    JSONRepairError
+        If no repair yields valid JSON.
+
+    """
+    try:  # valid JSON is returned as-is, the repairs below could alter its strings
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    text = _strip_code_fences(text)
+    for candidate in (text, _normalize_tokens(text)):
+        try:
+            return json.loads(_strip_trailing_commas(candidate))
+        except json.JSONDecodeError:
+            pass
+
+    for candidate in _close_truncated(_strip_trailing_commas(_normalize_tokens(text))):
+        try:
+            return json.loads(_strip_trailing_commas(candidate))
+        except json.JSONDecodeError:
+            continue
+
+    raise JSONRepairError(f"Could not repair JSON output:\n{text[:200]}")
+
+
+# ------------------------- #
+# --- Repair Statistics --- #
+# ------------------------- #
+
+
+class RepairStats:
+    """Thread-safe per-section counters of clean parses, local repairs, re-asks and failures."""
+
+    OUTCOMES = ("clean", "repaired", "reasked", "failed")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.OUTCOMES, 0))
+
+    def record(self, section: str, outcome: str) -> None:
+        with self._lock:
+            self._counts[section][outcome] += 1
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            report = {}
+            for section, counts in self._counts.items():
+                total = sum(counts.values())
+                report[section] = dict(
+                    total=total,
+                    **counts,
+                    repair_rate=counts["repaired"] / total if total else 0.0,
+                    reask_rate=counts["reasked"] / total if total else 0.0,
+                )
+            return report
+
+
+repair_stats = RepairStats()
+
+
+# -------------------------- #
+# --- Section Validation --- #
+# -------------------------- #
+
+
+def _broken_items(error: ValidationError) -> Optional[List[int]]:
+    """Indices of the broken list items, if every validation error points inside a list item."""
+    locations = [err["loc"] for err in error.errors()]
+    if not locations or any(not loc or not isinstance(loc[0], int) for loc in locations):
+        return None
+    return sorted({loc[0] for loc in locations})
+
+
+def reask_section(
+        client: Any,
+        model: str,
+        repair_prompt_template: str,
+        section: str,
+        schema: Dict,
+        broken_output: str,
+        error: str,
+        max_tokens: int = 512,
+) -> str:
+    """
+    Ask the model to fix only the broken part of a section, given the validation error and schema.
+
+    Bound to a script's client, model and repair prompt, it is the `reask` of `parse_section`.
+
+    Examples
+    --------
+    >>> reask = partial(reask_section, client, model, section_repair_prompt_template)
+    >>> skills = parse_section(content, Skills, section="skills", reask=partial(reask, "skills"))
+
+    """
+    prompt = repair_prompt_template.format(section=section,
+                                           error=error,
+                                           output=broken_output,
+                                           schema=json.dumps(schema))
+    response = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        temperature=0.0,
+        seed=42,
+        **timeout_kwargs(),
+    )
+    usage_tracker.record(f"{section}_repair", response)
+
+    return response.choices[0].message.content
+
+
+def parse_section(
+        content: str,
+        schema: Any,
+        section: str,
+        reask: Optional[Callable[[Dict, str, str], str]] = None,
+        item_schema: Any = None,
+) -> Any:
+    """
+    Parse and validate an LLM section output, repairing it locally and re-asking only as a last resort.
+
+    Parameters
+    ----------
+    content : str
+        The raw completion content.
+    schema : Any
+        The expected type, e.g. `Skills` or `List[ExperienceItem]`.
+    section : str
+        The section name, used for logging and statistics.
+    reask : Callable[[Dict, str, str], str], optional
+        Called as `reask(json_schema, broken_output, error)` and returning a new raw completion for just
+        the broken part. Without it, a failed repair raises immediately.
+    item_schema : Any, optional
+        The item type when `schema` is a list. When only some items fail validation, only those are
+        re-asked and spliced back in place.
+
+    Returns
+    -------
+    Any
+        The validated section.
+
+    Raises
+    ------
+    JSONRepairError, ValidationError
+        If neither the local repair nor the re-ask produced a valid section.
+
+    """
+    adapter = TypeAdapter(schema)
+
+    try:
+        result = adapter.validate_python(json.loads(content.strip()))
+        repair_stats.record(section, "clean")
+        return result
+    except (json.JSONDecodeError, ValidationError):
+        pass
+
+    data = None
+    try:
+        data = repair_json(content)
+        result = adapter.validate_python(data)
+        logger.info(f"Repaired malformed '{section}' output locally.")
+        repair_stats.record(section, "repaired")
+        return result
+    except (JSONRepairError, ValidationError) as e:
+        error = e
+
+    if reask is None:
+        repair_stats.record(section, "failed")
+        raise error
+
+    logger.warning(f"Re-asking for the broken part of '{section}':\n   {error}")
+    try:
+        broken_indices = _broken_items(error) if isinstance(error, ValidationError) and isinstance(data, list) else None
+        if broken_indices and item_schema is not None:
+            item_adapter = TypeAdapter(item_schema)
+            for index in broken_indices:
+                try:
+                    item_adapter.validate_python(data[index])
+                except ValidationError as e:
+                    data[index] = repair_json(reask(item_adapter.json_schema(), json.dumps(data[index]), str(e)))
+            result = adapter.validate_python(data)
+        else:
+            raw = reask(adapter.json_schema(), content, str(error))
+            result = adapter.validate_python(repair_json(raw))
+    except (JSONRepairError, ValidationError):
+        repair_stats.record(section, "failed")
+        raise
+
+    repair_stats.record(section, "reasked")
+    return result
@@ -0,0 +1,278 @@
+import os
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import httpx
+from loguru import logger
+from openai.types.chat import ChatCompletion, ParsedChatCompletion
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_message import ChatCompletionMessage
+from openai.types.chat.parsed_chat_completion import ParsedChatCompletionMessage, ParsedChoice
+from openai.types.completion_usage import CompletionUsage
+from pydantic import BaseModel, TypeAdapter
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+DEFAULT_KEEP_ALIVE: str = "30m"
+
+# Per-stage options: Ollama defaults to a 2048 tokens context, silently truncating long job descriptions and
+# resumes, and tailoring prompts carry both. `OLLAMA_NUM_CTX` overrides the context window of every stage.
+STAGE_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "job": {"num_ctx": 8192},
+    "resume": {"num_ctx": 8192},
+    "tailor": {"num_ctx": 16384},
+}
+
+# Ollama reports these done reasons, mapped to their OpenAI equivalents
+_FINISH_REASONS = {"stop": "stop", "length": "length", "load": "stop", "unload": "stop"}
+
+
+# ---------------------- #
+# --- Ollama Backend --- #
+# ---------------------- #
+
+
+class OllamaClient:
+    """
+    Native Ollama backend exposing the subset of the OpenAI client used by the scripts.
+
+    Requests go to `/api/chat` rather than the OpenAI-compatible shim, so that every call carries the
+    stage's `num_ctx` and `keep_alive` (the model stays loaded between pipeline runs), structured fields
+    use Ollama's JSON `format`, and the number of in-flight requests never exceeds the server's
+    `OLLAMA_NUM_PARALLEL` slots (extra requests would only queue server-side, holding a connection).
+
+    Parameters
+    ----------
+    base_url : str, optional
+        The Ollama server, by default `OLLAMA_API_BASE_URL` or "http://localhost:11434".
+    model : str, optional
+        The model to preload, by default `OLLAMA_MODEL_NAME`.
+    stage : str, optional
+        The pipeline stage ("job", "resume" or "tailor"), selecting the default `num_ctx`.
+    keep_alive : str, optional
+        How long the server keeps the model loaded after a request, by default `OLLAMA_KEEP_ALIVE` or "30m".
+    num_parallel : int, optional
+        Maximum concurrent requests, by default the server's `OLLAMA_NUM_PARALLEL` or 1.
+    preload : bool, optional
+        Load the model in the background at startup, by default `OLLAMA_PRELOAD` or True.
+    timeout : float, optional
+        Default request timeout in seconds, by default 600.
+
+    Examples
+    --------
+    >>> client = OllamaClient(stage="tailor")
+    >>> response = client.chat.completions.create(
+    ...     model="llama3.1:latest",
+    ...     messages=[{"role": "user", "content": "Tell me a joke."}],
+    ...     max_tokens=512,
+    ... )
+    >>> print(response.choices[0].message.content)
+
+    """
+
+    def __init__(
+            self,
+            base_url: Optional[str] = None,
+            model: Optional[str] = None,
+            stage: Optional[str] = None,
+            keep_alive: Optional[str] = None,
+            num_parallel: Optional[int] = None,
+            preload: Optional[bool] = None,
+            timeout: float = 600.0,
+    ):
+        base_url = base_url or os.environ.get("OLLAMA_API_BASE_URL") or "http://localhost:11434"
+        # Accept the OpenAI-compatible URL too, the native API lives at the root
+        self.base_url = base_url.rstrip("/").removesuffix("/v1")
+        self.model = model or os.environ.get("OLLAMA_MODEL_NAME")
+        self.stage = stage
+        self.keep_alive = keep_alive or os.environ.get("OLLAMA_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+        self.max_concurrency = num_parallel or int(os.environ.get("OLLAMA_NUM_PARALLEL", 1))
+
+        self.options: Dict[str, Any] = dict(STAGE_OPTIONS.get(stage, {}))
+        if os.environ.get("OLLAMA_NUM_CTX"):
+            self.options["num_ctx"] = int(os.environ["OLLAMA_NUM_CTX"])
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._http = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=self.max_concurrency),
+        )
+
+        # OpenAI client surface used by the scripts
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create_chat_completion))
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(parse=self.parse_chat_completion)))
+
+        if preload if preload is not None else os.environ.get("OLLAMA_PRELOAD", "true").lower() == "true":
+            threading.Thread(target=self.preload, daemon=True).start()
+
+    # --- Model Lifecycle --- #
+
+    def preload(self, model: Optional[str] = None) -> None:
+        """Load the model into memory, so the first real request doesn't pay the load time."""
+        model = model or self.model
+        if not model:
+            return
+        start = time.perf_counter()
+        try:
+            response = self._http.post("/api/generate", json={"model": model, "keep_alive": self.keep_alive})
+            response.raise_for_status()
+            logger.info(f"Preloaded Ollama model '{model}' in {time.perf_counter() - start:.1f}s "
+                        f"(keep_alive: {self.keep_alive})")
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not preload Ollama model '{model}':\n   {e}")
+
+    # --- Chat --- #
+
+    def _chat(
+            self,
+            model: str,
+            messages: List[Dict[str, str]],
+            max_tokens: Optional[int] = None,
+            temperature: Optional[float] = None,
+            seed: Optional[int] = None,
+            stop: Optional[List[str]] = None,
+            format: Any = None,
+            timeout: Optional[float] = None,
+            extra_body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        options = dict(self.options)
+        for key, value in (("num_predict", max_tokens), ("temperature", temperature), ("seed", seed), ("stop", stop)):
+            if value is not None:
+                options[key] = value
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": options,
+        }
+        if format is not None:
+            payload["format"] = format
+        if extra_body:  # merged into the payload, never modified: callers reuse it across calls
+            extra_body = dict(extra_body)
+            payload["options"].update(extra_body.pop("options", {}))
+            payload.update(extra_body)
+
+        with self._slots:
+            response = self._http.post("/api/chat", json=payload, timeout=timeout or self._http.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _usage(data: Dict[str, Any]) -> CompletionUsage:
+        prompt_tokens = data.get("prompt_eval_count", 0) or 0
+        completion_tokens = data.get("eval_count", 0) or 0
+        return CompletionUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+
+    @staticmethod
+    def _format(response_format: Any) -> Any:
+        """Map an OpenAI `response_format` to Ollama's `format` (JSON mode or a JSON schema)."""
+        if response_format is None:
+            return None
+        if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+            return response_format.model_json_schema()
+        if response_format.get("type") == "json_schema":
+            return response_format["json_schema"]["schema"]
+        if response_format.get("type") == "json_object":
+            return "json"
+        return None
+
+    def create_chat_completion(
+            self,
+            model: str,
+            messages: List[Dict[str, str]],
+            max_tokens: Optional[int] = None,
+            temperature: Optional[float] = None,
+            seed: Optional[int] = None,
+            stop: Optional[List[str]] = None,
+            response_format: Any = None,
+            timeout: Optional[float] = None,
+            extra_body: Optional[Dict[str, Any]] = None,
+            stream: bool = False,
+            **kwargs,
+    ) -> ChatCompletion:
+        """`client.chat.completions.create` equivalent, returning an OpenAI `ChatCompletion`."""
+        if stream:  # callers rely on a whole ChatCompletion, not chunks
+            raise ValueError("stream=True is not supported by the Ollama backend (OllamaClient)")
+
+        data = self._chat(model, messages, max_tokens, temperature, seed, stop,
+                          format=self._format(response_format), timeout=timeout, extra_body=extra_body)
+        return ChatCompletion(
+            id=f"chatcmpl-{uuid.uuid4().hex}",
+            object="chat.completion",
+            created=int(time.time()),
+            model=data.get("model", model),
+            choices=[Choice(
+                index=0,
+                finish_reason=_FINISH_REASONS.get(data.get("done_reason"), "stop"),
+                message=ChatCompletionMessage(role="assistant", content=data["message"]["content"]),
+            )],
+            usage=self._usage(data),
+        )
+
+    def parse_chat_completion(
+            self,
+            model: str,
+            messages: List[Dict[str, str]],
+            response_format: type,
+            max_tokens: Optional[int] = None,
+            temperature: Optional[float] = None,
+            seed: Optional[int] = None,
+            stop: Optional[List[str]] = None,
+            timeout: Optional[float] = None,
+            extra_body: Optional[Dict[str, Any]] = None,
+            **kwargs,
+    ) -> ParsedChatCompletion:
+        """`client.beta.chat.completions.parse` equivalent, constraining the output to the model's schema."""
+        data = self._chat(model, messages, max_tokens, temperature, seed, stop,
+                          format=self._format(response_format), timeout=timeout, extra_body=extra_body)
+        content = data["message"]["content"]
+        return ParsedChatCompletion(
+            id=f"chatcmpl-{uuid.uuid4().hex}",
+            object="chat.completion",
+            created=int(time.time()),
+            model=data.get("model", model),
+            choices=[ParsedChoice(
+                index=0,
+                finish_reason=_FINISH_REASONS.get(data.get("done_reason"), "stop"),
+                message=ParsedChatCompletionMessage(
+                    role="assistant",
+                    content=content,
+                    parsed=response_format.model_validate_json(content),
+                ),
+            )],
+            usage=self._usage(data),
+        )
+
+
+def structured_output_kwargs(client_type: str, schema: Any) -> Dict[str, Any]:
+    """
+    Extra `chat.completions.create` arguments constraining the output of a structured field to its schema.
+
+    Only the native Ollama backend enforces the schema with its JSON `format`, for the other providers the
+    prompt's example output and `src.service.json_repair.parse_section` are enough.
+
+    Examples
+    --------
+    >>> response = client.chat.completions.create(..., **structured_output_kwargs(client_type, List[str]))
+
+    """
+    if client_type != "ollama":
+        return {}
+    return {
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "section", "schema": TypeAdapter(schema).json_schema()},
+        }
+    }
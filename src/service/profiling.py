@@ -0,0 +1,304 @@
+import atexit
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+from rich import print as rprint
+from rich.table import Table
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+# Off by default: set PROFILE to "cprofile" or "sampling" (or pass --profile to the scripts)
+PROFILE_MODES = ("cprofile", "sampling")
+DEFAULT_PROFILE_FOLDER: str = "outputs/profiles"
+DEFAULT_SAMPLE_INTERVAL: float = 0.005
+
+# Maximum depth of the stacks derived from cProfile call graphs
+_MAX_STACK_DEPTH: int = 64
+
+
+# ------------------------ #
+# --- Helper Functions --- #
+# ------------------------ #
+
+
+def _frame_label(filename: str, lineno: int, name: str) -> str:
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def _collapse_pstats(stats: Dict, root: tuple, stage: str, stacks: Counter) -> None:
+    """
+    Approximate the stacks of a cProfile call graph, in the collapsed format of flamegraph.pl and speedscope.
+
+    cProfile only records caller -> callee edges, so the time of a function called from several places is
+    split between its callers in proportion to the time of each edge (as done by flameprof).
+    """
+    children = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            children[caller][func] = edge_cumulative
+
+    def walk(func: tuple, stack: str, weight: float, path: frozenset, depth: int) -> None:
+        _, _, total_time, cumulative_time, _ = stats[func]
+        if cumulative_time <= 0 or weight <= 0:
+            return
+        share = weight / cumulative_time
+        stacks[stack] += total_time * share * 1e6  # self time, in microseconds
+        if depth >= _MAX_STACK_DEPTH:
+            return
+        for child, edge_cumulative in children[func].items():
+            if child not in path and child in stats:
+                walk(child, f"{stack};{_frame_label(*child)}", edge_cumulative * share, path | {child}, depth + 1)
+
+    if root in stats:
+        walk(root, f"{stage};{_frame_label(*root)}", stats[root][3], frozenset([root]), 0)
+
+
+# ---------------------- #
+# --- Stage Profiler --- #
+# ---------------------- #
+
+
+class StageProfiler:
+    """
+    Opt-in per-stage profiling: wall and CPU time, cProfile or sampled stacks, and tracemalloc allocations.
+
+    Disabled, a profiled stage costs one attribute lookup. Enabled, every call of a stage is recorded, and at
+    exit the profiler writes to `output_folder`:
+
+    - `stacks.collapsed`: the stacks of every stage, for flamegraph.pl, speedscope or inferno
+    - `<stage>.prof`: the aggregated cProfile stats of each stage (cProfile mode), for snakeviz or pstats
+    - `summary.json`: the per-stage summary, also printed as a table
+
+    Wall time far above CPU time means the stage waits (on the network, tesseract or the disk).
+
+    Examples
+    --------
+    >>> @profile_stage("parse_job_description")
+    ... def parse_job_description(job_description: str) -> Dict: ...
+    >>> profiler.enable("sampling")  # or PROFILE=sampling in the environment
+
+    """
+
+    def __init__(self):
+        self.mode: Optional[str] = None
+        self.output_folder: Optional[str] = None
+        self.trace_memory: bool = True
+        self.sample_interval: float = DEFAULT_SAMPLE_INTERVAL
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._calls: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {"calls": 0, "wall_time": 0.0, "cpu_time": 0.0, "allocated": 0, "top_allocations": Counter()}
+        )
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._stacks: Counter = Counter()
+        self._active_threads: Dict[int, tuple] = {}  # thread id -> (stage, stage code object)
+        self._sampler: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    def enable(
+            self,
+            mode: str = "cprofile",
+            output_folder: Optional[str] = None,
+            trace_memory: bool = True,
+            sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ) -> None:
+        """Start profiling the stages, the report is written at exit (or by calling `write_report`)."""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+        if self.enabled:
+            return
+
+        self.mode = mode
+        self.output_folder = output_folder or os.path.join(DEFAULT_PROFILE_FOLDER,
+                                                           datetime.now().strftime("%Y%m%d_%H%M%S"))
+        self.trace_memory = trace_memory
+        self.sample_interval = sample_interval
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if mode == "sampling":
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+
+        atexit.register(self.write_report)
+        logger.info(f"Profiling stages ({mode}), report in '{self.output_folder}'")
+
+    # --- Sampling --- #
+
+    def _sample(self) -> None:
+        while self.enabled:
+            frames = sys._current_frames()
+            with self._lock:
+                active = dict(self._active_threads)
+            for thread_id, (stage, code) in active.items():
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code.co_filename, frame.f_code.co_firstlineno,
+                                              frame.f_code.co_name))
+                    if frame.f_code is code:
+                        break
+                    frame = frame.f_back
+                if frame is not None:  # still inside the stage
+                    with self._lock:
+                        self._stacks[";".join([stage, *reversed(stack)])] += self.sample_interval * 1e6
+            time.sleep(self.sample_interval)
+
+    # --- Stages --- #
+
+    def run(self, stage: str, func: Callable, *args, **kwargs) -> Any:
+        """Run a stage, recording its profile (nested stages are timed, not profiled twice)."""
+        nested = getattr(self._local, "active", False)
+        snapshot = tracemalloc.take_snapshot() if self.trace_memory and not nested else None
+
+        profile = None
+        if self.mode == "cprofile" and not nested:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:  # another profiler is active (Python 3.12+ allows only one)
+                profile = None
+        elif self.mode == "sampling" and not nested:
+            with self._lock:
+                self._active_threads[threading.get_ident()] = (stage, func.__code__)
+
+        self._local.active = True
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            wall_time, cpu_time = time.perf_counter() - wall_start, time.thread_time() - cpu_start
+            self._local.active = nested
+            if profile is not None:
+                profile.disable()
+            if self.mode == "sampling" and not nested:
+                with self._lock:
+                    self._active_threads.pop(threading.get_ident(), None)
+            self._record(stage, func, wall_time, cpu_time, profile, snapshot)
+
+    def _record(self, stage: str, func: Callable, wall_time: float, cpu_time: float,
+                profile: Optional[cProfile.Profile], snapshot: Optional[tracemalloc.Snapshot]) -> None:
+        allocations = []
+        if snapshot is not None:
+            allocations = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+
+        with self._lock:
+            calls = self._calls[stage]
+            calls["calls"] += 1
+            calls["wall_time"] += wall_time
+            calls["cpu_time"] += cpu_time
+            for allocation in allocations:
+                calls["allocated"] += allocation.size_diff
+                if allocation.size_diff > 0:
+                    frame = allocation.traceback[0]
+                    calls["top_allocations"][f"{frame.filename}:{frame.lineno}"] += allocation.size_diff
+
+            if profile is not None:
+                stats = pstats.Stats(profile)
+                code = func.__code__
+                root = (code.co_filename, code.co_firstlineno, code.co_name)
+                _collapse_pstats(stats.stats, root, stage, self._stacks)
+                if stage in self._stats:
+                    self._stats[stage].add(stats)
+                else:
+                    self._stats[stage] = stats
+
+    # --- Report --- #
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage calls, wall and CPU time (total and mean), net allocated bytes and top allocation sites."""
+        with self._lock:
+            return {
+                stage: {
+                    "calls": calls["calls"],
+                    "wall_time": calls["wall_time"],
+                    "mean_wall_time": calls["wall_time"] / calls["calls"],
+                    "cpu_time": calls["cpu_time"],
+                    "allocated": calls["allocated"],
+                    "top_allocations": calls["top_allocations"].most_common(5),
+                }
+                for stage, calls in self._calls.items()
+            }
+
+    def print_report(self) -> None:
+        table = Table("Stage", "Calls", "Wall time", "Mean", "CPU time", "Waiting", "Allocated", "Top allocation")
+        for stage, stats in sorted(self.report().items(), key=lambda item: -item[1]["wall_time"]):
+            waiting = 1 - stats["cpu_time"] / stats["wall_time"] if stats["wall_time"] else 0.0
+            top = stats["top_allocations"][0][0] if stats["top_allocations"] else ""
+            table.add_row(
+                stage,
+                str(stats["calls"]),
+                f"{stats['wall_time']:.3f}s",
+                f"{stats['mean_wall_time']:.3f}s",
+                f"{stats['cpu_time']:.3f}s",
+                f"{waiting:.0%}",
+                f"{stats['allocated'] / 1024:.1f} KiB",
+                os.path.relpath(top) if top else "",
+            )
+        rprint(table)
+
+    def write_report(self) -> None:
+        if not self.enabled or not self._calls:
+            return
+        mode, self.mode = self.mode, None  # stops the sampler
+        if self._sampler is not None:
+            self._sampler.join()
+
+        os.makedirs(self.output_folder, exist_ok=True)
+        with self._lock:
+            with open(os.path.join(self.output_folder, "stacks.collapsed"), "w") as f:
+                for stack, microseconds in sorted(self._stacks.items()):
+                    if int(microseconds):
+                        f.write(f"{stack} {int(microseconds)}\n")
+            for stage, stats in self._stats.items():
+                stats.dump_stats(os.path.join(self.output_folder, f"{stage}.prof"))
+
+        report = self.report()
+        with open(os.path.join(self.output_folder, "summary.json"), "w") as f:
+            json.dump({"mode": mode, "stages": report}, f, indent=2)
+
+        self.print_report()
+        rprint(f"Profiles saved to:\n   -> [bold green]{self.output_folder}[/bold green] "
+               f"(flamegraph: stacks.collapsed)")
+
+
+profiler = StageProfiler()
+
+if os.environ.get("PROFILE"):
+    profiler.enable(os.environ["PROFILE"],
+                    output_folder=os.environ.get("PROFILE_OUTPUT") or None,
+                    trace_memory=os.environ.get("PROFILE_MEMORY", "true").lower() == "true")
+
+
+def profile_stage(stage: Optional[str] = None) -> Callable:
+    """Decorator recording a function as a pipeline stage when profiling is enabled (no-op otherwise)."""
+
+    def decorator(func: Callable) -> Callable:
+        name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            return profiler.run(name, func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
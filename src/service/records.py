@@ -0,0 +1,150 @@
+import csv
+import json
+import os
+import sys
+from itertools import islice
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from loguru import logger
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+# Fields holding the posting text in exported records, the first one found wins (case-insensitive)
+DEFAULT_TEXT_FIELDS = ("description", "job_description", "text", "content", "body")
+
+RECORD_FORMATS = ("jsonl", "csv")
+
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))  # postings are long, the default limit is 128 KiB
+
+
+# ------------------------ #
+# --- Helper Functions --- #
+# ------------------------ #
+
+
+def record_format(path: str) -> str:
+    """"jsonl" (".jsonl", ".ndjson") or "csv" (".csv", ".tsv"), from the extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension in (".csv", ".tsv"):
+        return "csv"
+    raise ValueError(f"Unknown record format of '{path}', expected one of {RECORD_FORMATS}")
+
+
+def record_text(record: Any, text_field: Optional[str] = None) -> str:
+    """
+    Raw posting text of an exported record.
+
+    A string record is the text itself. Otherwise the `text_field` (or the first of `DEFAULT_TEXT_FIELDS`
+    found) is used, falling back to every non-empty field as "key: value" lines, so title, company and
+    location columns still reach the extraction.
+    """
+    if isinstance(record, str):
+        return record
+    fields = {key.lower(): key for key in record}
+    for name in (text_field,) if text_field else DEFAULT_TEXT_FIELDS:
+        key = fields.get(name.lower())
+        if key is not None and record[key]:
+            return str(record[key])
+    if text_field:
+        raise KeyError(f"No '{text_field}' field in the record")
+    return "\n".join(f"{key}: {value}" for key, value in record.items() if value not in ("", None))
+
+
+# --------------- #
+# --- Readers --- #
+# --------------- #
+
+
+def read_records(path: str, start: int = 0) -> Iterator[Tuple[int, Any]]:
+    """
+    Stream the records of a JSONL or CSV export, one at a time, with their offset (0-based record index).
+
+    Only the current record is in memory, whatever the size of the file. The first `start` records are
+    skipped, to resume an interrupted run (JSON Lines records are skipped without being parsed).
+
+    Examples
+    --------
+    >>> for offset, record in read_records("exports/postings.jsonl", start=1200):
+    ...     text = record_text(record)
+
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if record_format(path) == "jsonl":
+            lines = (line for line in f if line.strip())
+            for _ in islice(lines, start):
+                pass
+            records = (json.loads(line) for line in lines)
+        else:
+            delimiter = "\t" if path.lower().endswith(".tsv") else ","
+            records = islice(csv.DictReader(f, delimiter=delimiter), start, None)
+
+        yield from enumerate(records, start=start)
+
+
+# --------------- #
+# --- Writers --- #
+# --------------- #
+
+
+class JsonlWriter:
+    """
+    Append-only JSON Lines output with a resume checkpoint.
+
+    Every record is flushed as soon as it is written, so an interrupted run loses nothing already processed.
+    `checkpoint(offset)` records the next input offset to process next to the output (`<path>.offset`),
+    written atomically after the records before it, and `resume_offset` reads it back.
+
+    Parameters
+    ----------
+    path : str
+        The output JSONL, created if needed and appended to otherwise.
+
+    Examples
+    --------
+    >>> with JsonlWriter("outputs/jobs.jsonl") as writer:
+    ...     for offset, record in read_records("exports/postings.csv", start=writer.resume_offset()):
+    ...         writer.write(extract(record))
+    ...         writer.checkpoint(offset + 1)
+
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.checkpoint_path = f"{path}.offset"
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self.written = 0
+
+    def write(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.written += 1
+
+    def checkpoint(self, offset: int) -> None:
+        tmp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"offset": offset}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def resume_offset(self) -> int:
+        """The next input offset to process, 0 if the output has no checkpoint."""
+        if not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path, "r") as f:
+            offset = json.load(f)["offset"]
+        logger.info(f"Resuming after {offset} records ({self.checkpoint_path})")
+        return offset
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
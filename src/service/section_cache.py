@@ -0,0 +1,268 @@
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from src.service.dedup import normalize_text
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+DEFAULT_SECTION_CACHE_DB_PATH: str = "outputs/.section_cache.db"
+
+# Minimum job similarity to reuse each section; sections without a threshold are always regenerated.
+# Skills, certifications and interests barely change between similar roles, the introduction and experiences
+# are more specific to each posting: add e.g. "introduction=0.95,experiences=0.95" to reuse them too.
+DEFAULT_SECTION_THRESHOLDS: str = "skills=0.8,certifications=0.7,interests=0.7"
+
+# Job fields describing the role (the company and location don't change what to highlight)
+JOB_FEATURE_FIELDS = ("Title", "Summary", "Technical_Skills", "Soft_Skills", "Qualifications",
+                      "Responsibilities", "Missions")
+JOB_SKILL_FIELDS = ("Technical_Skills", "Soft_Skills")
+
+_SKILL_PREFIX_RE = re.compile(r"^(proficient|familiar|experienced|experience|knowledge|expertise)\s+(in|with|of)\s+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the to with will you your our we this".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tailorings (
+    id          INTEGER PRIMARY KEY,
+    resume      TEXT NOT NULL,
+    job_sha256  TEXT NOT NULL,
+    terms       TEXT NOT NULL,
+    skills      TEXT NOT NULL,
+    sections    TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    UNIQUE (resume, job_sha256)
+);
+
+CREATE TABLE IF NOT EXISTS stats (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+# ------------------------ #
+# --- Helper Functions --- #
+# ------------------------ #
+
+
+def parse_thresholds(spec: str) -> Dict[str, float]:
+    """"section=threshold,..." -> {section: threshold}."""
+    thresholds = {}
+    for entry in filter(None, (entry.strip() for entry in spec.split(","))):
+        section, _, threshold = entry.partition("=")
+        thresholds[section.strip()] = float(threshold)
+    return thresholds
+
+
+def resume_fingerprint(resume: Dict) -> str:
+    return hashlib.sha256(json.dumps(resume, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _field_values(job_description: Dict, fields: Iterable[str]) -> List[str]:
+    values = []
+    for name in fields:
+        value = job_description.get(name) or []
+        values.extend([value] if isinstance(value, str) else [str(item) for item in value])
+    return values
+
+
+def job_terms(job_description: Dict) -> Counter:
+    """Term counts of the fields describing the role."""
+    words = normalize_text(" ".join(_field_values(job_description, JOB_FEATURE_FIELDS))).split()
+    return Counter(word for word in words if word not in _STOPWORDS and len(word) > 1)
+
+
+def job_skills(job_description: Dict) -> Set[str]:
+    """Normalized skill set ("Proficient in Python" and "python" are the same skill)."""
+    skills = set()
+    for value in _field_values(job_description, JOB_SKILL_FIELDS):
+        for skill in value.split(","):  # the unstructured extraction returns comma separated skills
+            skill = _SKILL_PREFIX_RE.sub("", normalize_text(skill))
+            if skill:
+                skills.add(skill)
+    return skills
+
+
+def _is_empty(value: Any) -> bool:
+    """Empty strings, lists and dicts, including dicts of empty lists (nothing worth reusing)."""
+    if isinstance(value, dict):
+        return all(_is_empty(item) for item in value.values())
+    if isinstance(value, list):
+        return not value or all(_is_empty(item) for item in value)
+    return value in ("", None)
+
+
+@dataclass
+class SectionMatch:
+    sections: Dict[str, Any]
+    similarity: float
+
+
+# --------------------- #
+# --- Section Cache --- #
+# --------------------- #
+
+
+class SectionCache:
+    """
+    Persistent cache of tailored sections, keyed by (resume fingerprint, job feature vector).
+
+    A resume tailored to a job similar to one it was already tailored to reuses the sections whose threshold
+    the similarity reaches, instead of generating them again. The similarity of two jobs is the mean of the
+    TF-IDF cosine similarity of their role descriptions (IDF over the jobs cached for the same resume) and
+    the Jaccard similarity of their skill sets.
+
+    Parameters
+    ----------
+    db_path : str, optional
+        Path to the SQLite cache, by default `SECTION_CACHE_DB_PATH` or "outputs/.section_cache.db".
+    thresholds : Dict[str, float], optional
+        Minimum similarity to reuse each section, by default `SECTION_CACHE_THRESHOLDS`
+        or "skills=0.8,certifications=0.7,interests=0.7".
+
+    Examples
+    --------
+    >>> cache = get_section_cache()
+    >>> match = cache.query(resume, job_description)  # sections to reuse, if any
+    >>> cache.add(resume, job_description, tailored_sections)
+
+    """
+
+    def __init__(self, db_path: Optional[str] = None, thresholds: Optional[Dict[str, float]] = None):
+        self.db_path = db_path or os.environ.get("SECTION_CACHE_DB_PATH", DEFAULT_SECTION_CACHE_DB_PATH)
+        self.thresholds = thresholds if thresholds is not None else parse_thresholds(
+            os.environ.get("SECTION_CACHE_THRESHOLDS", DEFAULT_SECTION_THRESHOLDS))
+        self._local = threading.local()
+
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Similarity --- #
+
+    @staticmethod
+    def _tfidf_cosine(terms: Counter, others: List[Counter]) -> List[float]:
+        """Cosine similarity of `terms` to each of `others`, with a smoothed IDF over all of them."""
+        documents = [terms, *others]
+        document_frequency = Counter(term for document in documents for term in document)
+        idf = {term: math.log((1 + len(documents)) / (1 + count)) + 1 for term, count in document_frequency.items()}
+
+        def vector(document: Counter) -> Dict[str, float]:
+            return {term: (1 + math.log(count)) * idf[term] for term, count in document.items()}
+
+        def norm(vec: Dict[str, float]) -> float:
+            return math.sqrt(sum(weight * weight for weight in vec.values())) or 1.0
+
+        query = vector(terms)
+        query_norm = norm(query)
+        similarities = []
+        for other in others:
+            candidate = vector(other)
+            dot = sum(weight * candidate.get(term, 0.0) for term, weight in query.items())
+            similarities.append(dot / (query_norm * norm(candidate)))
+        return similarities
+
+    @staticmethod
+    def _jaccard(a: Set[str], b: Set[str]) -> Optional[float]:
+        return len(a & b) / len(a | b) if a and b else None
+
+    # --- Lookups --- #
+
+    def _increment(self, conn: sqlite3.Connection, key: str) -> None:
+        conn.execute(
+            "INSERT INTO stats (key, value) VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET value = value + 1",
+            (key,),
+        )
+
+    def query(self, resume: Dict, job_description: Dict) -> Optional[SectionMatch]:
+        """
+        Return the reusable sections of the most similar job this resume was tailored to, if any.
+
+        Every lookup is counted per section in the persistent statistics (`<section>_hits` and
+        `<section>_misses`).
+
+        """
+        if not self.thresholds:
+            return None
+        conn = self._connection()
+        rows = conn.execute("SELECT terms, skills, sections FROM tailorings WHERE resume = ?",
+                            (resume_fingerprint(resume),)).fetchall()
+
+        best: Optional[SectionMatch] = None
+        if rows:
+            terms, skills = job_terms(job_description), job_skills(job_description)
+            cached_terms = [Counter(json.loads(row[0])) for row in rows]
+            for (_, cached_skills, sections), cosine in zip(rows, self._tfidf_cosine(terms, cached_terms)):
+                jaccard = self._jaccard(skills, set(json.loads(cached_skills)))
+                similarity = cosine if jaccard is None else (cosine + jaccard) / 2
+                if best is None or similarity > best.similarity:
+                    best = SectionMatch(sections=json.loads(sections), similarity=similarity)
+
+        reused = {}
+        for section, threshold in self.thresholds.items():
+            if best is not None and best.similarity >= threshold and section in best.sections:
+                reused[section] = best.sections[section]
+                self._increment(conn, f"{section}_hits")
+            else:
+                self._increment(conn, f"{section}_misses")
+
+        return SectionMatch(sections=reused, similarity=best.similarity) if reused else None
+
+    def add(self, resume: Dict, job_description: Dict, sections: Dict[str, Any]) -> None:
+        """Cache the successfully tailored sections of a (resume, job) pair, skipping empty ones."""
+        sections = {section: value for section, value in sections.items() if not _is_empty(value)}
+        if not sections:
+            return
+        terms = job_terms(job_description)
+        job_sha256 = hashlib.sha256(json.dumps(sorted(terms.items())).encode("utf-8")).hexdigest()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO tailorings (resume, job_sha256, terms, skills, sections, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (resume_fingerprint(resume), job_sha256, json.dumps(terms), json.dumps(sorted(job_skills(job_description))),
+             json.dumps(sections), datetime.now().isoformat(timespec="seconds")),
+        )
+
+    # --- Reporting --- #
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-section lookups, hits and hit rate."""
+        counters = dict(self._connection().execute("SELECT key, value FROM stats").fetchall())
+        stats = {}
+        for section in self.thresholds:
+            hits, misses = counters.get(f"{section}_hits", 0), counters.get(f"{section}_misses", 0)
+            stats[section] = dict(lookups=hits + misses, hits=hits,
+                                  hit_rate=hits / (hits + misses) if hits + misses else 0.0)
+        return stats
+
+
+_default_cache: Optional[SectionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_section_cache() -> SectionCache:
+    """Return the process-wide cache for the configured `SECTION_CACHE_DB_PATH`."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SectionCache()
+    return _default_cache
@@ -0,0 +1,435 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from rich import print as rprint
+from rich.table import Table
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+DEFAULT_DB_PATH: str = "data/auto_resume.db"
+
+# Supported values for `STORAGE_BACKEND`:
+#   - "json"   : one timestamped JSON file per result (default)
+#   - "sqlite" : a single SQLite database with an FTS5 index
+#   - "both"   : write to both backends
+STORAGE_BACKENDS = ("json", "sqlite", "both")
+
+_FTS_OPERATORS = ("AND", "OR", "NOT")
+_FTS_TERM_RE = re.compile(r'"[^"]*"\*?|\S+')
+
+
+def get_storage_backend() -> str:
+    backend = os.environ.get("STORAGE_BACKEND", "json").lower()
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}', expected one of {STORAGE_BACKENDS}")
+    return backend
+
+
+# -------------- #
+# --- Schema --- #
+# -------------- #
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id             INTEGER PRIMARY KEY,
+    name           TEXT NOT NULL UNIQUE,
+    file_type      TEXT NOT NULL,
+    title          TEXT,
+    company        TEXT,
+    location       TEXT,
+    skills         TEXT,
+    qualifications TEXT,
+    summary        TEXT,
+    data           TEXT NOT NULL,
+    created_at     TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_documents_file_type ON documents (file_type);
+CREATE INDEX IF NOT EXISTS idx_documents_title ON documents (title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_documents_company ON documents (company COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_documents_location ON documents (location COLLATE NOCASE);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    skills,
+    qualifications,
+    summary,
+    content='documents',
+    content_rowid='id',
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, skills, qualifications, summary)
+    VALUES (new.id, new.skills, new.qualifications, new.summary);
+END;
+
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, skills, qualifications, summary)
+    VALUES ('delete', old.id, old.skills, old.qualifications, old.summary);
+END;
+
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, skills, qualifications, summary)
+    VALUES ('delete', old.id, old.skills, old.qualifications, old.summary);
+    INSERT INTO documents_fts (rowid, skills, qualifications, summary)
+    VALUES (new.id, new.skills, new.qualifications, new.summary);
+END;
+"""
+
+_UPSERT = """
+INSERT INTO documents (name, file_type, title, company, location, skills, qualifications, summary, data, created_at)
+VALUES (:name, :file_type, :title, :company, :location, :skills, :qualifications, :summary, :data, :created_at)
+ON CONFLICT (name) DO UPDATE SET
+    file_type = excluded.file_type,
+    title = excluded.title,
+    company = excluded.company,
+    location = excluded.location,
+    skills = excluded.skills,
+    qualifications = excluded.qualifications,
+    summary = excluded.summary,
+    data = excluded.data,
+    created_at = excluded.created_at
+"""
+
+
+# ------------------------ #
+# --- Helper Functions --- #
+# ------------------------ #
+
+
+def _flatten(value) -> List[str]:
+    """Flatten nested lists / dicts of strings into a flat list of strings."""
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        return [item for v in value.values() for item in _flatten(v)]
+    if isinstance(value, (list, tuple)):
+        return [item for v in value for item in _flatten(v)]
+    return [str(value)]
+
+
+def _first(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return str(value[0]) if value else ""
+    return str(value or "")
+
+
+def fts_query(query: str) -> str:
+    """
+    An FTS5 query where every term is a quoted string, so "C++", "C#" or "node.js" aren't FTS5 syntax errors.
+
+    The AND / OR / NOT operators between two terms, "quoted phrases" and trailing `*` prefixes keep their FTS5
+    meaning; an operator anywhere else (leading, trailing, doubled) is searched as a word.
+    """
+    tokens = _FTS_TERM_RE.findall(query)
+    terms = []
+    for i, term in enumerate(tokens):
+        previous_is_term = bool(terms) and terms[-1] not in _FTS_OPERATORS
+        next_is_term = i + 1 < len(tokens) and tokens[i + 1] not in _FTS_OPERATORS
+        if term in _FTS_OPERATORS and previous_is_term and next_is_term:
+            terms.append(term)
+            continue
+        prefix = term.endswith("*") and len(term) > 1
+        if prefix:
+            term = term[:-1]
+        if len(term) > 1 and term.startswith('"') and term.endswith('"'):
+            term = term[1:-1]
+        terms.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def document_columns(data: Dict, file_type: str) -> Dict[str, str]:
+    """
+    Map a result dictionary to the typed and full-text columns of the store.
+
+    Parameters
+    ----------
+    data : Dict
+        The structured job description, structured resume or tailored resume.
+    file_type : str
+        The type of the document, as passed to `save_to_json`.
+
+    Returns
+    -------
+    Dict[str, str]
+        The `title`, `company`, `location`, `skills`, `qualifications` and `summary` columns.
+
+    """
+    if file_type == "Structured Job Description":
+        return dict(
+            title=data.get("Title", ""),
+            company=data.get("Company", ""),
+            location=data.get("Location", ""),
+            skills="\n".join(_flatten([data.get("Technical_Skills"), data.get("Soft_Skills")])),
+            qualifications="\n".join(_flatten(data.get("Qualifications"))),
+            summary="\n".join(_flatten([data.get("Summary"), data.get("Missions")])),
+        )
+
+    contact_info = data.get("contact_info", {}) or {}
+    experiences = data.get("experiences", data.get("experience", [])) or []
+    return dict(
+        title=_first(contact_info.get("role")),
+        company=data.get("company_applying", ""),
+        location=contact_info.get("city_country", "") or "",
+        skills="\n".join(_flatten(data.get("skills"))),
+        qualifications="\n".join(
+            _flatten([data.get("education"), data.get("certifications", data.get("certificates"))])
+        ),
+        summary="\n".join(
+            _flatten([data.get("introduction")] + [exp.get("summary") for exp in experiences if isinstance(exp, dict)])
+        ),
+    )
+
+
+# -------------------- #
+# --- Result Store --- #
+# -------------------- #
+
+
+class ResultStore:
+    """
+    SQLite-backed store for structured job descriptions and (tailored) resumes.
+
+    Every document is stored once, keyed by its name (the filename `save_to_json` would use, without
+    extension), with typed columns for title, company and location and an FTS5 index over skills,
+    qualifications and summaries. The database runs in WAL mode so that readers never block writers
+    and concurrent writers wait on `busy_timeout` instead of failing.
+
+    Parameters
+    ----------
+    db_path : str, optional
+        Path to the SQLite database, by default `STORAGE_DB_PATH` or "data/auto_resume.db".
+
+    Examples
+    --------
+    >>> store = ResultStore()
+    >>> store.search("kubernetes", location="Berlin", file_type="Structured Job Description")
+
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.environ.get("STORAGE_DB_PATH", DEFAULT_DB_PATH)
+        self._local = threading.local()
+
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads, keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(name: str, data: Dict, file_type: str) -> Dict[str, str]:
+        return dict(
+            name=name,
+            file_type=file_type,
+            data=json.dumps(data),
+            created_at=datetime.now().isoformat(timespec="seconds"),
+            **document_columns(data, file_type),
+        )
+
+    def save(self, name: str, data: Dict, file_type: str) -> str:
+        """Insert or replace a single document, returns its name."""
+        self.save_many([(name, data, file_type)])
+        return name
+
+    def save_many(self, records: Iterable[Tuple[str, Dict, str]]) -> int:
+        """
+        Bulk insert or replace documents in a single write transaction.
+
+        Parameters
+        ----------
+        records : Iterable[Tuple[str, Dict, str]]
+            `(name, data, file_type)` tuples.
+
+        Returns
+        -------
+        int
+            The number of documents written.
+
+        """
+        rows = [self._row(name, data, file_type) for name, data, file_type in records]
+        if not rows:
+            return 0
+
+        conn = self._connection()
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers queue on busy_timeout
+        # instead of failing halfway through the transaction with SQLITE_BUSY.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_UPSERT, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def load(self, name: str) -> Optional[Dict]:
+        row = self._connection().execute("SELECT data FROM documents WHERE name = ?", (name,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def search(
+            self,
+            query: Optional[str] = None,
+            file_type: Optional[str] = None,
+            title: Optional[str] = None,
+            company: Optional[str] = None,
+            location: Optional[str] = None,
+            limit: int = 50,
+    ) -> List[Dict]:
+        """
+        Search documents by full-text query and / or typed columns.
+
+        Parameters
+        ----------
+        query : str, optional
+            A full-text query over skills, qualifications and summaries (e.g. "kubernetes AND C++"), terms
+            are matched literally, AND / OR / NOT, "phrases" and `prefix*` keep their FTS5 meaning.
+        file_type : str, optional
+            Restrict to one document type (e.g. "Structured Job Description").
+        title, company, location : str, optional
+            Case-insensitive substring filters on the typed columns.
+        limit : int, optional
+            Maximum number of results, by default 50.
+
+        Returns
+        -------
+        List[Dict]
+            Matching rows with `name`, `file_type`, `title`, `company`, `location`, `created_at` and `data`,
+            ranked by relevance when a query is given, most recent first otherwise.
+
+        """
+        clauses: List[str] = []
+        params: List = []
+
+        if query:
+            sql = (
+                "SELECT d.* FROM documents_fts f JOIN documents d ON d.id = f.rowid "
+                "WHERE documents_fts MATCH ?"
+            )
+            params.append(fts_query(query))
+        else:
+            sql = "SELECT d.* FROM documents d WHERE 1 = 1"
+
+        if file_type:
+            clauses.append("d.file_type = ?")
+            params.append(file_type)
+        for column, value in (("title", title), ("company", company), ("location", location)):
+            if value:
+                clauses.append(f"d.{column} LIKE ?")
+                params.append(f"%{value}%")
+
+        for clause in clauses:
+            sql += f" AND {clause}"
+        sql += " ORDER BY f.rank" if query else " ORDER BY d.created_at DESC"
+        sql += " LIMIT ?"
+        params.append(limit)
+
+        rows = self._connection().execute(sql, params).fetchall()
+        return [
+            dict(
+                name=row["name"],
+                file_type=row["file_type"],
+                title=row["title"],
+                company=row["company"],
+                location=row["location"],
+                created_at=row["created_at"],
+                data=json.loads(row["data"]),
+            )
+            for row in rows
+        ]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_default_store: Optional[ResultStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_store() -> ResultStore:
+    """Return the process-wide store for the configured `STORAGE_DB_PATH`."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ResultStore()
+    return _default_store
+
+
+# ------------------- #
+# --- Script Args --- #
+# ------------------- #
+
+
+def import_json_files(store: ResultStore, pattern: str, file_type: str) -> int:
+    records = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, "r") as f:
+            records.append((os.path.splitext(os.path.basename(path))[0], json.load(f), file_type))
+    return store.save_many(records)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import and search structured results in the SQLite store.")
+    parser.add_argument("--db_path", default=None, help="Path to the SQLite database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Bulk import existing JSON files")
+    import_parser.add_argument("pattern", help="Glob of JSON files, e.g. 'data/job_descriptions/structured/*.json'")
+    import_parser.add_argument("--file_type", default="Structured Job Description", help="Type of the imported files")
+
+    search_parser = subparsers.add_parser("search", help="Search the store")
+    search_parser.add_argument("query", nargs="?", default=None, help="FTS5 query over skills, qualifications and summaries")
+    search_parser.add_argument("--file_type", default=None)
+    search_parser.add_argument("--title", default=None)
+    search_parser.add_argument("--company", default=None)
+    search_parser.add_argument("--location", default=None)
+    search_parser.add_argument("--limit", type=int, default=50)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    store = ResultStore(args.db_path)
+
+    if args.command == "import":
+        count = import_json_files(store, args.pattern, args.file_type)
+        rprint(f"Imported [bold green]{count}[/bold green] documents into {store.db_path}")
+
+    elif args.command == "search":
+        results = store.search(
+            args.query,
+            file_type=args.file_type,
+            title=args.title,
+            company=args.company,
+            location=args.location,
+            limit=args.limit,
+        )
+        table = Table("Name", "Type", "Title", "Company", "Location")
+        for result in results:
+            table.add_row(result["name"], result["file_type"], result["title"], result["company"], result["location"])
+        rprint(table)
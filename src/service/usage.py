@@ -0,0 +1,72 @@
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+from rich import print as rprint
+from rich.table import Table
+
+# ------------------- #
+# --- Token Usage --- #
+# ------------------- #
+
+
+class UsageTracker:
+    """
+    Thread-safe per-stage token usage, including the prompt tokens served from the provider's prompt cache.
+
+    Examples
+    --------
+    >>> response = client.chat.completions.create(...)
+    >>> usage_tracker.record("skills", response)
+    >>> usage_tracker.print_report()
+
+    """
+
+    FIELDS = ("calls", "prompt_tokens", "cached_tokens", "completion_tokens")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+
+    def record(self, stage: str, response: Any) -> None:
+        """Record the usage of a chat completion response (responses without usage only count as a call)."""
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+
+        with self._lock:
+            stage_usage = self._stages[stage]
+            stage_usage["calls"] += 1
+            stage_usage["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            stage_usage["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+            stage_usage["cached_tokens"] += getattr(details, "cached_tokens", 0) or 0
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage usage and prompt cache hit rate (cached / prompt tokens), plus a "total" entry."""
+        with self._lock:
+            stages = {stage: dict(usage) for stage, usage in self._stages.items()}
+
+        if stages:
+            stages["total"] = {field: sum(usage[field] for usage in stages.values()) for field in self.FIELDS}
+        for usage in stages.values():
+            usage["cache_hit_rate"] = usage["cached_tokens"] / usage["prompt_tokens"] if usage["prompt_tokens"] else 0.0
+        return stages
+
+    def print_report(self) -> None:
+        table = Table("Stage", "Calls", "Prompt tokens", "Cached tokens", "Cache hit rate", "Completion tokens")
+        for stage, usage in self.report().items():
+            table.add_row(
+                stage,
+                str(usage["calls"]),
+                str(usage["prompt_tokens"]),
+                str(usage["cached_tokens"]),
+                f"{usage['cache_hit_rate']:.1%}",
+                str(usage["completion_tokens"]),
+            )
+        rprint(table)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+
+usage_tracker = UsageTracker()
@@ -0,0 +1,274 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import hashlib
+import json
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+# --------------------- #
+# --- Configuration --- #
+# --------------------- #
+
+DEFAULT_WATCH_STATE_PATH: str = os.environ.get("WATCH_STATE_PATH", "data/job_descriptions/watch_state.json")
+
+# inotify events (see `man 7 inotify`): a file written and closed, or moved into the folder
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+# ---------------- #
+# --- Watchers --- #
+# ---------------- #
+
+
+class InotifyWatcher:
+    """Changed files of a folder, from Linux inotify (through libc, no extra dependency)."""
+
+    def __init__(self, folder: str):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.folder = folder
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for '{folder}'")
+
+    def changes(self, timeout: float) -> List[str]:
+        """Paths changed since the last call, waiting up to `timeout` seconds for the first one."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths, offset = [], 0
+        while offset < len(buffer):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            name = buffer[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + length
+            if mask & _IN_Q_OVERFLOW:  # events were dropped, rescan everything
+                paths.extend(os.path.join(self.folder, name) for name in os.listdir(self.folder))
+            elif name:
+                paths.append(os.path.join(self.folder, os.fsdecode(name)))
+        return paths
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Changed files of a folder, by comparing the size and modification time of its files."""
+
+    def __init__(self, folder: str, interval: float = 1.0):
+        self.folder = folder
+        self.interval = interval
+        self._seen: Dict[str, Tuple[int, float]] = {}
+
+    def changes(self, timeout: float) -> List[str]:
+        time.sleep(min(timeout, self.interval))
+        paths, seen = [], {}
+        for entry in os.scandir(self.folder):
+            if entry.is_file():
+                stat = entry.stat()
+                seen[entry.path] = (stat.st_size, stat.st_mtime)
+                if self._seen.get(entry.path) != seen[entry.path]:
+                    paths.append(entry.path)
+        self._seen = seen
+        return paths
+
+    def close(self) -> None:
+        pass
+
+
+def get_watcher(folder: str, use_inotify: bool = True, poll_interval: float = 1.0):
+    """An inotify watcher where available, a polling one otherwise."""
+    if use_inotify:
+        try:
+            return InotifyWatcher(folder)
+        except (OSError, AttributeError) as e:  # not Linux, no libc, or out of inotify watches
+            logger.warning(f"inotify unavailable, polling '{folder}' every {poll_interval}s instead:\n   {e}")
+    return PollingWatcher(folder, interval=poll_interval)
+
+
+# ---------------------- #
+# --- Folder Watcher --- #
+# ---------------------- #
+
+
+class FolderWatcher:
+    """
+    Run a handler on every new or changed file of a folder, once per distinct content.
+
+    Changes are debounced (a file is only handled once it hasn't changed for `debounce` seconds, so partial
+    writes are never read), handled by at most `max_workers` threads, and the SHA-256 of every handled
+    content is persisted, so a file copied twice, touched, or still there after a restart is skipped.
+
+    Parameters
+    ----------
+    folder : str
+        The folder to watch (not recursive).
+    handler : Callable[[str, str], None]
+        Called as `handler(path, content)` for each file to process.
+    pattern : str, optional
+        Only handle files matching this glob, by default "*.txt".
+    debounce : float, optional
+        Quiet period in seconds before a changed file is handled, by default 2.
+    max_workers : int, optional
+        Maximum concurrent handlers, by default 2.
+    state_path : str, optional
+        Where the handled content hashes are persisted, by default `WATCH_STATE_PATH`.
+    use_inotify : bool, optional
+        Use inotify where available (polling otherwise), by default True.
+
+    Examples
+    --------
+    >>> watcher = FolderWatcher("data/job_descriptions/raw", handler=process_file)
+    >>> watcher.run()  # until interrupted
+
+    """
+
+    def __init__(
+            self,
+            folder: str,
+            handler: Callable[[str, str], None],
+            pattern: str = "*.txt",
+            debounce: float = 2.0,
+            max_workers: int = 2,
+            state_path: str = DEFAULT_WATCH_STATE_PATH,
+            use_inotify: bool = True,
+    ):
+        self.folder = folder
+        self.handler = handler
+        self.pattern = pattern
+        self.debounce = debounce
+        self.max_workers = max_workers
+        self.state_path = state_path
+        self.use_inotify = use_inotify
+
+        self._lock = threading.Lock()
+        self._processed: Dict[str, str] = self._load_state()  # sha256 -> first path
+        self._in_flight: Set[str] = set()
+        self._slots = threading.BoundedSemaphore(2 * max_workers)  # bounded backlog
+        self.stats = {"handled": 0, "skipped": 0, "failed": 0}
+
+    # --- State --- #
+
+    def _load_state(self) -> Dict[str, str]:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r") as f:
+            return json.load(f)
+
+    def _save_state(self) -> None:
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._processed, f)
+        os.replace(tmp_path, self.state_path)
+
+    # --- Handling --- #
+
+    def _handle(self, path: str) -> None:
+        try:
+            with open(path, "r") as f:
+                content = f.read()
+            digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+            with self._lock:
+                if digest in self._processed or digest in self._in_flight:
+                    self.stats["skipped"] += 1
+                    logger.info(f"Skipping '{path}', content already processed.")
+                    return
+                self._in_flight.add(digest)
+
+            try:
+                self.handler(path, content)
+                with self._lock:
+                    self._processed[digest] = path
+                    self.stats["handled"] += 1
+                    self._save_state()
+            finally:
+                with self._lock:
+                    self._in_flight.discard(digest)
+
+        except Exception as e:  # a bad file must not stop the watcher
+            with self._lock:
+                self.stats["failed"] += 1
+            logger.error(f"Failed to process '{path}':\n   {e}")
+        finally:
+            self._slots.release()
+
+    def _matches(self, path: str) -> bool:
+        name = os.path.basename(path)
+        return fnmatch.fnmatch(name, self.pattern) and not name.startswith(".") and os.path.isfile(path)
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """Watch until `stop` is set or the process is interrupted, handling existing files first."""
+        os.makedirs(self.folder, exist_ok=True)
+        stop = stop or threading.Event()
+        watcher = get_watcher(self.folder, use_inotify=self.use_inotify)
+        logger.info(f"Watching '{self.folder}' for '{self.pattern}' files ({type(watcher).__name__}, "
+                    f"{self.max_workers} workers)")
+
+        # path -> (time of the last change, (size, mtime) at that time)
+        pending: Dict[str, Tuple[float, Tuple[int, float]]] = {}
+
+        def touch(path: str) -> None:
+            if self._matches(path):
+                stat = os.stat(path)
+                pending[path] = (time.monotonic(), (stat.st_size, stat.st_mtime))
+
+        for entry in os.scandir(self.folder):
+            touch(entry.path)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="watch") as executor:
+            try:
+                while not stop.is_set():
+                    for path in watcher.changes(timeout=min(self.debounce, 1.0)):
+                        try:
+                            touch(path)
+                        except FileNotFoundError:  # already moved away or deleted
+                            pending.pop(path, None)
+
+                    now = time.monotonic()
+                    for path, (last_change, signature) in list(pending.items()):
+                        if now - last_change < self.debounce:
+                            continue
+                        try:
+                            stat = os.stat(path)
+                        except FileNotFoundError:
+                            pending.pop(path)
+                            continue
+                        if (stat.st_size, stat.st_mtime) != signature:  # still being written
+                            pending[path] = (now, (stat.st_size, stat.st_mtime))
+                            continue
+
+                        pending.pop(path)
+                        self._slots.acquire()  # blocks while the backlog is full
+                        executor.submit(self._handle, path)
+            except KeyboardInterrupt:
+                logger.info("Stopping the watcher, waiting for the files being processed...")
+            finally:
+                watcher.close()
+
+        logger.info(f"Watcher stopped: {self.stats['handled']} processed, {self.stats['skipped']} skipped "
+                    f"(already processed), {self.stats['failed']} failed")